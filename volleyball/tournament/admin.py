@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import TournamentGroup, Venue, Team, Tournament, Match, StandingsCache
+from .models import TournamentGroup, Venue, Team, Tournament, Match, StandingsCache, Counter
 
 
 @admin.register(TournamentGroup)
@@ -82,10 +82,21 @@ class MatchAdmin(admin.ModelAdmin):
 
 @admin.register(StandingsCache)
 class StandingsCacheAdmin(admin.ModelAdmin):
-    list_display = ['tournament', 'team', 'played', 'won', 'lost', 'sets_won', 'sets_lost', 'points']
+    list_display = ['tournament', 'team', 'played', 'won', 'lost', 'sets_won', 'sets_lost',
+                    'points_won', 'points_lost', 'points']
     list_filter = ['tournament']
     search_fields = ['team__name']
-    readonly_fields = ['played', 'won', 'lost', 'sets_won', 'sets_lost', 'points']
+    readonly_fields = ['played', 'won', 'lost', 'sets_won', 'sets_lost', 'points_won', 'points_lost', 'points']
 
     def has_add_permission(self, request):
-        return False
\ No newline at end of file
+        return False
+
+
+@admin.register(Counter)
+class CounterAdmin(admin.ModelAdmin):
+    list_display = ['key', 'value']
+    search_fields = ['key']
+    readonly_fields = ['key', 'value']
+
+    def has_add_permission(self, request):
+        return False
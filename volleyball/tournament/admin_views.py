@@ -1,9 +1,19 @@
+from django.http import JsonResponse
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib.auth import authenticate, login, logout
 from django.contrib import messages
+from django.db import transaction
 from django.db.models import Q, Count
+from django.urls import reverse
+from django.utils import timezone
+from .counters import dashboard_counters, refresh_loaded_counters
+from .instrumentation import request_log
 from .models import Team, Venue, TournamentGroup, Tournament, Match
+from .pagination import KeysetPaginator, read_cursor
+from .search import matching as search_matching, suggest
+from .signals import process_match_changes
+from .snapshot import MatchRecord
 from .views import check_and_generate_playoff
 
 
@@ -16,16 +26,29 @@ def is_staff(user):
 @user_passes_test(is_staff)
 def admin_dashboard(request):
     """Главная страница админки"""
-    context = {
-        'teams_count': Team.objects.count(),
-        'venues_count': Venue.objects.count(),
-        'groups_count': TournamentGroup.objects.count(),
-        'tournaments_count': Tournament.objects.count(),
-        'matches_count': Match.objects.count(),
-    }
+    # Количества - из поддерживаемых счетчиков (один запрос вместо COUNT(*) по таблицам)
+    context = dashboard_counters()
+    # Сводка по последним запросам этого процесса
+    context['request_stats'] = request_log.summary()
     return render(request, 'tournament/admin/dashboard.html', context)
 
 
+@login_required
+@user_passes_test(is_staff)
+def admin_search_suggest(request):
+    """Подсказки для полей поиска по мере ввода (команды и места проведения)"""
+    term = request.GET.get('q', '').strip()
+    kinds = {'team': Team, 'venue': Venue}
+    requested = request.GET.get('kind', '')
+    models = {requested: kinds[requested]} if requested in kinds else kinds
+
+    results = []
+    if term:
+        for kind, model in models.items():
+            results.extend({'kind': kind, 'id': pk, 'name': name} for pk, name in suggest(model, term))
+    return JsonResponse({'results': results}, json_dumps_params={'ensure_ascii': False})
+
+
 # ============= КОМАНДЫ =============
 
 @login_required
@@ -38,7 +61,7 @@ def admin_teams_list(request):
     teams = Team.objects.all()
 
     if search:
-        teams = teams.filter(name__icontains=search)
+        teams = teams.filter(pk__in=search_matching(Team, search))
 
     if gender_filter:
         teams = teams.filter(gender=gender_filter)
@@ -132,7 +155,7 @@ def admin_venues_list(request):
     venues = Venue.objects.all()
 
     if search:
-        venues = venues.filter(Q(name__icontains=search) | Q(address__icontains=search))
+        venues = venues.filter(Q(pk__in=search_matching(Venue, search)) | Q(address__icontains=search))
 
     venues = venues.order_by('name')
 
@@ -511,25 +534,54 @@ def admin_tournament_delete(request, tournament_id):
 
 # ============= МАТЧИ =============
 
+# Порядок списка матчей (ключ курсора) и размер страницы
+MATCHES_ORDERING = ('date_time', 'round_number', 'id')
+MATCHES_PER_PAGE = 50
+MATCHES_CURSOR_SALT = 'tournament.admin_matches'
+
 @login_required
 @user_passes_test(is_staff)
 def admin_matches_list(request):
-    """Список матчей"""
-    search = request.GET.get('search', '')
-    tournament_filter = request.GET.get('tournament', '')
-    stage_filter = request.GET.get('stage', '')
-    finished_filter = request.GET.get('finished', '')
+    """Список матчей (постранично, по курсору)"""
+    paginator_state = {
+        'search': request.GET.get('search', ''),
+        'tournament': request.GET.get('tournament', ''),
+        'stage': request.GET.get('stage', ''),
+        'finished': request.GET.get('finished', ''),
+    }
+    position = None
+    cursor = request.GET.get('cursor', '')
+    if cursor:
+        # Переход по страницам: фильтры берутся из подписанного курсора
+        position = read_cursor(cursor, MATCHES_CURSOR_SALT)
+        if position is None:
+            messages.warning(request, 'Ссылка на страницу устарела, показана первая страница')
+        else:
+            paginator_state = {key: str(position[0].get(key, '')) for key in paginator_state}
 
-    matches = Match.objects.prefetch_related('tournament', 'team_a', 'team_b', 'venue')
+    search = paginator_state['search']
+    tournament_filter = paginator_state['tournament']
+    stage_filter = paginator_state['stage']
+    finished_filter = paginator_state['finished']
+
+    matches = Match.objects.select_related('tournament', 'team_a', 'team_b', 'venue')
 
     if search:
+        # Все слова запроса - в названии одной команды или одного места, в любом порядке
+        # (раньше искалась вся строка целиком как подстрока названия)
+        found_teams = search_matching(Team, search, fuzzy=False)
+        found_venues = search_matching(Venue, search, fuzzy=False)
+        if not found_teams and not found_venues:
+            # Точных совпадений нет ни среди команд, ни среди мест - ищем с опечаткой
+            found_teams = search_matching(Team, search)
+            found_venues = search_matching(Venue, search)
         matches = matches.filter(
-            Q(team_a__name__icontains=search) |
-            Q(team_b__name__icontains=search) |
-            Q(venue__name__icontains=search)
+            Q(team_a_id__in=found_teams) |
+            Q(team_b_id__in=found_teams) |
+            Q(venue_id__in=found_venues)
         )
 
-    if tournament_filter:
+    if tournament_filter.isdigit():
         matches = matches.filter(tournament_id=tournament_filter)
 
     if stage_filter:
@@ -541,12 +593,15 @@ def admin_matches_list(request):
         elif finished_filter == 'not_finished':
             matches = matches.filter(is_finished=False)
 
-    matches = matches.order_by('-date_time', '-round_number')
+    paginator = KeysetPaginator(matches, MATCHES_ORDERING, MATCHES_PER_PAGE, MATCHES_CURSOR_SALT)
+    page = paginator.page(paginator_state, position)
     tournaments = Tournament.objects.all()
     stages = Match._meta.get_field('stage').choices
 
     context = {
-        'matches': matches,
+        'matches': page,
+        'page': page,
+        'paginated': position is not None,
         'tournaments': tournaments,
         'stages': stages,
         'search': search,
@@ -782,4 +837,158 @@ def admin_match_delete(request, match_id):
     context = {
         'match': match,
     }
-    return render(request, 'tournament/admin/match_confirm_delete.html', context)
\ No newline at end of file
+    return render(request, 'tournament/admin/match_confirm_delete.html', context)
+
+
+# ============= РЕЗУЛЬТАТЫ ТУРА =============
+
+# Партий в форме результатов тура
+ROUND_SETS = 5
+
+
+def _round_key(stage, round_number):
+    return f'{stage}-{round_number}' if round_number is not None else stage
+
+
+def _round_title(stage, round_number):
+    if stage == 'REGULAR' and round_number is not None:
+        return f'Тур {round_number}'
+    title = dict(Match.STAGE_CHOICES).get(stage, stage)
+    return f'{title} {round_number}' if round_number is not None else title
+
+
+def round_choices(tournament):
+    """
+    Туры и этапы турнира (один запрос): список (ключ, заголовок, этап, номер тура,
+    несыгранных матчей) в порядке этапов
+    """
+    stage_order = {stage: index for index, (stage, _) in enumerate(Match.STAGE_CHOICES)}
+    rows = tournament.matches.order_by().values('stage', 'round_number').annotate(
+        unfinished=Count('id', filter=Q(is_finished=False))
+    )
+    rows = sorted(rows, key=lambda row: (
+        stage_order.get(row['stage'], len(stage_order)),
+        row['round_number'] is None,
+        row['round_number'] or 0,
+    ))
+    return [
+        (_round_key(row['stage'], row['round_number']), _round_title(row['stage'], row['round_number']),
+         row['stage'], row['round_number'], row['unfinished'])
+        for row in rows
+    ]
+
+
+def _parse_round_scores(data, match):
+    """
+    Счет матча из формы результатов тура: (введенные значения, партии, ошибка).
+    Партии - None, если поля матча пустые (матч не меняется)
+    """
+    entered = []
+    set_scores = []
+    error = None
+    for number in range(1, ROUND_SETS + 1):
+        raw_a = data.get(f'set-a-{match.id}-{number}', '').strip()
+        raw_b = data.get(f'set-b-{match.id}-{number}', '').strip()
+        entered.append((raw_a, raw_b))
+        if error or (not raw_a and not raw_b):
+            continue
+        if not raw_a or not raw_b:
+            error = f'Партия {number}: нужен счет обеих команд'
+        elif not raw_a.isdigit() or not raw_b.isdigit():
+            error = f'Партия {number}: счет должен быть неотрицательным числом'
+        elif int(raw_a) == int(raw_b):
+            error = f'Партия {number}: ничьей в партии быть не может'
+        else:
+            set_scores.append({'a': int(raw_a), 'b': int(raw_b)})
+
+    if error is None and set_scores:
+        sets_a = sum(1 for score in set_scores if score['a'] > score['b'])
+        if sets_a * 2 == len(set_scores):
+            error = 'Равное количество выигранных партий'
+    return entered, (set_scores or None), error
+
+
+@login_required
+@user_passes_test(is_staff)
+def admin_round_results(request, tournament_id):
+    """
+    Результаты всех матчей тура одной формой. Счет проверяется в памяти,
+    затем все матчи сохраняются одним bulk_update в одной транзакции;
+    таблица, счетчики, кеш страниц и проверка плэйофф выполняются один раз на форму
+    """
+    tournament = get_object_or_404(Tournament, id=tournament_id)
+    rounds = round_choices(tournament)
+
+    selected = request.GET.get('round', '')
+    current = next((choice for choice in rounds if choice[0] == selected), None)
+    if current is None and rounds:
+        # По умолчанию - первый тур с несыгранными матчами
+        current = next((choice for choice in rounds if choice[4]), rounds[-1])
+
+    matches = []
+    if current is not None:
+        _, _, stage, round_number, _ = current
+        matches = list(
+            tournament.matches.filter(stage=stage, round_number=round_number)
+            .select_related('team_a', 'team_b')
+            .order_by('date_time', 'id')
+        )
+
+    rows = []
+    for match in matches:
+        scores = list(match.set_scores or [])[:ROUND_SETS]
+        entered = [(str(score['a']), str(score['b'])) for score in scores]
+        entered += [('', '')] * (ROUND_SETS - len(entered))
+        rows.append({'match': match, 'sets': entered, 'error': None})
+
+    if request.method == 'POST' and current is not None:
+        pending = []
+        for row in rows:
+            match = row['match']
+            row['sets'], set_scores, row['error'] = _parse_round_scores(request.POST, match)
+            if row['error'] or set_scores is None:
+                continue
+            sets_a = sum(1 for score in set_scores if score['a'] > score['b'])
+            sets_b = len(set_scores) - sets_a
+            if match.is_finished and (match.sets_a, match.sets_b, match.set_scores) == (sets_a, sets_b, set_scores):
+                continue
+            pending.append((match, sets_a, sets_b, set_scores))
+
+        errors = [row for row in rows if row['error']]
+        if errors:
+            messages.error(request, f'Результаты не сохранены: ошибок - {len(errors)}')
+        else:
+            changes = []
+            now = timezone.now()
+            for match, sets_a, sets_b, set_scores in pending:
+                previous = MatchRecord.from_match(match)
+                match.sets_a = sets_a
+                match.sets_b = sets_b
+                match.set_scores = set_scores
+                match.is_finished = True
+                match.updated_at = now
+                changes.append((previous, MatchRecord.from_match(match)))
+
+            if pending:
+                with transaction.atomic():
+                    Match.objects.bulk_update(
+                        [match for match, _, _, _ in pending],
+                        ['sets_a', 'sets_b', 'set_scores', 'is_finished', 'updated_at'],
+                    )
+                    # bulk_update не отправляет сигналов: последствия - один раз на всю форму
+                    fresh = process_match_changes(changes)
+                refresh_loaded_counters(tournament, fresh)
+                check_and_generate_playoff(tournament)
+
+            messages.success(request, f'Сохранено результатов: {len(pending)}')
+            url = reverse('tournament:admin_round_results', args=[tournament.id])
+            return redirect(f'{url}?round={current[0]}')
+
+    context = {
+        'tournament': tournament,
+        'rounds': rounds,
+        'current': current,
+        'rows': rows,
+        'set_numbers': range(1, ROUND_SETS + 1),
+    }
+    return render(request, 'tournament/admin/round_results.html', context)
@@ -0,0 +1,212 @@
+from functools import wraps
+
+from django.conf import settings
+from django.http import JsonResponse
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition, require_GET
+
+from .conditional import tournament_etag, tournament_last_modified
+from .models import Tournament
+from .snapshot import TournamentSnapshot
+from .views import calculate_standings, calculate_matrix_table, get_schedule_by_rounds, get_playoff_matches
+
+
+STANDINGS_FIELDS = (
+    'position', 'team', 'played', 'won', 'lost', 'sets_won', 'sets_lost', 'sets_diff',
+    'points_won', 'points_lost', 'points_diff', 'tournament_points',
+)
+
+MATCH_FIELDS = (
+    'id', 'stage', 'round_number', 'date_time', 'team_a', 'team_b', 'venue',
+    'is_finished', 'sets_a', 'sets_b', 'set_scores',
+)
+
+
+class ApiError(Exception):
+    """Ошибка запроса к API (ответ 400)"""
+
+
+def _json(data, status=200):
+    return JsonResponse(
+        data,
+        status=status,
+        json_dumps_params={'ensure_ascii': False, 'separators': (',', ':')},
+    )
+
+
+def _requested_fields(request, allowed):
+    """Поля из параметра ?fields=a,b,c (None - все поля)"""
+    raw = request.GET.get('fields', '')
+    fields = [field.strip() for field in raw.split(',') if field.strip()]
+    if not fields:
+        return None
+
+    unknown = [field for field in fields if field not in allowed]
+    if unknown:
+        raise ApiError(f'Неизвестные поля: {", ".join(unknown)}. Доступны: {", ".join(allowed)}')
+    return fields
+
+
+def _select(item, fields):
+    if fields is None:
+        return item
+    return {field: item[field] for field in fields}
+
+
+def _team(team):
+    return {'id': team.id, 'name': team.name}
+
+
+def serialize_standings_row(position, row):
+    return {
+        'position': position,
+        'team': _team(row.team),
+        'played': row.played,
+        'won': row.won,
+        'lost': row.lost,
+        'sets_won': row.sets_won,
+        'sets_lost': row.sets_lost,
+        'sets_diff': row.sets_diff,
+        'points_won': row.points_won,
+        'points_lost': row.points_lost,
+        'points_diff': row.points_diff,
+        'tournament_points': row.tournament_points,
+    }
+
+
+def serialize_match(match):
+    return {
+        'id': match.id,
+        'stage': match.stage,
+        'round_number': match.round_number,
+        'date_time': match.date_time.isoformat() if match.date_time else None,
+        'team_a': _team(match.team_a),
+        'team_b': _team(match.team_b),
+        'venue': match.venue.name if match.venue else None,
+        'is_finished': match.is_finished,
+        'sets_a': match.sets_a,
+        'sets_b': match.sets_b,
+        'set_scores': match.set_scores or [],
+    }
+
+
+def _cache_successful(view_func):
+    """
+    Короткое публичное кеширование и валидаторы - только для успешных ответов:
+    ошибки (404, 400 на неверный ?fields или ?circle) прокси сохранять не должны
+    """
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        response = view_func(request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            patch_cache_control(response, public=True, max_age=settings.API_CACHE_MAX_AGE)
+        else:
+            response.headers.pop('ETag', None)
+            response.headers.pop('Last-Modified', None)
+        return response
+
+    return wrapper
+
+
+def tournament_api(view_func):
+    """
+    Общая обвязка API турнира: загрузка турнира с командами, JSON-ответ,
+    короткое публичное кеширование и условные запросы (ETag/Last-Modified)
+    """
+    @require_GET
+    @_cache_successful
+    @condition(etag_func=tournament_etag, last_modified_func=tournament_last_modified)
+    @wraps(view_func)
+    def wrapper(request, tournament_id):
+        tournament = Tournament.objects.prefetch_related('teams').filter(pk=tournament_id).first()
+        if tournament is None:
+            return _json({'error': 'Турнир не найден'}, status=404)
+
+        try:
+            data = view_func(request, tournament)
+        except ApiError as e:
+            return _json({'error': str(e)}, status=400)
+
+        return _json({'tournament': tournament.id, **data})
+
+    return wrapper
+
+
+@tournament_api
+def api_standings(request, tournament):
+    """Турнирная таблица"""
+    fields = _requested_fields(request, STANDINGS_FIELDS)
+    standings = calculate_standings(tournament)
+    return {
+        'standings': [
+            _select(serialize_standings_row(position, row), fields)
+            for position, row in enumerate(standings, start=1)
+        ],
+    }
+
+
+@tournament_api
+def api_matrix(request, tournament):
+    """
+    Матричная таблица по кругам. Строка - список ячеек в порядке teams:
+    null на диагонали и для несыгранных пар, иначе счет "3:1" с точки зрения команды строки.
+    ?circle=N - только N-й круг
+    """
+    matrix = calculate_matrix_table(tournament)
+    circles = matrix['circles']
+
+    circle = request.GET.get('circle')
+    if circle:
+        try:
+            circle = int(circle)
+        except ValueError:
+            raise ApiError('Параметр circle должен быть числом')
+        circles = [c for c in circles if c['number'] == circle]
+        if not circles:
+            raise ApiError(f'Круга {circle} нет в турнире')
+
+    return {
+        'teams': [_team(team) for team in matrix['teams']],
+        'circles': [
+            {
+                'number': c['number'],
+                'rows': [
+                    [None if cell['is_self'] else cell['score'] for cell in row['results']]
+                    for row in c['matrix']
+                ],
+            }
+            for c in circles
+        ],
+    }
+
+
+@tournament_api
+def api_schedule(request, tournament):
+    """Расписание по турам"""
+    fields = _requested_fields(request, MATCH_FIELDS)
+    snapshot = TournamentSnapshot.build(tournament)
+    return {
+        'schedule': [
+            {
+                'title': title,
+                'matches': [_select(serialize_match(match), fields) for match in matches],
+            }
+            for title, matches in get_schedule_by_rounds(tournament, snapshot)
+        ],
+    }
+
+
+@tournament_api
+def api_playoff(request, tournament):
+    """Матчи плэйофф по этапам"""
+    fields = _requested_fields(request, MATCH_FIELDS)
+    snapshot = TournamentSnapshot.build(tournament)
+    return {
+        'playoff': [
+            {
+                'title': title,
+                'matches': [_select(serialize_match(match), fields) for match in matches],
+            }
+            for title, matches in get_playoff_matches(tournament, snapshot)
+        ],
+    }
@@ -0,0 +1,98 @@
+import mimetypes
+import os
+from functools import lru_cache
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage, staticfiles_storage
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date
+from django.views.decorators.http import require_safe
+from django.views.static import was_modified_since
+
+from .compression import EXTENSIONS, compressed_variants, negotiate
+
+
+# Файлы, которые имеет смысл сжимать (картинки и шрифты уже сжаты)
+COMPRESSIBLE = ('.css', '.js', '.svg', '.json', '.txt', '.map', '.html', '.xml')
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    ManifestStaticFilesStorage (имена с хешем содержимого), которая после collectstatic
+    кладет рядом с каждым файлом с хешем его .gz и .br
+    """
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+
+        for name in set(self.hashed_files.values()):
+            if name.endswith(COMPRESSIBLE):
+                self.write_variants(name)
+
+    def write_variants(self, name):
+        path = self.path(name)
+        with open(path, 'rb') as f:
+            variants = compressed_variants(f.read())
+        for encoding, extension in EXTENSIONS.items():
+            if encoding in variants:
+                with open(path + extension, 'wb') as f:
+                    f.write(variants[encoding])
+            elif os.path.exists(path + extension):
+                os.remove(path + extension)
+
+
+@lru_cache(maxsize=None)
+def hashed_names():
+    """Имена файлов с хешем из манифеста collectstatic (их содержимое никогда не меняется)"""
+    return frozenset(getattr(staticfiles_storage, 'hashed_files', {}).values())
+
+
+@require_safe
+def static_asset(request, path):
+    """
+    Статические файлы из STATIC_ROOT для запуска без nginx (gunicorn, uvicorn):
+    предварительно сжатый вариант по Accept-Encoding, для имен с хешем -
+    кеширование на год с immutable, для остальных - проверка при каждом запросе
+    """
+    try:
+        full_path = safe_join(settings.STATIC_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404('Файл не найден')
+    if not os.path.isfile(full_path):
+        raise Http404('Файл не найден')
+
+    stat = os.stat(full_path)
+    available = {
+        encoding for encoding, extension in EXTENSIONS.items()
+        if os.path.isfile(full_path + extension)
+    }
+    # Заголовки кеширования одинаковы для 200 и 304: ответ 304 обновляет их в кеше
+    headers = {'Last-Modified': http_date(stat.st_mtime)}
+    if path in hashed_names():
+        headers['Cache-Control'] = f'public, max-age={settings.STATIC_ASSETS_MAX_AGE}, immutable'
+    else:
+        headers['Cache-Control'] = 'public, no-cache'
+
+    if not was_modified_since(request.headers.get('If-Modified-Since'), stat.st_mtime):
+        response = HttpResponseNotModified()
+    else:
+        encoding = negotiate(request.headers.get('Accept-Encoding', ''), available)
+        content_type, _ = mimetypes.guess_type(full_path)
+        response = FileResponse(
+            open(full_path + EXTENSIONS.get(encoding, ''), 'rb'),
+            content_type=content_type or 'application/octet-stream',
+            filename=os.path.basename(full_path),
+        )
+        if encoding != 'identity':
+            response['Content-Encoding'] = encoding
+
+    for name, value in headers.items():
+        response[name] = value
+    if available:
+        patch_vary_headers(response, ('Accept-Encoding',))
+    return response
@@ -0,0 +1,188 @@
+import uuid
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+
+from . import metrics
+from .compression import compressed_variants, negotiate
+
+
+NAVIGATION_VERSION_KEY = 'navigation:version'
+
+
+def tournament_version_key(tournament_id):
+    return f'tournament:{tournament_id}:version'
+
+
+def _new_version():
+    # Каждая смена версии дает новое уникальное значение: в отличие от incr(),
+    # одновременные изменения из разных воркеров не могут вернуть уже виденную версию
+    return uuid.uuid4().hex
+
+
+def get_versions(*keys):
+    """Текущие версии по ключам (одним обращением к кешу), отсутствующие создаются"""
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key in versions:
+            metrics.cache_hit('version')
+        else:
+            metrics.cache_miss('version')
+            version = _new_version()
+            if not cache.add(key, version, None):
+                version = cache.get(key, version)
+            versions[key] = version
+    return versions
+
+
+async def aget_versions(*keys):
+    """То же для асинхронных view"""
+    versions = await cache.aget_many(keys)
+    for key in keys:
+        if key in versions:
+            metrics.cache_hit('version')
+        else:
+            metrics.cache_miss('version')
+            version = _new_version()
+            if not await cache.aadd(key, version, None):
+                version = await cache.aget(key, version)
+            versions[key] = version
+    return versions
+
+
+def _bump(keys):
+    keys = list(keys)
+    if not keys:
+        return
+
+    def bump():
+        cache.set_many({key: _new_version() for key in keys}, None)
+
+    # Версия меняется только после фиксации транзакции, иначе другой воркер
+    # может успеть закешировать страницу со старыми данными под новой версией
+    transaction.on_commit(bump)
+
+
+def bump_tournament_versions(tournament_ids):
+    """Сбрасывает кеш страниц указанных турниров"""
+    _bump(tournament_version_key(tournament_id) for tournament_id in set(tournament_ids) if tournament_id)
+
+
+def bump_navigation_version():
+    """Сбрасывает кеш всех страниц с меню навигации (группы и турниры)"""
+    _bump([NAVIGATION_VERSION_KEY])
+
+
+def _page_key(tournament_id, versions):
+    version_key = tournament_version_key(tournament_id)
+    return f'page:compressed:tournament:{tournament_id}:{versions[version_key]}:{versions[NAVIGATION_VERSION_KEY]}'
+
+
+def tournament_page_key(tournament_id):
+    """Ключ страницы турнира: меняется при изменении турнира или меню навигации"""
+    return _page_key(tournament_id, get_versions(tournament_version_key(tournament_id), NAVIGATION_VERSION_KEY))
+
+
+async def atournament_page_key(tournament_id):
+    return _page_key(tournament_id, await aget_versions(tournament_version_key(tournament_id), NAVIGATION_VERSION_KEY))
+
+
+def cached_page(request, tournament_id):
+    """
+    (ключ, запись) кеша страницы турнира; читается один раз за запрос:
+    по записи condition() получает ETag и Last-Modified, затем она же отдается
+    """
+    if not hasattr(request, '_page_cache'):
+        key = tournament_page_key(tournament_id)
+        request._page_cache = (key, cache.get(key))
+    return request._page_cache
+
+
+async def acached_page(request, tournament_id):
+    if not hasattr(request, '_page_cache'):
+        key = await atournament_page_key(tournament_id)
+        request._page_cache = (key, await cache.aget(key))
+    return request._page_cache
+
+
+def page_entry(request, response):
+    """
+    Запись кеша страницы: тип содержимого и тело без сжатия, в gzip и в brotli,
+    и состояние страницы (etag, last_modified), посчитанное для condition().
+    Сжимается один раз при сохранении, попадания в кеш отдают готовые байты
+    и отвечают на условные запросы без обращения к БД
+    """
+    content = response.content
+    return {
+        'content_type': response['Content-Type'],
+        'variants': {'identity': content, **compressed_variants(content)},
+        'state': getattr(request, '_page_state', None),
+    }
+
+
+def page_response(request, entry):
+    """Ответ из записи кеша в кодировке, выбранной по Accept-Encoding запроса"""
+    encoding = negotiate(request.headers.get('Accept-Encoding', ''), entry['variants'])
+    response = HttpResponse(entry['variants'][encoding], content_type=entry['content_type'])
+    if encoding != 'identity':
+        response['Content-Encoding'] = encoding
+    patch_vary_headers(response, ('Accept-Encoding',))
+    return response
+
+
+def _cacheable(response):
+    return response.status_code == 200 and not response.streaming
+
+
+def cache_tournament_page(view_func):
+    """
+    Кеширует готовую страницу турнира под ключом с версией, сразу в сжатом виде
+    (page_entry), и отдает ее в кодировке по Accept-Encoding.
+    Инвалидация точная: версия меняется сигналами при изменении данных, TTL нужен
+    только для очистки старых записей. Подходит и для асинхронных view
+    """
+    @wraps(view_func)
+    def wrapper(request, tournament_id, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return view_func(request, tournament_id, *args, **kwargs)
+
+        key, entry = cached_page(request, tournament_id)
+        if entry is not None:
+            metrics.cache_hit('tournament_page')
+            return page_response(request, entry)
+
+        metrics.cache_miss('tournament_page')
+        response = view_func(request, tournament_id, *args, **kwargs)
+        if not _cacheable(response):
+            return response
+        entry = page_entry(request, response)
+        cache.set(key, entry, settings.TOURNAMENT_PAGE_CACHE_TIMEOUT)
+        return page_response(request, entry)
+
+    if iscoroutinefunction(view_func):
+        @wraps(view_func)
+        async def async_wrapper(request, tournament_id, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return await view_func(request, tournament_id, *args, **kwargs)
+
+            key, entry = await acached_page(request, tournament_id)
+            if entry is not None:
+                metrics.cache_hit('tournament_page')
+                return page_response(request, entry)
+
+            metrics.cache_miss('tournament_page')
+            response = await view_func(request, tournament_id, *args, **kwargs)
+            if not _cacheable(response):
+                return response
+            entry = page_entry(request, response)
+            await cache.aset(key, entry, settings.TOURNAMENT_PAGE_CACHE_TIMEOUT)
+            return page_response(request, entry)
+
+        return async_wrapper
+
+    return wrapper
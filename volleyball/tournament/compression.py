@@ -0,0 +1,66 @@
+import gzip
+
+try:
+    import brotli
+except ImportError:  # пакет Brotli не установлен: только gzip
+    brotli = None
+
+
+# Максимальное сжатие: файлы и ответы сжимаются один раз, а отдаются много раз
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 11
+
+# Расширения предварительно сжатых файлов (gzip_static / brotli_static в nginx)
+EXTENSIONS = {'gzip': '.gz', 'br': '.br'}
+
+
+def gzip_compress(data):
+    # mtime=0: одинаковое содержимое дает одинаковые байты (стабильные ETag и диффы экспорта)
+    return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def brotli_compress(data):
+    if brotli is None:
+        return None
+    return brotli.compress(data, quality=BROTLI_QUALITY)
+
+
+# Порядок предпочтения кодировок при согласовании
+PREFERENCE = ('br', 'gzip')
+
+
+def negotiate(accept_encoding, available):
+    """
+    Лучшая из доступных кодировок по заголовку Accept-Encoding (с учетом q и '*');
+    'identity' - без сжатия
+    """
+    accepted = {}
+    for part in accept_encoding.split(','):
+        name, _, params = part.partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        for param in params.split(';'):
+            key, _, value = param.partition('=')
+            if key.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[name] = quality
+
+    for encoding in PREFERENCE:
+        if encoding in available and accepted.get(encoding, accepted.get('*', 0)) > 0:
+            return encoding
+    return 'identity'
+
+
+def compressed_variants(data):
+    """Сжатые варианты данных: {кодировка: байты}, только те, что доступны и действительно меньше"""
+    variants = {'gzip': gzip_compress(data), 'br': brotli_compress(data)}
+    return {
+        encoding: compressed
+        for encoding, compressed in variants.items()
+        if compressed is not None and len(compressed) < len(data)
+    }
@@ -0,0 +1,132 @@
+import asyncio
+import hashlib
+from functools import wraps
+
+from django.db.models import Count, Max
+
+from .caching import cached_page, acached_page
+from .models import Tournament
+from .navigation import navigation_tree, navigation_version, anavigation_tree, anavigation_version
+
+
+def _navigation_state():
+    """Состояние меню навигации: версия и время последнего изменения (из кеша, без запросов)"""
+    version = navigation_version()
+    return version, navigation_tree(version)['updated']
+
+
+async def _anavigation_state():
+    version = await anavigation_version()
+    return version, (await anavigation_tree(version))['updated']
+
+
+def _etag(*parts):
+    return hashlib.md5(repr(parts).encode(), usedforsecurity=False).hexdigest()
+
+
+def _latest(*values):
+    values = [value for value in values if value is not None]
+    return max(values) if values else None
+
+
+def index_state(request):
+    """(etag, last_modified) главной страницы; считается один раз за запрос"""
+    if not hasattr(request, '_page_state'):
+        navigation, navigation_updated = _navigation_state()
+        request._page_state = (_etag('index', navigation), navigation_updated)
+    return request._page_state
+
+
+def tournament_state(request, tournament_id):
+    """
+    (etag, last_modified) страницы турнира по updated_at турнира, его матчей и меню.
+    Если страница есть в кеше - из ее записи, без запросов (запись действительна,
+    пока не сменились версии турнира и меню, а с ними и это состояние).
+    Для несуществующего турнира - (None, None), чтобы view вернул 404
+    """
+    if not hasattr(request, '_page_state'):
+        _, entry = cached_page(request, tournament_id)
+        if entry is not None and entry.get('state'):
+            request._page_state = entry['state']
+        else:
+            tournament = _tournament_updates(tournament_id).first()
+            request._page_state = _tournament_page_state(tournament_id, tournament, _navigation_state)
+    return request._page_state
+
+
+async def aindex_state(request):
+    if not hasattr(request, '_page_state'):
+        navigation, navigation_updated = await _anavigation_state()
+        request._page_state = (_etag('index', navigation), navigation_updated)
+    return request._page_state
+
+
+async def atournament_state(request, tournament_id):
+    """То же через асинхронный ORM: турнир и меню загружаются одновременно"""
+    if not hasattr(request, '_page_state'):
+        _, entry = await acached_page(request, tournament_id)
+        if entry is not None and entry.get('state'):
+            request._page_state = entry['state']
+            return request._page_state
+        tournament, navigation = await asyncio.gather(
+            _tournament_updates(tournament_id).afirst(), _anavigation_state(),
+        )
+        request._page_state = _tournament_page_state(tournament_id, tournament, lambda: navigation)
+    return request._page_state
+
+
+def _tournament_updates(tournament_id):
+    return Tournament.objects.filter(pk=tournament_id).annotate(
+        matches_updated=Max('matches__updated_at'),
+        matches_count=Count('matches'),
+    ).values('updated_at', 'matches_updated', 'matches_count')
+
+
+def _tournament_page_state(tournament_id, tournament, navigation_state):
+    if tournament is None:
+        return None, None
+    navigation, navigation_updated = navigation_state()
+    return (
+        _etag('tournament', tournament_id, tournament, navigation),
+        _latest(tournament['updated_at'], tournament['matches_updated'], navigation_updated),
+    )
+
+
+def prepare_state(state_func):
+    """
+    Для асинхронных view под condition(): condition() вызывает etag_func и
+    last_modified_func синхронно, поэтому состояние страницы считается заранее
+    асинхронной state_func и дальше берется из запроса
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        async def wrapper(request, *args, **kwargs):
+            await state_func(request, *args, **kwargs)
+            return await view_func(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def index_etag(request):
+    return index_state(request)[0]
+
+
+def index_last_modified(request):
+    return index_state(request)[1]
+
+
+def tournament_etag(request, tournament_id):
+    return tournament_state(request, tournament_id)[0]
+
+
+def tournament_page_etag(request, tournament_id):
+    """
+    ETag страницы турнира - слабый: страница отдается без сжатия, в gzip и в brotli,
+    байты различаются, а содержимое одно
+    """
+    etag = tournament_etag(request, tournament_id)
+    return f'W/"{etag}"' if etag else None
+
+
+def tournament_last_modified(request, tournament_id):
+    return tournament_state(request, tournament_id)[1]
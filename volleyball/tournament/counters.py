@@ -0,0 +1,297 @@
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.db.models import Count, F, IntegerField, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce, TruncWeek
+from django.utils import timezone
+
+from .models import Team, Venue, TournamentGroup, Tournament, Match, Counter
+
+
+def _counter_deltas(record):
+    """Вклад матча в счетчики турнира: (сыграно матчей круговой системы, матчей плэйофф)"""
+    finished_league = 1 if record.is_finished and record.stage in Match.LEAGUE_STAGES else 0
+    playoff = 1 if record.stage in Match.PLAYOFF_STAGES else 0
+    return finished_league, playoff
+
+
+def apply_counter_changes(changes):
+    """
+    Обновляет счетчики турниров по изменениям матчей.
+    changes - пары (старое, новое) состояний MatchRecord, как в apply_match_changes.
+    Возвращает свежие значения полей готовности к плэйофф затронутых турниров (id -> турнир)
+    """
+    deltas = defaultdict(lambda: [0, 0])
+    for old, new in changes:
+        for record, sign in ((old, -1), (new, 1)):
+            if record is None:
+                continue
+            finished_league, playoff = _counter_deltas(record)
+            delta = deltas[record.tournament_id]
+            delta[0] += sign * finished_league
+            delta[1] += sign * playoff
+
+    deltas = {tournament_id: delta for tournament_id, delta in deltas.items() if any(delta)}
+    if not deltas:
+        return {}
+
+    # Меняется только число сыгранных матчей (обычное сохранение результата):
+    # прежняя готовность выводится из новой без отдельного запроса
+    finished_only = None
+    if not any(playoff for _, playoff in deltas.values()):
+        finished_only = {tournament_id: finished_league for tournament_id, (finished_league, _) in deltas.items()}
+
+    playoff_removed = []
+    with awaiting_playoff_tracked(deltas, finished_only) as fresh:
+        for tournament_id, (finished_league, playoff) in deltas.items():
+            update = {
+                'finished_league_matches': F('finished_league_matches') + finished_league,
+                'playoff_matches': F('playoff_matches') + playoff,
+            }
+            if playoff > 0:
+                # Матчи плэйофф добавлены вручную - автоматически он уже не создается
+                update['playoff_generated'] = True
+            Tournament.objects.filter(pk=tournament_id).update(**update)
+            if playoff < 0:
+                playoff_removed.append(tournament_id)
+
+        if playoff_removed:
+            # Все матчи плэйофф удалены - его можно сгенерировать заново
+            Tournament.objects.filter(id__in=playoff_removed, playoff_matches=0).update(playoff_generated=False)
+    return fresh
+
+
+def refresh_loaded_counters(tournament, fresh):
+    """
+    Переносит свежие счетчики (результат apply_counter_changes) в уже загруженный объект
+    турнира: F()-обновления его не меняют, а claim_playoff проверяет готовность по нему
+    """
+    current = fresh.get(tournament.pk)
+    if current is not None:
+        for field in Tournament.COUNTER_FIELDS:
+            setattr(tournament, field, getattr(current, field))
+
+
+def recount_teams(tournament_ids):
+    """Пересчитывает количество команд турниров (после изменения состава)"""
+    Through = Tournament.teams.through
+    count = Through.objects.filter(tournament_id=OuterRef('pk')).order_by().values(
+        'tournament_id'
+    ).annotate(count=Count('*')).values('count')
+    tournament_ids = set(tournament_ids)
+    with awaiting_playoff_tracked(tournament_ids):
+        Tournament.objects.filter(id__in=tournament_ids).update(
+            teams_count=Coalesce(Subquery(count, output_field=IntegerField()), Value(0))
+        )
+
+
+def rebuild_tournament_counters(tournament_ids=None):
+    """Пересчитывает все счетчики по данным (после bulk-операций в обход сигналов)"""
+    tournaments = Tournament.objects.all()
+    if tournament_ids is not None:
+        tournaments = tournaments.filter(id__in=tournament_ids)
+    ids = list(tournaments.values_list('id', flat=True))
+
+    recount_teams(ids)
+    finished = {
+        row['tournament_id']: row['count']
+        for row in Match.objects.filter(
+            tournament_id__in=ids, stage__in=Match.LEAGUE_STAGES, is_finished=True
+        ).order_by().values('tournament_id').annotate(count=Count('id'))
+    }
+    playoff = {
+        row['tournament_id']: row['count']
+        for row in Match.objects.filter(
+            tournament_id__in=ids, stage__in=Match.PLAYOFF_STAGES
+        ).order_by().values('tournament_id').annotate(count=Count('id'))
+    }
+    for tournament_id in ids:
+        Tournament.objects.filter(pk=tournament_id).update(
+            finished_league_matches=finished.get(tournament_id, 0),
+            playoff_matches=playoff.get(tournament_id, 0),
+            playoff_generated=playoff.get(tournament_id, 0) > 0,
+        )
+    rebuild_awaiting_playoff()
+
+
+def playoff_ready_q():
+    """
+    Условие готовности турнира к генерации плэйофф по счетчикам: все матчи круговой
+    системы сыграны, команд хватает на сетку и плэйофф еще нет
+    """
+    expected = F('teams_count') * (F('teams_count') - 1) / 2 * F('number_of_rounds')
+    return Q(
+        has_playoff=True,
+        playoff_generated=False,
+        playoff_matches=0,
+        teams_count__gte=Coalesce(F('playoff_teams'), Value(4)),
+        finished_league_matches__gte=expected,
+    )
+
+
+# Поля турнира, от которых зависит готовность к плэйофф (playoff_ready_q)
+READINESS_FIELDS = (
+    'has_playoff', 'playoff_teams', 'number_of_rounds',
+    'teams_count', 'finished_league_matches', 'playoff_matches', 'playoff_generated',
+)
+
+
+def playoff_ready(tournament, finished_offset=0):
+    """
+    playoff_ready_q по уже загруженным полям турнира, без запроса.
+    finished_offset - поправка к числу сыгранных матчей (готовность до изменения)
+    """
+    teams = tournament.teams_count
+    finished = tournament.finished_league_matches + finished_offset
+    return bool(
+        tournament.has_playoff
+        and not tournament.playoff_generated
+        and tournament.playoff_matches == 0
+        and teams >= (tournament.playoff_teams or 4)
+        and finished >= teams * (teams - 1) // 2 * tournament.number_of_rounds
+    )
+
+
+def claim_playoff(tournament):
+    """
+    Атомарно проверяет готовность турнира (playoff_ready_q) и помечает плэйофф
+    как сгенерированный. Условный UPDATE выполняется в БД, поэтому из одновременных
+    сохранений последних матчей True получит только одно.
+    Сначала готовность проверяется по счетчикам объекта (сохранение матча переносит
+    в него свежие значения, см. refresh_loaded_counters): "еще не готов" запросов не стоит
+    """
+    if not playoff_ready(tournament):
+        return False
+    if not Tournament.objects.filter(playoff_ready_q(), pk=tournament.pk).update(playoff_generated=True):
+        return False
+    tournament.playoff_generated = True
+    # Турнир был готов и перестал быть готовым
+    add_counters({AWAITING_PLAYOFF_KEY: -1})
+    return True
+
+
+def ready_tournament_ids(tournament_ids):
+    """Какие из турниров готовы к генерации плэйофф (поиск по первичному ключу)"""
+    if not tournament_ids:
+        return set()
+    return set(Tournament.objects.filter(playoff_ready_q(), id__in=tournament_ids).values_list('id', flat=True))
+
+
+@contextmanager
+def awaiting_playoff_tracked(tournament_ids, finished_deltas=None):
+    """
+    Ведет счетчик турниров, готовых к плэйофф, для изменений внутри блока: готовность
+    затронутых турниров сравнивается до и после, разница прибавляется к счетчику.
+    Просматриваются только эти турниры, а не вся таблица.
+    finished_deltas (id -> приращение) - блок меняет только число сыгранных матчей:
+    готовность до изменения считается по значениям после, без запроса перед блоком.
+    Блоку выдается словарь, после блока в нем - свежие поля готовности (id -> турнир)
+    """
+    tournament_ids = {tournament_id for tournament_id in tournament_ids if tournament_id}
+    before = ready_tournament_ids(tournament_ids) if finished_deltas is None else None
+    fresh = {}
+    yield fresh
+
+    fresh.update(
+        (tournament.pk, tournament)
+        for tournament in Tournament.objects.filter(id__in=tournament_ids).only(*READINESS_FIELDS)
+    )
+    after = {pk for pk, tournament in fresh.items() if playoff_ready(tournament)}
+    if before is None:
+        before = {
+            pk for pk, tournament in fresh.items()
+            if playoff_ready(tournament, -finished_deltas.get(pk, 0))
+        }
+    add_counters({AWAITING_PLAYOFF_KEY: len(after - before) - len(before - after)})
+
+
+# ============= СЧЕТЧИКИ ПАНЕЛИ АДМИНИСТРАТОРА =============
+
+# Турниры, готовые к генерации плэйофф (playoff_ready_q)
+AWAITING_PLAYOFF_KEY = 'tournaments_awaiting_playoff'
+
+# Счетчики количества объектов: ключ -> модель
+OBJECT_COUNTERS = {
+    'teams': Team,
+    'venues': Venue,
+    'groups': TournamentGroup,
+    'tournaments': Tournament,
+    'matches': Match,
+}
+
+
+def week_key(value):
+    """Ключ недельного счетчика матчей: понедельник недели матча (местное время)"""
+    if timezone.is_naive(value):
+        # Время из формы без пояса Django сохраняет как местное
+        value = timezone.make_aware(value)
+    day = timezone.localdate(value)
+    return f'matches_week:{day - timedelta(days=day.weekday())}'
+
+
+def add_counters(deltas):
+    """Прибавляет приращения к счетчикам (ключ -> приращение), создавая недостающие"""
+    for key, delta in deltas.items():
+        if not delta:
+            continue
+        if not Counter.objects.filter(key=key).update(value=F('value') + delta):
+            _, created = Counter.objects.get_or_create(key=key, defaults={'value': delta})
+            if not created:
+                Counter.objects.filter(key=key).update(value=F('value') + delta)
+
+
+def apply_dashboard_changes(changes):
+    """Счетчики матчей по изменениям: всего, завершено и по неделям (пары как в apply_match_changes)"""
+    deltas = defaultdict(int)
+    for old, new in changes:
+        for record, sign in ((old, -1), (new, 1)):
+            if record is None:
+                continue
+            if (old is None) != (new is None):
+                deltas['matches'] += sign
+            if record.is_finished:
+                deltas['finished_matches'] += sign
+            if record.date_time is not None:
+                deltas[week_key(record.date_time)] += sign
+    add_counters(deltas)
+
+
+def rebuild_awaiting_playoff():
+    """
+    Пересчитывает число турниров, готовых к генерации плэйофф, по всей таблице турниров
+    (после bulk-операций; при обычных изменениях счетчик ведет awaiting_playoff_tracked)
+    """
+    Counter.objects.update_or_create(
+        key=AWAITING_PLAYOFF_KEY,
+        defaults={'value': Tournament.objects.filter(playoff_ready_q()).count()},
+    )
+
+
+def rebuild_dashboard_counters():
+    """Пересчитывает все счетчики панели по данным (после bulk-операций в обход сигналов)"""
+    values = {key: model.objects.count() for key, model in OBJECT_COUNTERS.items()}
+    values['finished_matches'] = Match.objects.filter(is_finished=True).count()
+    weeks = Match.objects.filter(date_time__isnull=False).annotate(
+        week=TruncWeek('date_time')
+    ).order_by().values('week').annotate(count=Count('id'))
+    for row in weeks:
+        values[week_key(row['week'])] = row['count']
+
+    Counter.objects.exclude(key=AWAITING_PLAYOFF_KEY).delete()
+    Counter.objects.bulk_create([Counter(key=key, value=value) for key, value in values.items()])
+    rebuild_awaiting_playoff()
+
+
+def dashboard_counters():
+    """Значения для панели администратора (один запрос)"""
+    this_week = week_key(timezone.now())
+    keys = list(OBJECT_COUNTERS) + ['finished_matches', AWAITING_PLAYOFF_KEY, this_week]
+    values = dict(Counter.objects.filter(key__in=keys).values_list('key', 'value'))
+
+    counters = {f'{key}_count': values.get(key, 0) for key in OBJECT_COUNTERS}
+    counters['finished_matches_count'] = values.get('finished_matches', 0)
+    counters['pending_matches_count'] = counters['matches_count'] - counters['finished_matches_count']
+    counters['week_matches_count'] = values.get(this_week, 0)
+    counters['awaiting_playoff_count'] = values.get(AWAITING_PLAYOFF_KEY, 0)
+    return counters
\ No newline at end of file
@@ -0,0 +1,218 @@
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.template.backends.django import DjangoTemplates, Template
+
+from . import metrics
+
+
+logger = logging.getLogger('tournament.instrumentation')
+
+# Статистика текущего запроса (ContextVar работает и в потоках, и в asyncio)
+_current = ContextVar('request_stats', default=None)
+
+
+class RequestStats:
+    """Статистика одного запроса"""
+    __slots__ = ('queries', 'db_time', 'template_time', 'template_depth')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.template_depth = 0
+
+
+def _query_wrapper(execute, sql, params, many, context):
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.queries += 1
+        stats.db_time += time.perf_counter() - started
+
+
+# ============= ШАБЛОНЫ =============
+
+class InstrumentedTemplate(Template):
+    """Шаблон, который учитывает время отрисовки в статистике запроса"""
+
+    def render(self, context=None, request=None):
+        stats = _current.get()
+        if stats is None:
+            return super().render(context, request)
+
+        # Вложенные render_to_string внутри шаблона уже входят во внешний замер
+        stats.template_depth += 1
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            stats.template_depth -= 1
+            if not stats.template_depth:
+                stats.template_time += time.perf_counter() - started
+
+
+class InstrumentedDjangoTemplates(DjangoTemplates):
+    """Бэкенд DjangoTemplates с замером времени отрисовки"""
+
+    def from_string(self, template_code):
+        return InstrumentedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        template = super().get_template(template_name)
+        return InstrumentedTemplate(template.template, self)
+
+
+# ============= СВОДКА =============
+
+class RequestLog:
+    """Скользящая сводка по последним запросам каждого view (в памяти процесса)"""
+
+    def __init__(self, window):
+        self.window = window
+        self.lock = threading.Lock()
+        self.records = defaultdict(lambda: deque(maxlen=self.window))
+
+    def add(self, view, total, queries, db_time, template_time, size):
+        with self.lock:
+            self.records[view].append((total, queries, db_time, template_time, size))
+
+    def clear(self):
+        with self.lock:
+            self.records.clear()
+
+    def summary(self):
+        """Список по view (самые медленные в среднем сверху), время в мс"""
+        with self.lock:
+            snapshot = {view: list(records) for view, records in self.records.items()}
+
+        rows = []
+        for view, records in snapshot.items():
+            count = len(records)
+            totals = sorted(record[0] for record in records)
+            rows.append({
+                'view': view,
+                'count': count,
+                'avg_ms': sum(totals) / count * 1000,
+                'p95_ms': totals[min(count - 1, int(count * 0.95))] * 1000,
+                'max_ms': totals[-1] * 1000,
+                'avg_queries': sum(record[1] for record in records) / count,
+                'avg_db_ms': sum(record[2] for record in records) / count * 1000,
+                'avg_template_ms': sum(record[3] for record in records) / count * 1000,
+                'avg_size_kb': sum(record[4] or 0 for record in records) / count / 1024,
+            })
+        rows.sort(key=lambda row: row['avg_ms'], reverse=True)
+        return rows
+
+
+request_log = RequestLog(getattr(settings, 'INSTRUMENTATION_WINDOW', 200))
+
+
+# ============= MIDDLEWARE =============
+
+class InstrumentationMiddleware:
+    """
+    Считает для каждого запроса количество и время SQL-запросов, время отрисовки
+    шаблонов, общее время и размер ответа. Отдает их в заголовке Server-Timing,
+    копит в скользящей сводке и метриках Prometheus и пишет в лог медленные запросы.
+    Работает и в синхронном, и в асинхронном (ASGI) стеке: в асинхронном
+    Django не переводит async views в отдельный поток ради этого middleware
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.slow_ms = getattr(settings, 'INSTRUMENTATION_SLOW_REQUEST_MS', None)
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+
+        stats = RequestStats()
+        token = _current.set(stats)
+        started = time.perf_counter()
+        try:
+            with _wrap_connections():
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, stats, time.perf_counter() - started)
+
+    async def __acall__(self, request):
+        # Запросы к БД из sync_to_async выполняются в других потоках: их соединения
+        # получают счетчик при подключении (_connection_created), а статистика
+        # запроса доходит до них через ContextVar
+        stats = RequestStats()
+        token = _current.set(stats)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, stats, time.perf_counter() - started)
+
+    def finish(self, request, response, stats, total):
+        size = None if response.streaming else len(response.content)
+        view = _view_name(request)
+
+        response['Server-Timing'] = ', '.join([
+            f'db;dur={stats.db_time * 1000:.1f};desc="{stats.queries} queries"',
+            f'tpl;dur={stats.template_time * 1000:.1f}',
+            f'total;dur={total * 1000:.1f}',
+        ])
+        request_log.add(view, total, stats.queries, stats.db_time, stats.template_time, size)
+        metrics.observe_request(view, request.method, response.status_code, total, stats.queries)
+
+        if self.slow_ms is not None and total * 1000 >= self.slow_ms:
+            logger.warning(
+                'Медленный запрос %s %s (%s): %.0f мс, запросов к БД %d (%.0f мс), шаблоны %.0f мс, ответ %s байт',
+                request.method, request.path, view, total * 1000,
+                stats.queries, stats.db_time * 1000, stats.template_time * 1000, size,
+            )
+        return response
+
+
+@receiver(connection_created)
+def _connection_created(sender, connection, **kwargs):
+    if _query_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_query_wrapper)
+
+
+@contextmanager
+def _wrap_connections():
+    """Подключает счетчик запросов к соединениям с базой текущего потока"""
+    wrapped = []
+    for connection in connections.all(initialized_only=False):
+        if _query_wrapper not in connection.execute_wrappers:
+            connection.execute_wrappers.append(_query_wrapper)
+            wrapped.append(connection)
+    try:
+        yield
+    finally:
+        for connection in wrapped:
+            connection.execute_wrappers.remove(_query_wrapper)
+
+
+def _view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'не найдено'
+    return match.view_name
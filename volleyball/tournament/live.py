@@ -0,0 +1,436 @@
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.views.decorators.cache import never_cache
+from django.views.decorators.http import require_GET
+
+from .models import Tournament, Match
+from .snapshot import TournamentSnapshot
+from .views import calculate_standings, calculate_matrix_table
+
+
+logger = logging.getLogger('tournament.live')
+
+
+# ============= ЖУРНАЛ СОБЫТИЙ =============
+
+class EventLog:
+    """
+    Журнал изменений результатов, общий для всех процессов на сервере (файл SQLite).
+    Событие - турнир, id измененных матчей и готовые изменения страницы: их один раз
+    строит процесс, сохранивший матчи, а подписчики и опрос только читают
+    """
+
+    def __init__(self, path, keep):
+        self.path = str(path)
+        self.keep = keep
+        self.initialized = False
+
+    def _connect(self):
+        connection = sqlite3.connect(self.path, timeout=5)
+        if not self.initialized:
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS events ('
+                'id INTEGER PRIMARY KEY AUTOINCREMENT, tournament_id INTEGER NOT NULL, '
+                'match_ids TEXT NOT NULL, created REAL NOT NULL, delta TEXT)'
+            )
+            columns = {row[1] for row in connection.execute('PRAGMA table_info(events)')}
+            if 'delta' not in columns:
+                # Журнал прежнего формата: нумерация событий сохраняется, у старых событий изменений нет
+                connection.execute('ALTER TABLE events ADD COLUMN delta TEXT')
+            self.initialized = True
+        return connection
+
+    def append(self, events):
+        """Записывает события [(id турнира, [id матчей], изменения)] и удаляет устаревшие"""
+        now = time.time()
+        try:
+            connection = self._connect()
+            try:
+                with connection:
+                    connection.executemany(
+                        'INSERT INTO events (tournament_id, match_ids, delta, created) VALUES (?, ?, ?, ?)',
+                        [
+                            (tournament_id, json.dumps(sorted(match_ids)), _delta_json(delta), now)
+                            for tournament_id, match_ids, delta in events
+                        ],
+                    )
+                    connection.execute('DELETE FROM events WHERE created < ?', (now - self.keep,))
+            finally:
+                connection.close()
+        except sqlite3.Error:
+            # Трансляция не должна ломать сохранение результатов
+            logger.warning('Не удалось записать события в %s', self.path, exc_info=True)
+
+    def _query(self, sql, params=()):
+        try:
+            connection = self._connect()
+            try:
+                return connection.execute(sql, params).fetchall()
+            finally:
+                connection.close()
+        except sqlite3.Error:
+            logger.warning('Не удалось прочитать события из %s', self.path, exc_info=True)
+            return None
+
+    _BOUNDS_SQL = "SELECT (SELECT MIN(id) FROM events), (SELECT seq FROM sqlite_sequence WHERE name = 'events')"
+
+    @staticmethod
+    def _events(rows):
+        # У событий журнала прежнего формата изменений нет - страницу проще перезагрузить
+        return [
+            (event_id, tournament_id, json.loads(delta) if delta else {'reload': True})
+            for event_id, tournament_id, delta in rows
+        ]
+
+    def since(self, last_id):
+        """События всех турниров после last_id: [(id, id турнира, изменения)]"""
+        rows = self._query('SELECT id, tournament_id, delta FROM events WHERE id > ? ORDER BY id', (last_id,))
+        return self._events(rows or [])
+
+    def bounds(self):
+        """(id первого хранимого события, id последнего события); None - журнал недоступен"""
+        rows = self._query(self._BOUNDS_SQL)
+        if rows is None:
+            return None
+        first, last = rows[0]
+        return first, last or 0
+
+    def read(self, last_id, tournament_id):
+        """
+        Границы журнала и события турнира после last_id одним соединением:
+        (id первого события, id последнего события, [(id, id турнира, изменения)]); None - журнал недоступен.
+        События читаются не дальше прочитанной границы: появившиеся позже достанутся следующему запросу
+        """
+        try:
+            connection = self._connect()
+            try:
+                first, last = connection.execute(self._BOUNDS_SQL).fetchone()
+                rows = connection.execute(
+                    'SELECT id, tournament_id, delta FROM events '
+                    'WHERE id > ? AND id <= ? AND tournament_id = ? ORDER BY id',
+                    (last_id, last or 0, tournament_id),
+                ).fetchall()
+            finally:
+                connection.close()
+        except sqlite3.Error:
+            logger.warning('Не удалось прочитать события из %s', self.path, exc_info=True)
+            return None
+        return first, last or 0, self._events(rows)
+
+
+log = EventLog(settings.LIVE_EVENTS_DB_PATH, settings.LIVE_EVENTS_KEEP)
+
+
+def _event_delta(tournament_id, match_ids):
+    try:
+        return build_delta(tournament_id, sorted(match_ids))
+    except Exception:
+        # Трансляция не должна ломать сохранение результатов: зрители перезагрузят страницу
+        logger.exception('Не удалось подготовить изменения турнира %s', tournament_id)
+        return {'reload': True}
+
+
+def publish_changes(changes):
+    """
+    Публикует изменения матчей (пары MatchRecord из process_match_changes)
+    после фиксации транзакции: одно событие на турнир. Изменения страницы строятся
+    здесь, один раз на событие, а не при каждом опросе или доставке каждому зрителю
+    """
+    events = defaultdict(set)
+    for old, new in changes:
+        if new is not None:
+            events[new.tournament_id].add(new.id)
+        if old is not None and (new is None or old.tournament_id != new.tournament_id):
+            events[old.tournament_id].add(old.id)
+    events.pop(None, None)
+    if not events:
+        return
+
+    def append():
+        log.append([
+            (tournament_id, match_ids, _event_delta(tournament_id, match_ids))
+            for tournament_id, match_ids in events.items()
+        ])
+        hub.notify()
+
+    transaction.on_commit(append)
+
+
+# ============= ИЗМЕНЕНИЯ ДЛЯ СТРАНИЦЫ =============
+
+def _score_cell(values):
+    return f'{values[0]}/{values[1]}'
+
+
+def build_delta(tournament_id, match_ids):
+    """
+    Изменения страницы турнира после изменения матчей:
+    matches - [id, завершен, счет по сетам, полный счет] для каждого матча,
+    standings - порядок команд и строки [id команды, игры, победы, поражения, сеты, мячи, очки]
+    для участников измененных матчей,
+    cells - ячейки матриц по кругам [круг, id команды строки, номер столбца, счет],
+    reload - страницу проще перезагрузить (матч удален или появился новый)
+    """
+    tournament = Tournament.objects.filter(pk=tournament_id).first()
+    if tournament is None:
+        return {'reload': True}
+
+    snapshot = TournamentSnapshot.build(tournament)
+    by_id = {match.id: match for match in snapshot.matches}
+    matches = [by_id[match_id] for match_id in match_ids if match_id in by_id]
+    delta = {'matches': [], 'standings': None, 'cells': []}
+    if len(matches) < len(match_ids):
+        delta['reload'] = True
+
+    teams = set()
+    pairs = set()
+    for match in matches:
+        delta['matches'].append([
+            match.id,
+            match.is_finished,
+            f'{match.sets_a}:{match.sets_b}' if match.is_finished else 'vs',
+            match.get_score_display() if match.is_finished else 'vs',
+        ])
+        if match.stage in Match.LEAGUE_STAGES:
+            teams.update((match.team_a_id, match.team_b_id))
+            pairs.add((match.team_a_id, match.team_b_id))
+
+    if not pairs:
+        return delta
+
+    standings = calculate_standings(tournament, snapshot)
+    delta['standings'] = {
+        'order': [row.team.id for row in standings],
+        'rows': [
+            [row.team.id, row.played, row.won, row.lost,
+             _score_cell((row.sets_won, row.sets_lost)), _score_cell((row.points_won, row.points_lost)),
+             row.tournament_points]
+            for row in standings if row.team.id in teams
+        ],
+    }
+
+    matrix = calculate_matrix_table(tournament, snapshot)
+    columns = {team.id: index for index, team in enumerate(matrix['teams'])}
+    for circle in matrix['circles']:
+        rows = {row['team'].id: row['results'] for row in circle['matrix']}
+        for team_a, team_b in pairs:
+            for row_team, col_team in ((team_a, team_b), (team_b, team_a)):
+                if row_team in rows and col_team in columns:
+                    score = rows[row_team][columns[col_team]].get('score')
+                    delta['cells'].append([circle['number'], row_team, columns[col_team], score or '—'])
+    return delta
+
+
+def _delta_json(delta):
+    return json.dumps(delta, ensure_ascii=False, separators=(',', ':'))
+
+
+# ============= РАССЫЛКА =============
+
+class Hub:
+    """
+    Подписчики процесса: id турнира -> очереди открытых соединений.
+    Одна задача на процесс читает журнал (сразу после публикации в этом процессе
+    или раз в LIVE_POLL_INTERVAL для событий других процессов) и раскладывает
+    готовые изменения событий по очередям
+    """
+
+    def __init__(self, log):
+        self.log = log
+        self.subscribers = defaultdict(set)
+        self.lock = threading.Lock()
+        self.loop = None
+        self.wakeup = None
+        self.task = None
+        self.last_id = None
+
+    def subscribe(self, tournament_id):
+        queue = asyncio.Queue(maxsize=settings.LIVE_QUEUE_SIZE)
+        self.subscribers[tournament_id].add(queue)
+        loop = asyncio.get_running_loop()
+        if self.task is None or self.task.done() or self.loop is not loop:
+            with self.lock:
+                self.loop = loop
+                self.wakeup = asyncio.Event()
+            self.task = loop.create_task(self._poll())
+        return queue
+
+    def unsubscribe(self, tournament_id, queue):
+        queues = self.subscribers.get(tournament_id)
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                del self.subscribers[tournament_id]
+
+    def notify(self):
+        """Будит задачу чтения журнала (вызывается из любого потока)"""
+        with self.lock:
+            loop, wakeup = self.loop, self.wakeup
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(wakeup.set)
+
+    async def _poll(self):
+        if self.last_id is None:
+            bounds = await sync_to_async(self.log.bounds)()
+            self.last_id = bounds[1] if bounds else 0
+
+        while self.subscribers:
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), settings.LIVE_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            self.wakeup.clear()
+
+            for event_id, tournament_id, delta in await sync_to_async(self.log.since)(self.last_id):
+                self.last_id = event_id
+                if self.subscribers.get(tournament_id):
+                    self._deliver(tournament_id, event_id, _delta_json(delta))
+
+        # Без подписчиков журнал не читается; новые подписчики начнут с текущего события
+        self.last_id = None
+
+    def _deliver(self, tournament_id, event_id, data):
+        for queue in list(self.subscribers.get(tournament_id, ())):
+            try:
+                queue.put_nowait((event_id, data))
+            except asyncio.QueueFull:
+                # Клиент не успевает читать: пропущенное восполнит перезагрузка страницы
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait((event_id, _delta_json({'reload': True})))
+
+
+hub = Hub(log)
+
+
+# ============= SSE =============
+
+def _message(event_id, data):
+    return f'id: {event_id}\nevent: delta\ndata: {data}\n\n'
+
+
+def merge_deltas(deltas):
+    """
+    Изменения нескольких событий одним ответом (в порядке событий): более поздние
+    значения матчей, строк таблицы и ячеек матрицы заменяют ранние
+    """
+    if len(deltas) == 1:
+        return deltas[0]
+    if any(delta.get('reload') for delta in deltas):
+        return {'reload': True}
+
+    matches, rows, cells = {}, {}, {}
+    order = None
+    for delta in deltas:
+        matches.update((match[0], match) for match in delta['matches'])
+        if delta['standings']:
+            order = delta['standings']['order']
+            rows.update((row[0], row) for row in delta['standings']['rows'])
+        cells.update((tuple(cell[:3]), cell) for cell in delta['cells'])
+    return {
+        'matches': list(matches.values()),
+        'standings': {'order': order, 'rows': list(rows.values())} if order is not None else None,
+        'cells': list(cells.values()),
+    }
+
+
+def _replay(tournament_id, last_id):
+    """
+    Изменения турнира после события last_id (Last-Event-ID при переподключении к потоку
+    или параметр after при опросе): (id последнего события, изменения) или None.
+    Только чтение журнала: изменения событий построены при публикации
+    """
+    read = log.read(last_id, tournament_id)
+    if read is None or read[1] <= last_id:
+        return None
+    first, last, events = read
+    if first is None or first > last_id + 1:
+        # Часть событий уже удалена из журнала
+        return last, {'reload': True}
+    if not events:
+        return last, None
+    return last, merge_deltas([delta for _, _, delta in events])
+
+
+async def _stream(tournament_id, last_id):
+    queue = hub.subscribe(tournament_id)
+    try:
+        yield f'retry: {settings.LIVE_RETRY_MS}\n\n'
+
+        if last_id is not None:
+            replayed = await sync_to_async(_replay)(tournament_id, last_id)
+            if replayed is not None:
+                last_id, delta = replayed
+                if delta is not None:
+                    yield _message(last_id, _delta_json(delta))
+
+        while True:
+            try:
+                event_id, data = await asyncio.wait_for(queue.get(), settings.LIVE_KEEPALIVE)
+            except asyncio.TimeoutError:
+                # Комментарий SSE: не дает прокси закрыть простаивающее соединение
+                yield ': ping\n\n'
+                continue
+            if last_id is None or event_id > last_id:
+                yield _message(event_id, data)
+    finally:
+        hub.unsubscribe(tournament_id, queue)
+
+
+@require_GET
+async def tournament_events(request, tournament_id):
+    """
+    Поток изменений турнира (Server-Sent Events). Соединение держит не поток,
+    а корутина, поэтому при запуске через ASGI сервер обслуживает тысячи зрителей.
+    Подключен только при LIVE_EVENTS_STREAM: под WSGI каждый зритель навсегда занял бы поток
+    """
+    if not await Tournament.objects.filter(pk=tournament_id).aexists():
+        raise Http404('Турнир не найден')
+
+    try:
+        last_id = int(request.headers.get('Last-Event-ID', ''))
+    except ValueError:
+        last_id = None
+
+    response = StreamingHttpResponse(_stream(tournament_id, last_id), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # nginx не должен буферизовать поток
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+# ============= ОПРОС =============
+
+@require_GET
+@never_cache
+def tournament_changes(request, tournament_id):
+    """
+    Изменения турнира для опроса страницей (без LIVE_EVENTS_STREAM): один ответ без удержания
+    соединения. ?after=<id события> - изменения после него; без параметра - только текущий id.
+    Ответ: {"last": id последнего события или null, "delta": изменения или null}.
+    Запросов к БД нет: готовые изменения читаются из журнала (удаление турнира - событие с reload)
+    """
+    try:
+        after = int(request.GET['after'])
+    except (KeyError, ValueError):
+        after = None
+
+    if after is None:
+        bounds = log.bounds()
+        last, delta = (bounds[1] if bounds else None), None
+    else:
+        last, delta = _replay(tournament_id, after) or (after, None)
+    return HttpResponse(
+        _delta_json({'last': last, 'delta': delta}), content_type='application/json; charset=utf-8'
+    )
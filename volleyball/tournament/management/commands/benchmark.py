@@ -0,0 +1,532 @@
+import asyncio
+import importlib
+import io
+import json
+import platform
+import random
+import statistics
+import sys
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import django
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand, CommandError
+from django.core.wsgi import get_wsgi_application
+from django.db import connection, transaction
+from django.db.backends.signals import connection_created
+from django.test import Client
+from django.test.utils import (
+    CaptureQueriesContext, override_settings, setup_test_environment, teardown_test_environment,
+)
+from django.urls import reverse, clear_url_caches
+from django.utils import timezone
+from tournament.counters import rebuild_tournament_counters, rebuild_dashboard_counters
+from tournament.models import Team, TournamentGroup, Tournament, Match
+from tournament.search import rebuild_search_index
+from tournament.standings import rebuild_standings_cache
+from tournament.views import (
+    calculate_standings, calculate_matrix_table, get_schedule_by_rounds, check_and_generate_playoff,
+)
+
+
+DUMMY_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'benchmark'}}
+
+
+def round_robin(teams):
+    """Туры одного круга по круговой системе: список туров, тур - список пар"""
+    teams = list(teams)
+    if len(teams) % 2:
+        teams.append(None)
+    half = len(teams) // 2
+    rounds = []
+    for _ in range(len(teams) - 1):
+        pairs = [(teams[i], teams[-1 - i]) for i in range(half)]
+        rounds.append([(a, b) for a, b in pairs if a is not None and b is not None])
+        teams.insert(1, teams.pop())
+    return rounds
+
+
+def random_score(rng):
+    """Случайный счет матча до трех побед: (сеты А, сеты Б, счет по сетам)"""
+    winner_sets, loser_sets = 3, rng.randint(0, 2)
+    # Последний сет всегда за победителем
+    results = [True] * (winner_sets - 1) + [False] * loser_sets
+    rng.shuffle(results)
+    results.append(True)
+    set_scores = []
+    for won in results:
+        score = (25, rng.randint(10, 23))
+        set_scores.append(score if won else score[::-1])
+
+    if rng.random() < 0.5:
+        return winner_sets, loser_sets, [{'a': a, 'b': b} for a, b in set_scores]
+    return loser_sets, winner_sets, [{'a': b, 'b': a} for a, b in set_scores]
+
+
+def generate_season(tournaments=4, teams=12, circles=2, finished=0.8, seed=1):
+    """
+    Создает синтетический сезон через bulk_create: группу, турниры с командами
+    и полным круговым расписанием, часть матчей завершена.
+    Сигналы при bulk_create не срабатывают, поэтому таблицы и счетчики пересчитываются в конце.
+    Возвращает список турниров
+    """
+    rng = random.Random(seed)
+    start = timezone.make_aware(datetime(2025, 9, 6, 12, 0))
+
+    group = TournamentGroup.objects.create(name='Синтетический сезон')
+    Tournament.objects.bulk_create([
+        Tournament(
+            name=f'Дивизион {number}',
+            group=group,
+            gender='M',
+            number_of_rounds=circles,
+            has_playoff=True,
+            playoff_teams=4,
+            order=number,
+        )
+        for number in range(1, tournaments + 1)
+    ])
+    created = list(Tournament.objects.filter(group=group).order_by('order'))
+
+    Team.objects.bulk_create([
+        Team(name=f'Команда {number}-{index}', gender='M')
+        for number in range(1, tournaments + 1)
+        for index in range(1, teams + 1)
+    ])
+    all_teams = list(Team.objects.filter(name__startswith='Команда ').order_by('id'))
+
+    links = []
+    matches = []
+    for position, tournament in enumerate(created):
+        division = all_teams[position * teams:(position + 1) * teams]
+        links.extend(
+            Tournament.teams.through(tournament_id=tournament.id, team_id=team.id)
+            for team in division
+        )
+
+        schedule = round_robin(division)
+        for circle in range(circles):
+            for index, pairs in enumerate(schedule):
+                round_number = circle * len(schedule) + index + 1
+                for team_a, team_b in pairs:
+                    if circle % 2:
+                        team_a, team_b = team_b, team_a
+                    matches.append(Match(
+                        tournament=tournament,
+                        team_a=team_a,
+                        team_b=team_b,
+                        stage='REGULAR',
+                        round_number=round_number,
+                        date_time=start + timedelta(weeks=round_number - 1),
+                    ))
+
+    # Завершена доля матчей из начала расписания каждого турнира
+    by_tournament = {}
+    for match in matches:
+        by_tournament.setdefault(match.tournament_id, []).append(match)
+    for tournament_matches in by_tournament.values():
+        for match in tournament_matches[:round(len(tournament_matches) * finished)]:
+            match.sets_a, match.sets_b, match.set_scores = random_score(rng)
+            match.is_finished = True
+
+    Tournament.teams.through.objects.bulk_create(links)
+    Match.objects.bulk_create(matches, batch_size=500)
+    rebuild_standings_cache([tournament.id for tournament in created])
+    rebuild_tournament_counters([tournament.id for tournament in created])
+    rebuild_search_index([Team])
+    rebuild_dashboard_counters()
+    return created
+
+
+def _reload_urls():
+    importlib.reload(importlib.import_module('tournament.urls'))
+    importlib.reload(importlib.import_module(settings.ROOT_URLCONF))
+    clear_url_caches()
+
+
+@contextmanager
+def public_views(use_async):
+    """Публичные страницы на синхронных или асинхронных view (PUBLIC_VIEWS_ASYNC)"""
+    try:
+        with override_settings(PUBLIC_VIEWS_ASYNC=use_async):
+            _reload_urls()
+            yield
+    finally:
+        _reload_urls()
+
+
+@contextmanager
+def db_latency(ms):
+    """
+    Добавляет задержку к каждому SQL-запросу: имитация сетевой базы (Postgres),
+    на которой и видна разница между блокирующими и асинхронными view
+    """
+    if not ms:
+        yield
+        return
+
+    def wrapper(execute, sql, params, many, context):
+        time.sleep(ms / 1000)
+        return execute(sql, params, many, context)
+
+    def install(sender, connection, **kwargs):
+        if wrapper not in connection.execute_wrappers:
+            connection.execute_wrappers.append(wrapper)
+
+    # Соединения потоков сервера создаются по ходу замера
+    connection_created.connect(install)
+    try:
+        with connection.execute_wrapper(wrapper):
+            yield
+    finally:
+        connection_created.disconnect(install)
+
+
+def wsgi_get(application, path):
+    """GET через WSGI-приложение (как под gunicorn): статус ответа"""
+    status = []
+    environ = {
+        'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'QUERY_STRING': '', 'SCRIPT_NAME': '',
+        'SERVER_NAME': 'testserver', 'SERVER_PORT': '80', 'SERVER_PROTOCOL': 'HTTP/1.1',
+        'REMOTE_ADDR': '127.0.0.1', 'wsgi.url_scheme': 'http', 'wsgi.input': io.BytesIO(),
+        'wsgi.errors': sys.stderr,
+    }
+    response = application(environ, lambda code, headers, exc_info=None: status.append(int(code[:3])))
+    try:
+        for _ in response:
+            pass
+    finally:
+        response.close()
+    return status[0]
+
+
+async def asgi_get(application, path):
+    """GET через ASGI-приложение (как под uvicorn): статус ответа"""
+    status = []
+    requested = False
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        # Клиент не отключается: Django сам отменит ожидание после ответа
+        await asyncio.Event().wait()
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            status.append(message['status'])
+
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+        'scheme': 'http', 'path': path, 'raw_path': path.encode(), 'query_string': b'', 'root_path': '',
+        'headers': [(b'host', b'testserver')], 'client': ('127.0.0.1', 0), 'server': ('testserver', 80),
+    }
+    await application(scope, receive, send)
+    return status[0]
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет время, количество запросов и пиковую память расчетов и страниц турнира, '
+        'а также пропускную способность синхронных и асинхронных публичных страниц '
+        'на синтетическом сезоне (во временной тестовой базе)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tournaments', type=int, default=4, help='Количество турниров')
+        parser.add_argument('--teams', type=int, default=12, help='Команд в турнире')
+        parser.add_argument('--circles', type=int, default=2, help='Количество кругов')
+        parser.add_argument('--finished', type=float, default=0.8, help='Доля завершенных матчей (0..1)')
+        parser.add_argument('--repeat', type=int, default=5, help='Повторов каждого замера')
+        parser.add_argument('--seed', type=int, default=1, help='Зерно генератора')
+        parser.add_argument('--requests', type=int, default=200,
+                            help='Запросов в замере пропускной способности (0 - не замерять)')
+        parser.add_argument('--workers', type=int, default=4,
+                            help='Потоков синхронного сервера (как воркеров gunicorn)')
+        parser.add_argument('--concurrency', type=int, default=50,
+                            help='Одновременных запросов к серверу')
+        parser.add_argument('--db-latency', type=float, default=0,
+                            help='Задержка каждого SQL-запроса, мс (имитация сетевой базы)')
+        parser.add_argument('--output', help='Сохранить результаты в JSON')
+        parser.add_argument('--compare', help='JSON предыдущего запуска для сравнения')
+
+    def handle(self, *args, **options):
+        if not 0 <= options['finished'] <= 1:
+            raise CommandError('--finished должен быть от 0 до 1')
+        if options['teams'] < 2 or options['tournaments'] < 1 or options['circles'] < 1:
+            raise CommandError('Нужно хотя бы 2 команды, 1 турнир и 1 круг')
+        if options['repeat'] < 1:
+            raise CommandError('--repeat должен быть не меньше 1')
+        if options['requests'] < 0 or options['workers'] < 1 or options['concurrency'] < 1:
+            raise CommandError('--requests не может быть отрицательным, --workers и --concurrency - меньше 1')
+
+        self.repeat = options['repeat']
+        params = {
+            key: options[key]
+            for key in ('tournaments', 'teams', 'circles', 'finished', 'repeat', 'seed')
+        }
+        throughput_params = {
+            key: options[key]
+            for key in ('requests', 'workers', 'concurrency', 'db_latency')
+        }
+
+        # Замеры идут во временной базе, рабочие данные не затрагиваются
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            results = self.run_benchmarks(params)
+            throughput = self.run_throughput(throughput_params) if options['requests'] else None
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        report = {
+            'created_at': timezone.now().isoformat(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'params': params,
+            'results': results,
+            'throughput_params': throughput_params,
+            'throughput': throughput,
+        }
+
+        previous = self.load_report(options['compare']) if options['compare'] else None
+        if previous:
+            self.stdout.write(f'Сравнение с запуском от {previous.get("created_at", "?")}')
+            if previous.get('params') != params:
+                self.stdout.write(self.style.WARNING(
+                    f'⚠ Параметры запусков различаются: было {previous.get("params")}'
+                ))
+        self.print_report(results, previous)
+        if throughput:
+            self.print_throughput(throughput, throughput_params, previous)
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+            self.stdout.write(self.style.SUCCESS(f'✓ Результаты сохранены в {options["output"]}'))
+
+    def run_benchmarks(self, params):
+        started = time.perf_counter()
+        tournaments = generate_season(
+            tournaments=params['tournaments'],
+            teams=params['teams'],
+            circles=params['circles'],
+            finished=params['finished'],
+            seed=params['seed'],
+        )
+        matches_count = Match.objects.count()
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Сгенерировано: турниров {len(tournaments)}, матчей {matches_count} '
+            f'за {(time.perf_counter() - started) * 1000:.0f} мс'
+        ))
+
+        tournament_id = tournaments[0].id
+
+        def load():
+            return Tournament.objects.prefetch_related('teams').get(pk=tournament_id)
+
+        user = User.objects.create_user('benchmark', password='benchmark', is_staff=True)
+        client = Client()
+        client.force_login(user)
+        detail_url = reverse('tournament:tournament_detail', args=[tournament_id])
+        matches_url = reverse('tournament:admin_matches_list')
+
+        def get(url):
+            def request():
+                response = client.get(url)
+                if response.status_code != 200:
+                    raise CommandError(f'{url}: ответ {response.status_code}')
+                return response
+            return request
+
+        def playoff(tournament):
+            # Созданный плэйофф откатывается, чтобы каждый повтор работал с теми же данными
+            with transaction.atomic():
+                check_and_generate_playoff(tournament)
+                transaction.set_rollback(True)
+
+        results = {}
+        results['calculate_standings'] = self.measure(calculate_standings, setup=load)
+        results['calculate_matrix_table'] = self.measure(calculate_matrix_table, setup=load)
+        results['get_schedule_by_rounds'] = self.measure(get_schedule_by_rounds, setup=load)
+        results['check_and_generate_playoff'] = self.measure(playoff, setup=load)
+
+        # Страница без кеша - полный расчет, с кешем - повторный запрос к готовой странице
+        with override_settings(CACHES=DUMMY_CACHE):
+            results['tournament_detail'] = self.measure(get(detail_url))
+        with override_settings(CACHES=LOCMEM_CACHE):
+            get(detail_url)()
+            results['tournament_detail_cached'] = self.measure(get(detail_url))
+        results['admin_matches_list'] = self.measure(get(matches_url))
+        return results
+
+    def run_throughput(self, params):
+        """
+        Пропускная способность публичных страниц при одновременных запросах (без кеша страниц):
+        sync - синхронные view через WSGI на пуле из workers потоков,
+        async - асинхронные view через ASGI, concurrency запросов в одном цикле событий
+        """
+        paths = [reverse('tournament:index')] + [
+            reverse('tournament:tournament_detail', args=[pk])
+            for pk in Tournament.objects.values_list('pk', flat=True)
+        ]
+        paths = [paths[index % len(paths)] for index in range(params['requests'])]
+
+        results = {}
+        with override_settings(CACHES=DUMMY_CACHE), db_latency(params['db_latency']):
+            with public_views(False):
+                results['sync'] = self.throughput_sync(paths, params)
+            with public_views(True):
+                results['async'] = self.throughput_async(paths, params)
+        return results
+
+    def throughput_sync(self, paths, params):
+        application = get_wsgi_application()
+
+        def request(path):
+            started = time.perf_counter()
+            status = wsgi_get(application, path)
+            if status != 200:
+                raise CommandError(f'{path}: ответ {status}')
+            return time.perf_counter() - started
+
+        with ThreadPoolExecutor(params['workers']) as pool:
+            # Прогрев: шаблоны, соединения потоков
+            list(pool.map(request, paths[:params['workers']]))
+            started = time.perf_counter()
+            latencies = list(pool.map(request, paths))
+            elapsed = time.perf_counter() - started
+        return self.throughput_result(latencies, elapsed)
+
+    def throughput_async(self, paths, params):
+        application = get_asgi_application()
+
+        async def run():
+            semaphore = asyncio.Semaphore(params['concurrency'])
+
+            async def request(path):
+                async with semaphore:
+                    started = time.perf_counter()
+                    status = await asgi_get(application, path)
+                    if status != 200:
+                        raise CommandError(f'{path}: ответ {status}')
+                    return time.perf_counter() - started
+
+            await asyncio.gather(*(request(path) for path in paths[:params['workers']]))
+            started = time.perf_counter()
+            latencies = await asyncio.gather(*(request(path) for path in paths))
+            return latencies, time.perf_counter() - started
+
+        # Свой поток: asyncio.run нельзя вызывать из потока, где уже есть цикл событий
+        result = []
+        thread = threading.Thread(target=lambda: result.append(asyncio.run(run())))
+        thread.start()
+        thread.join()
+        if not result:
+            raise CommandError('Замер асинхронных view завершился ошибкой')
+        return self.throughput_result(*result[0])
+
+    @staticmethod
+    def throughput_result(latencies, elapsed):
+        latencies = sorted(latency * 1000 for latency in latencies)
+        return {
+            'rps': round(len(latencies) / elapsed, 1),
+            'latency_ms': {
+                'median': round(statistics.median(latencies), 3),
+                'p95': round(latencies[int(len(latencies) * 0.95) - 1], 3),
+            },
+        }
+
+    def measure(self, func, setup=None):
+        """Время (мс), количество запросов и пиковая память (КБ) вызова func"""
+        # Подготовка (загрузка турнира) в замер не входит
+        def arguments():
+            return (setup(),) if setup is not None else ()
+
+        # Прогрев: первые вызовы компилируют шаблоны и заполняют кеши Django
+        func(*arguments())
+
+        timings = []
+        queries = None
+        for _ in range(self.repeat):
+            prepared = arguments()
+            with CaptureQueriesContext(connection) as context:
+                started = time.perf_counter()
+                func(*prepared)
+                timings.append((time.perf_counter() - started) * 1000)
+            queries = len(context)
+
+        prepared = arguments()
+        tracemalloc.start()
+        try:
+            func(*prepared)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+        return {
+            'wall_ms': {
+                'min': round(min(timings), 3),
+                'median': round(statistics.median(timings), 3),
+                'max': round(max(timings), 3),
+            },
+            'queries': queries,
+            'peak_kb': round(peak / 1024, 1),
+        }
+
+    def load_report(self, path):
+        try:
+            with open(path, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            raise CommandError(f'Не удалось прочитать {path}: {e}')
+
+    def print_report(self, results, previous=None):
+        previous_results = previous.get('results', {}) if previous else {}
+
+        self.stdout.write(f'{"Замер":<28} {"медиана, мс":>12} {"мин, мс":>10} {"запросы":>8} {"пик, КБ":>10}')
+        for name, result in results.items():
+            line = (
+                f'{name:<28} {result["wall_ms"]["median"]:>12.2f} {result["wall_ms"]["min"]:>10.2f} '
+                f'{result["queries"]:>8} {result["peak_kb"]:>10.1f}'
+            )
+            before = previous_results.get(name)
+            if before:
+                change = self.percent(before['wall_ms']['median'], result['wall_ms']['median'])
+                line += f'   было {before["wall_ms"]["median"]:.2f} мс ({change}), запросов {before["queries"]}'
+            self.stdout.write(line)
+
+    def print_throughput(self, throughput, params, previous=None):
+        before_all = (previous or {}).get('throughput') or {}
+        self.stdout.write('')
+        self.stdout.write(
+            f'Пропускная способность: запросов {params["requests"]}, потоков sync {params["workers"]}, '
+            f'одновременно {params["concurrency"]}, задержка БД {params["db_latency"]} мс'
+        )
+        self.stdout.write(f'{"Вариант":<28} {"запр/с":>12} {"медиана, мс":>12} {"p95, мс":>10}')
+        for name, result in throughput.items():
+            line = (
+                f'{name:<28} {result["rps"]:>12.1f} {result["latency_ms"]["median"]:>12.2f} '
+                f'{result["latency_ms"]["p95"]:>10.2f}'
+            )
+            before = before_all.get(name)
+            if before:
+                line += f'   было {before["rps"]:.1f} запр/с ({self.percent(before["rps"], result["rps"])})'
+            self.stdout.write(line)
+
+    @staticmethod
+    def percent(before, after):
+        if not before:
+            return '—'
+        return f'{(after - before) / before * 100:+.0f}%'
@@ -0,0 +1,102 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+from tournament.models import Match
+
+
+PLAYOFF_STAGES = ['QUARTER', 'SEMI', 'THIRD', 'FINAL']
+
+
+def access_paths():
+    """
+    Запросы к Match из views.py и admin_views.py и индексы, которые они должны использовать.
+    Каждый элемент: (описание, queryset, допустимые индексы).
+    count()/exists() выполняются без ORDER BY, поэтому и здесь сортировка сброшена
+    """
+    cursor_time = timezone.now()
+    return [
+        (
+            'Расписание турнира (снимок турнира)',
+            Match.objects.filter(tournament_id=1).order_by('date_time', 'round_number'),
+            {'match_tournament_schedule_idx'},
+        ),
+        (
+            'Завершенные регулярные матчи (проверка плэйофф)',
+            Match.objects.filter(tournament_id=1, stage__in=['REGULAR', 'PRELIMINARY'], is_finished=True).order_by(),
+            {'match_tournament_stage_idx'},
+        ),
+        (
+            'Наличие матчей плэйофф',
+            Match.objects.filter(tournament_id=1, stage__in=PLAYOFF_STAGES).order_by(),
+            {'match_tournament_stage_idx'},
+        ),
+        (
+            'Завершенные матчи турнира',
+            Match.objects.filter(tournament_id=1, is_finished=True).order_by(),
+            {'match_tournament_finished_idx', 'match_tournament_stage_idx'},
+        ),
+        (
+            'Матчи пары команд',
+            Match.objects.filter(team_a_id=1, team_b_id=2),
+            {'match_team_pair_idx'},
+        ),
+        (
+            'Список матчей в админке',
+            Match.objects.order_by('-date_time', '-round_number', '-id'),
+            {'match_schedule_idx'},
+        ),
+        (
+            'Следующая страница списка матчей в админке',
+            Match.objects.filter(
+                Q(date_time__lt=cursor_time) | Q(date_time__isnull=True) |
+                Q(date_time=cursor_time, round_number__lt=1) | Q(date_time=cursor_time, round_number=1, id__lt=1)
+            ).order_by('-date_time', '-round_number', '-id'),
+            {'match_schedule_idx'},
+        ),
+        (
+            'Список матчей турнира в админке',
+            Match.objects.filter(tournament_id=1).order_by('-date_time', '-round_number', '-id'),
+            {'match_tournament_schedule_idx'},
+        ),
+    ]
+
+
+class Command(BaseCommand):
+    help = 'Проверяет через EXPLAIN, что запросы к матчам используют составные индексы'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verbose-plans',
+            action='store_true',
+            help='Выводить планы запросов целиком'
+        )
+
+    def handle(self, *args, **options):
+        failures = 0
+
+        with transaction.atomic():
+            if connection.vendor == 'postgresql':
+                # На маленьких таблицах PostgreSQL выбирает полный просмотр;
+                # запрещаем его, чтобы проверить, что подходящий индекс вообще применим
+                with connection.cursor() as cursor:
+                    cursor.execute('SET LOCAL enable_seqscan = off')
+
+            for description, queryset, expected in access_paths():
+                plan = queryset.explain()
+                used = sorted(name for name in expected if name in plan)
+
+                if used:
+                    self.stdout.write(self.style.SUCCESS(f'✓ {description}: {", ".join(used)}'))
+                else:
+                    failures += 1
+                    self.stdout.write(
+                        self.style.ERROR(f'✗ {description}: ожидался {" или ".join(sorted(expected))}')
+                    )
+                if options.get('verbose_plans') or not used:
+                    self.stdout.write(plan)
+
+        if failures:
+            raise CommandError(f'Запросов без нужного индекса: {failures}')
+
+        self.stdout.write(self.style.SUCCESS(f'Все запросы используют индексы ({connection.vendor})'))
@@ -0,0 +1,216 @@
+import hashlib
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.models import Count, Max
+from django.shortcuts import render
+from django.test import RequestFactory
+from django.urls import reverse
+
+from tournament import views
+from tournament.compression import EXTENSIONS, brotli, compressed_variants
+from tournament.models import Tournament
+from tournament.navigation import build_navigation_tree
+
+
+# Состояние прошлого экспорта (отпечатки турниров и меню) - в корне каталога
+STATE_FILE = '.export_state.json'
+
+
+def _fingerprint(*parts):
+    return hashlib.md5(repr(parts).encode(), usedforsecurity=False).hexdigest()
+
+
+def navigation_fingerprint():
+    """Отпечаток меню: меняется при изменении групп и турниров (тогда меняются все страницы)"""
+    return _fingerprint(build_navigation_tree())
+
+
+def tournament_fingerprints():
+    """Отпечатки турниров по updated_at турнира и его матчей (одним запросом): id -> отпечаток"""
+    rows = Tournament.objects.annotate(
+        matches_updated=Max('matches__updated_at'),
+        matches_count=Count('matches'),
+    ).values_list('id', 'updated_at', 'matches_updated', 'matches_count')
+    return {str(pk): _fingerprint(*values) for pk, *values in rows}
+
+
+def page_url(tournament_id=None):
+    if tournament_id is None:
+        return reverse('tournament:index')
+    return reverse('tournament:tournament_detail', args=[tournament_id])
+
+
+def page_path(tournament_id=None):
+    """Путь страницы внутри каталога экспорта: повторяет URL (nginx: try_files $uri $uri/index.html)"""
+    return Path(page_url(tournament_id).lstrip('/')) / 'index.html'
+
+
+def _write(path, data):
+    # Через временный файл: nginx никогда не отдает наполовину записанную страницу
+    tmp = path.with_name(f'.{path.name}.tmp')
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+def export_page(output, tournament_id=None):
+    """
+    Отрисовывает страницу (главную или турнира) и пишет ее с .gz и .br рядом.
+    Возвращает (путь, {вариант: размер})
+    """
+    request = RequestFactory().get(page_url(tournament_id))
+    request.user = AnonymousUser()
+    if tournament_id is None:
+        response = views.index(request)
+    else:
+        tournament = (
+            Tournament.objects.select_related('group').prefetch_related('teams')
+            .filter(id=tournament_id).first()
+        )
+        if tournament is None:
+            raise CommandError(f'Турнир {tournament_id} не найден')
+        # Без обновлений в реальном времени: у статического хостинга нет /events/ и /changes/
+        response = render(request, 'tournament/tournament_detail.html', views.tournament_page_context(tournament))
+    if response.status_code != 200:
+        raise CommandError(f'Страница турнира {tournament_id}: ответ {response.status_code}')
+
+    content = response.content
+    path = Path(output) / page_path(tournament_id)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    sizes = {'html': len(content)}
+    variants = compressed_variants(content)
+    for encoding, extension in EXTENSIONS.items():
+        sibling = path.with_name(path.name + extension)
+        if encoding in variants:
+            _write(sibling, variants[encoding])
+            sizes[encoding] = len(variants[encoding])
+        elif sibling.exists():
+            # Устаревший вариант отдавался бы вместо новой страницы
+            sibling.unlink()
+    # Страница - последней: сжатые варианты к этому моменту уже соответствуют ей
+    _write(path, content)
+    return str(path.relative_to(output)), sizes
+
+
+def _init_worker():
+    # Процессы пула открывают свои соединения с БД (унаследованные после fork не используются)
+    connections.close_all()
+
+
+class Command(BaseCommand):
+    help = (
+        'Экспортирует главную и страницы турниров в статические файлы (с .gz и .br рядом) '
+        'для отдачи nginx или CDN без Python. По умолчанию - только изменившиеся с прошлого экспорта'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output',
+            default=str(settings.STATIC_EXPORT_ROOT),
+            help='Каталог экспорта (по умолчанию STATIC_EXPORT_ROOT)'
+        )
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Экспортировать все страницы, не сверяясь с прошлым экспортом'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Процессов для отрисовки (1 - без пула)'
+        )
+
+    def handle(self, *args, **options):
+        if options['workers'] < 1:
+            raise CommandError('--workers должен быть не меньше 1')
+
+        output = Path(options['output']).resolve()
+        output.mkdir(parents=True, exist_ok=True)
+        state_path = output / STATE_FILE
+        last_state = self.load_state(state_path)
+        state = {} if options['full'] else last_state
+
+        if brotli is None:
+            self.stdout.write(self.style.WARNING('⚠ Пакет Brotli не установлен: файлы .br не создаются'))
+
+        started = time.perf_counter()
+        navigation = navigation_fingerprint()
+        fingerprints = tournament_fingerprints()
+
+        # Изменение меню затрагивает все страницы, изменение матчей - только страницу турнира
+        previous = state.get('tournaments', {}) if state.get('navigation') == navigation else {}
+        changed = [pk for pk, fingerprint in fingerprints.items() if previous.get(pk) != fingerprint]
+        pages = ([None] if state.get('navigation') != navigation else []) + [int(pk) for pk in changed]
+
+        removed = [pk for pk in last_state.get('tournaments', {}) if pk not in fingerprints]
+        for pk in removed:
+            shutil.rmtree(output / page_path(int(pk)).parent, ignore_errors=True)
+
+        results = self.export(output, pages, options['workers'])
+
+        self.save_state(state_path, {'navigation': navigation, 'tournaments': fingerprints})
+
+        totals = {}
+        for _, sizes in results:
+            for variant, size in sizes.items():
+                totals[variant] = totals.get(variant, 0) + size
+        details = ', '.join(f'{variant} {size / 1024:.0f} КБ' for variant, size in totals.items())
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Экспортировано страниц: {len(results)} из {len(fingerprints) + 1} '
+            f'за {time.perf_counter() - started:.1f} с' + (f' ({details})' if details else '')
+        ))
+        if removed:
+            self.stdout.write(self.style.SUCCESS(f'✓ Удалено страниц турниров: {len(removed)}'))
+        self.copy_static(output)
+        self.stdout.write(f'Каталог: {output}')
+
+    def copy_static(self, output):
+        """Собранная статика (CSS/JS с хешем в имени и их .gz/.br) - рядом со страницами, по STATIC_URL"""
+        if '://' in settings.STATIC_URL or settings.STATIC_URL.startswith('//'):
+            # Статика на отдельном домене (CDN) - страницы ссылаются на нее напрямую
+            return
+        root = Path(settings.STATIC_ROOT)
+        # Хранилище без манифеста (имена без хеша) - достаточно самого каталога collectstatic
+        if not (root / getattr(staticfiles_storage, 'manifest_name', '')).exists():
+            self.stdout.write(self.style.WARNING(
+                '⚠ Статика не собрана (manage.py collectstatic): стили и скрипты страниц не скопированы'
+            ))
+            return
+        shutil.copytree(root, output / settings.STATIC_URL.strip('/'), dirs_exist_ok=True)
+        self.stdout.write(self.style.SUCCESS('✓ Статика скопирована'))
+
+    def export(self, output, pages, workers):
+        if not pages:
+            return []
+        if workers == 1 or len(pages) == 1:
+            return [export_page(output, page) for page in pages]
+
+        # Соединения родителя не должны достаться процессам пула
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=min(workers, len(pages)), initializer=_init_worker) as pool:
+            return list(pool.map(export_page, [output] * len(pages), pages))
+
+    def load_state(self, path):
+        try:
+            with open(path, encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            self.stdout.write(self.style.WARNING(f'⚠ Не удалось прочитать {path}: {e}; экспортируются все страницы'))
+            return {}
+
+    def save_state(self, path, state):
+        _write(path, json.dumps(state, ensure_ascii=False, indent=2).encode())
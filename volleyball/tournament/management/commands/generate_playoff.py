@@ -1,6 +1,75 @@
-from django.core.management.base import BaseCommand
-from tournament.models import Tournament
-from tournament.views import check_and_generate_playoff
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+from django.db.models import BooleanField, ExpressionWrapper
+from tournament.counters import playoff_ready_q, add_counters, AWAITING_PLAYOFF_KEY
+from tournament.models import Tournament, Match
+from tournament.playoff import first_round_matches
+from tournament.signals import process_match_changes
+from tournament.snapshot import MatchRecord
+from tournament.standings import read_standings_many
+
+
+def plan_brackets(tournament_ids):
+    """
+    Первый раунд сетки для готовых турниров из списка (только чтение, можно в
+    параллельных процессах). Возвращает список
+    (id, название, [(этап, позиция, id команды А, id команды Б, команда А, команда Б)])
+    """
+    tournaments = list(Tournament.objects.filter(playoff_ready_q(), id__in=tournament_ids).order_by('id'))
+    standings = read_standings_many([tournament.id for tournament in tournaments])
+
+    return [
+        (tournament.id, tournament.name, [
+            (match.stage, match.bracket_slot, match.team_a.id, match.team_b.id, match.team_a.name, match.team_b.name)
+            for match in first_round_matches(tournament, standings[tournament.id])
+        ])
+        for tournament in tournaments
+    ]
+
+
+def write_brackets(plans):
+    """
+    Сохраняет сетки одной транзакцией. Готовность перепроверяется в самом UPDATE,
+    как в claim_playoff (select_for_update в SQLite не работает): турнир, для которого
+    плэйофф успели создать из админки, пропускается. Планы с пустой сеткой не сохраняются.
+    Возвращает сохраненные планы
+    """
+    plans = [plan for plan in plans if plan[2]]
+    if not plans:
+        return []
+
+    with transaction.atomic():
+        ids = [plan[0] for plan in plans]
+        Tournament.objects.filter(playoff_ready_q(), id__in=ids).update(playoff_generated=True)
+        # Помечены этим UPDATE: плэйофф, созданный из админки, к этому моменту уже с матчами
+        claimed = set(
+            Tournament.objects.filter(id__in=ids, playoff_generated=True, playoff_matches=0).values_list('id', flat=True)
+        )
+        plans = [plan for plan in plans if plan[0] in claimed]
+        if not plans:
+            return []
+
+        # Эти турниры были готовы к плэйофф и перестали быть готовыми
+        add_counters({AWAITING_PLAYOFF_KEY: -len(claimed)})
+        matches = Match.objects.bulk_create([
+            Match(
+                tournament_id=tournament_id,
+                team_a_id=team_a_id,
+                team_b_id=team_b_id,
+                stage=stage,
+                bracket_slot=slot,
+                round_number=None,
+            )
+            for tournament_id, _, bracket in plans
+            for stage, slot, team_a_id, team_b_id, _, _ in bracket
+        ])
+        # bulk_create не отправляет сигналов: счетчики и кеш страниц обновляем сами
+        process_match_changes([(None, MatchRecord.from_match(match)) for match in matches])
+
+    return plans
 
 
 class Command(BaseCommand):
@@ -12,37 +81,93 @@ class Command(BaseCommand):
             type=int,
             help='ID конкретного турнира для генерации плэйофф'
         )
+        parser.add_argument(
+            '--jobs',
+            type=int,
+            default=1,
+            help='Количество процессов для построения сеток (для больших архивов)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=200,
+            help='Турниров в одной транзакции'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Показать, для каких турниров и с какими парами будет создан плэйофф, ничего не записывая'
+        )
 
     def handle(self, *args, **options):
         tournament_id = options.get('tournament_id')
+        jobs = options['jobs']
+        dry_run = options['dry_run']
+        if jobs < 1 or options['batch_size'] < 1:
+            raise CommandError('--jobs и --batch-size должны быть не меньше 1')
 
+        tournaments = Tournament.objects.filter(has_playoff=True)
         if tournament_id:
-            # Генерируем для конкретного турнира
-            try:
-                tournament = Tournament.objects.get(id=tournament_id)
-                result = check_and_generate_playoff(tournament)
-                if result:
-                    self.stdout.write(
-                        self.style.SUCCESS(f'✓ Плэйофф успешно сгенерирован для "{tournament.name}"')
-                    )
-                else:
-                    self.stdout.write(
-                        self.style.WARNING(f'⚠ Не удалось сгенерировать плэйофф для "{tournament.name}"')
-                    )
-            except Tournament.DoesNotExist:
+            if not Tournament.objects.filter(id=tournament_id).exists():
                 self.stdout.write(self.style.ERROR(f'✗ Турнир с ID {tournament_id} не найден'))
+                return
+            tournaments = tournaments.filter(id=tournament_id)
+
+        # Готовность всех турниров - одним запросом по счетчикам
+        status = list(tournaments.annotate(
+            ready=ExpressionWrapper(playoff_ready_q(), output_field=BooleanField())
+        ).order_by('id').values('id', 'name', 'playoff_generated', 'ready'))
+
+        ready_ids = [row['id'] for row in status if row['ready']]
+        generated = sum(1 for row in status if row['playoff_generated'])
+        self.stdout.write(
+            f'Турниров с плэйофф: {len(status)}, уже сгенерирован: {generated}, '
+            f'готовы: {len(ready_ids)}, не готовы: {len(status) - generated - len(ready_ids)}'
+        )
+
+        batch_size = options['batch_size']
+        batches = [ready_ids[i:i + batch_size] for i in range(0, len(ready_ids), batch_size)]
+
+        # Сетки строятся параллельно (чтение), а записываются в этом процессе:
+        # одновременная запись из нескольких процессов в SQLite упирается в блокировку базы
+        if jobs > 1 and len(batches) > 1:
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=jobs, initializer=django.setup) as executor:
+                planned = list(executor.map(plan_brackets, batches))
         else:
-            # Генерируем для всех турниров с плэйофф
-            tournaments = Tournament.objects.filter(has_playoff=True)
-            count = 0
-            for tournament in tournaments:
-                result = check_and_generate_playoff(tournament)
-                if result:
-                    count += 1
-                    self.stdout.write(
-                        self.style.SUCCESS(f'✓ Плэйофф для "{tournament.name}"')
-                    )
+            planned = [plan_brackets(batch) for batch in batches]
+
+        results = []
+        skipped = []
+        for plans in planned:
+            # Пар нет, хотя счетчики говорят о готовности: таблица или состав команд
+            # разошлись со счетчиками. Турнир не помечается сгенерированным без матчей
+            skipped.extend(plan for plan in plans if not plan[2])
+            plans = [plan for plan in plans if plan[2]]
+            results.extend(plans if dry_run else write_brackets(plans))
 
+        for _, name, _ in skipped:
+            self.stdout.write(self.style.WARNING(
+                f'⚠ Пропущен "{name}": сетка пуста - таблица не совпадает со счетчиками '
+                f'(проверьте manage.py rebuild_standings --check)'
+            ))
+
+        stage_names = dict(Match.STAGE_CHOICES)
+        for _, name, bracket in results:
+            if dry_run:
+                self.stdout.write(f'Турнир "{name}":')
+                for stage, slot, _, _, team_a, team_b in bracket:
+                    self.stdout.write(f'  {stage_names[stage]} №{slot}: {team_a} - {team_b}')
+            else:
+                self.stdout.write(self.style.SUCCESS(f'✓ Плэйофф для "{name}"'))
+
+        if dry_run:
+            self.stdout.write(self.style.WARNING(
+                f'Пробный запуск: плэйофф будет сгенерирован для {len(results)} турниров, изменения не записаны'
+            ))
+        elif tournament_id and not results:
+            self.stdout.write(self.style.WARNING('⚠ Не удалось сгенерировать плэйофф: турнир не готов'))
+        else:
             self.stdout.write(
-                self.style.SUCCESS(f'Плэйофф сгенерирован для {count} турниров')
+                self.style.SUCCESS(f'Плэйофф сгенерирован для {len(results)} турниров')
             )
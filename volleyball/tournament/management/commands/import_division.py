@@ -0,0 +1,361 @@
+import re
+from collections import Counter
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from tournament.counters import add_counters
+from tournament.models import Team, Venue, TournamentGroup, Tournament, Match
+from tournament.search import update_index
+from tournament.signals import process_match_changes
+from tournament.snapshot import MatchRecord
+
+
+# Заголовки разделов -> (этап, номер тура)
+SECTION_STAGES = {
+    'ПРЕДВАРИТЕЛЬНЫЙ ТУР': ('PRELIMINARY', None),
+    '1/4 ФИНАЛА': ('QUARTER', None),
+    '1/2 ФИНАЛА': ('SEMI', None),
+    'МАТЧ ЗА 3 МЕСТО': ('THIRD', None),
+    'ФИНАЛ': ('FINAL', None),
+}
+ROUND_RE = re.compile(r'^ТУР\s+(\d+)$')
+SCORE_RE = re.compile(r'(\d+)\s*:\s*(\d+)')
+DATE_FORMATS = ['%d.%m.%Y %H:%M', '%d.%m.%Y']
+
+
+class ParsedMatch:
+    """Матч из файла"""
+    __slots__ = ('line', 'team_a', 'team_b', 'stage', 'round_number', 'date_time', 'sets', 'set_scores')
+
+    def __init__(self, line, team_a, team_b, stage, round_number, date_time, sets, set_scores):
+        self.line = line
+        self.team_a = team_a
+        self.team_b = team_b
+        self.stage = stage
+        self.round_number = round_number
+        self.date_time = date_time
+        self.sets = sets
+        self.set_scores = set_scores
+
+
+class ParsedDivision:
+    """Дивизион из файла: название, команды и матчи"""
+
+    def __init__(self, name, line):
+        self.name = name
+        self.line = line
+        self.teams = []
+        self.matches = []
+
+
+def parse_section(text):
+    """(этап, номер тура) для заголовка раздела или None"""
+    title = ' '.join(text.upper().split())
+    if title in SECTION_STAGES:
+        return SECTION_STAGES[title]
+    match = ROUND_RE.match(title)
+    if match:
+        return 'REGULAR', int(match.group(1))
+    return None
+
+
+def parse_date(text, line_number):
+    if not text:
+        return None
+    for date_format in DATE_FORMATS:
+        try:
+            return timezone.make_aware(datetime.strptime(text, date_format))
+        except ValueError:
+            continue
+    raise CommandError(f'Строка {line_number}: не удалось разобрать дату "{text}"')
+
+
+def parse_score(cells):
+    """
+    Счет из оставшихся колонок: первая пара - счет по сетам, остальные - счет партий.
+    Поддерживаются и отдельные колонки, и запись "3:1 (25:20, 23:25, ...)"
+    """
+    pairs = [(int(a), int(b)) for a, b in SCORE_RE.findall(' '.join(cells))]
+    if not pairs:
+        return None, []
+    return pairs[0], [{'a': a, 'b': b} for a, b in pairs[1:]]
+
+
+def parse_divisions(lines):
+    """
+    Потоково разбирает файл формата info.txt и выдает дивизионы по мере готовности.
+
+    Формат: строка с названием дивизиона, затем команды по одной в строке,
+    затем разделы "ПРЕДВАРИТЕЛЬНЫЙ ТУР", "ТУР N" (и этапы плэйофф) со строками
+    "команда А<TAB>команда Б<TAB>дата<TAB>счет...".
+    """
+    division = None
+    state = 'start'
+    section = None
+
+    for line_number, raw in enumerate(lines, start=1):
+        cells = [cell.strip() for cell in raw.rstrip('\r\n').split('\t')]
+        values = [cell for cell in cells if cell]
+
+        if not values:
+            continue
+
+        stage = parse_section(values[0]) if len(values) == 1 else None
+        if stage is not None:
+            if division is None:
+                raise CommandError(f'Строка {line_number}: раздел "{values[0]}" до названия дивизиона')
+            section = stage
+            state = 'matches'
+            continue
+
+        if len(values) == 1 and state in ('start', 'matches'):
+            # Новый дивизион
+            if division is not None:
+                yield division
+            division = ParsedDivision(values[0], line_number)
+            state = 'teams'
+            section = None
+        elif state == 'teams':
+            if len(values) != 1:
+                raise CommandError(f'Строка {line_number}: ожидалось название команды, получено "{raw.strip()}"')
+            division.teams.append(values[0])
+        else:
+            if len(cells) < 2 or not cells[0] or not cells[1]:
+                raise CommandError(f'Строка {line_number}: ожидался матч "команда А<TAB>команда Б", получено "{raw.strip()}"')
+            sets, set_scores = parse_score(cells[3:])
+            division.matches.append(ParsedMatch(
+                line_number,
+                cells[0],
+                cells[1],
+                section[0],
+                section[1],
+                parse_date(cells[2] if len(cells) > 2 else '', line_number),
+                sets,
+                set_scores,
+            ))
+
+    if division is not None:
+        yield division
+
+
+class Command(BaseCommand):
+    help = 'Импортирует дивизионы из файла формата info.txt (команды, туры, даты и счета)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Путь к файлу')
+        parser.add_argument('--group', required=True, help='Название группы турниров')
+        parser.add_argument(
+            '--gender',
+            choices=['M', 'F'],
+            help='Пол турниров (по умолчанию определяется по названию дивизиона)'
+        )
+        parser.add_argument('--rounds', type=int, default=1, help='Количество кругов для новых турниров')
+        parser.add_argument('--venue', help='Место проведения для новых матчей')
+        parser.add_argument(
+            '--division',
+            action='append',
+            help='Импортировать только дивизион с этим названием (можно указать несколько раз)'
+        )
+        parser.add_argument('--encoding', default='utf-8-sig', help='Кодировка файла')
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Показать изменения, ничего не записывая'
+        )
+
+    def handle(self, *args, **options):
+        self.dry_run = options['dry_run']
+        self.options = options
+        only = set(options['division'] or [])
+
+        try:
+            source = open(options['path'], encoding=options['encoding'])
+        except OSError as e:
+            raise CommandError(f'Не удалось открыть файл: {e}')
+
+        imported = 0
+        with source, transaction.atomic():
+            self.group = TournamentGroup.objects.filter(name=options['group']).first()
+            self.venue = None
+            if options['venue']:
+                self.venue = Venue.objects.filter(name=options['venue']).first()
+
+            if not self.dry_run:
+                if self.group is None:
+                    self.group = TournamentGroup.objects.create(name=options['group'])
+                if options['venue'] and self.venue is None:
+                    self.venue = Venue.objects.create(name=options['venue'])
+
+            for division in parse_divisions(source):
+                if only and division.name not in only:
+                    continue
+                self.import_division(division)
+                imported += 1
+
+        if self.dry_run:
+            self.stdout.write(self.style.WARNING(f'Пробный запуск: дивизионов {imported}, изменения не записаны'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'✓ Импортировано дивизионов: {imported}'))
+
+    def division_gender(self, division):
+        if self.options['gender']:
+            return self.options['gender']
+        name = division.name.lower()
+        if 'жен' in name:
+            return 'F'
+        if 'муж' in name:
+            return 'M'
+        raise CommandError(f'Не удалось определить пол для "{division.name}", укажите --gender')
+
+    def import_division(self, division):
+        gender = self.division_gender(division)
+
+        tournament = None
+        if self.group is not None and self.group.pk:
+            tournament = Tournament.objects.filter(name=division.name, group=self.group).first()
+
+        self.stdout.write(
+            f'Турнир "{division.name}"' + (' (новый)' if tournament is None else '')
+        )
+
+        # Команды из матчей, которых нет в списке дивизиона
+        team_names = list(dict.fromkeys(division.teams))
+        for parsed in division.matches:
+            for name in (parsed.team_a, parsed.team_b):
+                if name not in team_names:
+                    self.stdout.write(self.style.WARNING(
+                        f'  ⚠ строка {parsed.line}: команды "{name}" нет в списке дивизиона'
+                    ))
+                    team_names.append(name)
+
+        # Все команды дивизиона одним запросом
+        teams = {}
+        for team in Team.objects.filter(name__in=team_names, gender=gender):
+            teams.setdefault(team.name, team)
+        missing = [name for name in team_names if name not in teams]
+        for name in missing:
+            self.stdout.write(f'  + команда {name}')
+
+        # Существующие матчи турнира одним запросом
+        existing = {}
+        if tournament is not None:
+            occurrences = Counter()
+            for match in tournament.matches.order_by('id'):
+                key = (match.team_a_id, match.team_b_id, match.stage, match.round_number)
+                occurrences[key] += 1
+                existing[key + (occurrences[key],)] = match
+
+        if not self.dry_run:
+            if tournament is None:
+                tournament = Tournament.objects.create(
+                    name=division.name,
+                    group=self.group,
+                    gender=gender,
+                    number_of_rounds=self.options['rounds'],
+                )
+            if missing:
+                Team.objects.bulk_create([Team(name=name, gender=gender) for name in missing])
+                new_teams = list(Team.objects.filter(name__in=missing, gender=gender))
+                for team in new_teams:
+                    teams.setdefault(team.name, team)
+                # bulk_create не отправляет сигналов: индекс поиска и счетчик команд обновляем сами
+                update_index(Team, new_teams)
+                add_counters({'teams': len(new_teams)})
+            tournament.teams.add(*teams.values())
+
+        created = []
+        updated = []
+        changes = []
+        unchanged = 0
+        occurrences = Counter()
+
+        for parsed in division.matches:
+            team_a = teams.get(parsed.team_a)
+            team_b = teams.get(parsed.team_b)
+            title = self.describe(parsed)
+
+            match = None
+            if team_a is not None and team_b is not None:
+                key = (team_a.id, team_b.id, parsed.stage, parsed.round_number)
+                occurrences[key] += 1
+                match = existing.get(key + (occurrences[key],))
+
+            if match is None:
+                self.stdout.write(f'  + {title}')
+                if not self.dry_run:
+                    match = Match(
+                        tournament=tournament,
+                        team_a=team_a,
+                        team_b=team_b,
+                        venue=self.venue,
+                        stage=parsed.stage,
+                        round_number=parsed.round_number,
+                        date_time=parsed.date_time,
+                    )
+                    self.apply_score(match, parsed)
+                    created.append(match)
+                continue
+
+            previous = MatchRecord.from_match(match)
+            diff = []
+            if parsed.date_time and parsed.date_time != match.date_time:
+                diff.append(f'дата {self.format_date(match.date_time)} → {self.format_date(parsed.date_time)}')
+                match.date_time = parsed.date_time
+            # Результаты, внесенные в админке, без счета в файле не затираются
+            if parsed.sets and (parsed.sets != (match.sets_a, match.sets_b) or not match.is_finished
+                                or (parsed.set_scores and parsed.set_scores != match.set_scores)):
+                diff.append(f'счет {match.get_score_display()} → {parsed.sets[0]}:{parsed.sets[1]}')
+                self.apply_score(match, parsed)
+
+            if not diff:
+                unchanged += 1
+                continue
+
+            self.stdout.write(f'  ~ {title}: {", ".join(diff)}')
+            match.updated_at = timezone.now()
+            updated.append(match)
+            changes.append((previous, MatchRecord.from_match(match)))
+
+        if unchanged:
+            self.stdout.write(f'  = без изменений: {unchanged}')
+
+        if self.dry_run:
+            return
+
+        Match.objects.bulk_create(created)
+        Match.objects.bulk_update(
+            updated,
+            ['date_time', 'sets_a', 'sets_b', 'set_scores', 'is_finished', 'updated_at'],
+        )
+        changes.extend((None, MatchRecord.from_match(match)) for match in created)
+        process_match_changes(changes)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ {division.name}: создано матчей {len(created)}, обновлено {len(updated)}'
+        ))
+
+    @staticmethod
+    def apply_score(match, parsed):
+        if not parsed.sets:
+            return
+        match.sets_a, match.sets_b = parsed.sets
+        match.set_scores = parsed.set_scores or None
+        match.is_finished = True
+
+    @staticmethod
+    def format_date(value):
+        if value is None:
+            return '—'
+        value = timezone.localtime(value)
+        if value.hour or value.minute:
+            return value.strftime('%d.%m.%Y %H:%M')
+        return value.strftime('%d.%m.%Y')
+
+    def describe(self, parsed):
+        if parsed.stage == 'REGULAR':
+            stage = f'Тур {parsed.round_number}'
+        else:
+            stage = dict(Match.STAGE_CHOICES)[parsed.stage]
+        return f'{stage}: {parsed.team_a} - {parsed.team_b} {self.format_date(parsed.date_time)}'
@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand
+from tournament.standings import CACHE_FIELDS, rebuild_standings_cache
+
+
+class Command(BaseCommand):
+    help = 'Сверяет кеш турнирных таблиц с матчами и исправляет расхождения'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tournament-id',
+            type=int,
+            help='ID конкретного турнира для проверки'
+        )
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Только проверить, не исправляя расхождения'
+        )
+
+    def handle(self, *args, **options):
+        tournament_id = options.get('tournament_id')
+        check_only = options.get('check')
+
+        drift = rebuild_standings_cache(
+            tournament_ids=[tournament_id] if tournament_id else None,
+            repair=not check_only,
+        )
+
+        for tournament_id, team_id, cached, computed in drift:
+            if cached is None:
+                details = 'нет строки в кеше'
+            else:
+                details = ', '.join(
+                    f'{field}: {old} → {new}'
+                    for field, old, new in zip(CACHE_FIELDS, cached, computed)
+                    if old != new
+                )
+            self.stdout.write(
+                self.style.WARNING(f'⚠ Турнир {tournament_id}, команда {team_id}: {details}')
+            )
+
+        if not drift:
+            self.stdout.write(self.style.SUCCESS('✓ Кеш турнирных таблиц актуален'))
+        elif check_only:
+            self.stdout.write(self.style.ERROR(f'✗ Найдено расхождений: {len(drift)}'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'✓ Исправлено расхождений: {len(drift)}'))
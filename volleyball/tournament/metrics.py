@@ -0,0 +1,227 @@
+import atexit
+import json
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+
+from django.conf import settings
+from django.db.models import Count, Q
+from django.http import HttpResponse, HttpResponseForbidden
+from django.views.decorators.cache import never_cache
+from django.views.decorators.http import require_GET
+
+from .models import Tournament, Match
+
+
+logger = logging.getLogger('tournament.metrics')
+
+# Границы корзин гистограммы времени ответа (сек)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+# Семейства метрик: имя -> (тип, описание)
+FAMILIES = {
+    'volleyball_http_request_duration_seconds': ('histogram', 'Время ответа по имени URL'),
+    'volleyball_http_requests_total': ('counter', 'Количество запросов по имени URL и статусу'),
+    'volleyball_db_queries_total': ('counter', 'Количество SQL-запросов по имени URL'),
+    'volleyball_cache_requests_total': ('counter', 'Обращения к кешам приложения (hit/miss)'),
+    'volleyball_tournaments': ('gauge', 'Количество турниров'),
+    'volleyball_matches': ('gauge', 'Количество матчей по статусу'),
+}
+
+
+def _labels_key(labels):
+    return json.dumps(sorted(labels.items()), ensure_ascii=False)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(pairs):
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class MetricsStore:
+    """
+    Счетчики, общие для всех процессов (воркеров gunicorn) на сервере.
+    Каждый процесс копит приращения в памяти, а фоновый поток раз в flush_interval
+    прибавляет их к значениям в общем файле SQLite (запросы, в том числе async views,
+    файл не ждут); при выдаче метрик читаются суммы из файла
+    """
+
+    def __init__(self, path, flush_interval):
+        self.path = str(path)
+        self.flush_interval = flush_interval
+        self.lock = threading.Lock()
+        self.pending = {}
+        self.flusher_pid = None
+        self.initialized = False
+
+    def inc(self, name, labels, value=1):
+        key = (name, _labels_key(labels))
+        with self.lock:
+            self.pending[key] = self.pending.get(key, 0) + value
+        self._start_flusher()
+
+    def _start_flusher(self):
+        # Поток нужен в каждом процессе: воркер gunicorn после fork потоков родителя не имеет
+        pid = os.getpid()
+        if self.flusher_pid == pid:
+            return
+        with self.lock:
+            if self.flusher_pid == pid:
+                return
+            self.flusher_pid = pid
+        threading.Thread(target=self._flush_loop, name='metrics-flush', daemon=True).start()
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(self.flush_interval)
+            self.flush()
+
+    def observe(self, name, labels, value, buckets):
+        """Наблюдение гистограммы: корзины накопительные, как требует формат Prometheus"""
+        for bound in buckets:
+            if value <= bound:
+                self.inc(f'{name}_bucket', {**labels, 'le': _format_value(bound)})
+        self.inc(f'{name}_bucket', {**labels, 'le': '+Inf'})
+        self.inc(f'{name}_sum', labels, value)
+        self.inc(f'{name}_count', labels)
+
+    def _connect(self):
+        connection = sqlite3.connect(self.path, timeout=5)
+        if not self.initialized:
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS metrics ('
+                'name TEXT NOT NULL, labels TEXT NOT NULL, value REAL NOT NULL, '
+                'PRIMARY KEY (name, labels))'
+            )
+            self.initialized = True
+        return connection
+
+    def flush(self):
+        with self.lock:
+            pending, self.pending = self.pending, {}
+        if not pending:
+            return
+
+        try:
+            connection = self._connect()
+            try:
+                with connection:
+                    connection.executemany(
+                        'INSERT INTO metrics (name, labels, value) VALUES (?, ?, ?) '
+                        'ON CONFLICT (name, labels) DO UPDATE SET value = value + excluded.value',
+                        [(name, labels, value) for (name, labels), value in pending.items()],
+                    )
+            finally:
+                connection.close()
+        except sqlite3.Error:
+            # Метрики не должны ломать обработку запросов
+            logger.warning('Не удалось записать метрики в %s', self.path, exc_info=True)
+
+    def collect(self):
+        """Все сохраненные значения: список (имя, [(метка, значение)], значение)"""
+        self.flush()
+        try:
+            connection = self._connect()
+            try:
+                rows = connection.execute('SELECT name, labels, value FROM metrics').fetchall()
+            finally:
+                connection.close()
+        except sqlite3.Error:
+            logger.warning('Не удалось прочитать метрики из %s', self.path, exc_info=True)
+            return []
+        return [(name, json.loads(labels), value) for name, labels, value in rows]
+
+
+store = MetricsStore(settings.METRICS_DB_PATH, settings.METRICS_FLUSH_INTERVAL)
+atexit.register(store.flush)
+
+
+# ============= ЗАПИСЬ =============
+
+def observe_request(view, method, status, duration, queries):
+    """Вызывается InstrumentationMiddleware после каждого запроса"""
+    store.observe(
+        'volleyball_http_request_duration_seconds', {'view': view}, duration, LATENCY_BUCKETS
+    )
+    store.inc('volleyball_http_requests_total', {'view': view, 'method': method, 'status': str(status)})
+    store.inc('volleyball_db_queries_total', {'view': view}, queries)
+
+
+def cache_hit(cache_name):
+    store.inc('volleyball_cache_requests_total', {'cache': cache_name, 'result': 'hit'})
+
+
+def cache_miss(cache_name):
+    store.inc('volleyball_cache_requests_total', {'cache': cache_name, 'result': 'miss'})
+
+
+# ============= ВЫДАЧА =============
+
+def _family(name):
+    for suffix in ('_bucket', '_sum', '_count'):
+        if name.endswith(suffix) and name[:-len(suffix)] in FAMILIES:
+            return name[:-len(suffix)]
+    return name
+
+
+def _sort_key(row):
+    name, labels, _ = row
+    plain = [pair for pair in labels if pair[0] != 'le']
+    le = dict(labels).get('le')
+    bound = math.inf if le == '+Inf' else float(le) if le is not None else 0
+    return _family(name), plain, name, bound
+
+
+def _gauges():
+    matches = Match.objects.aggregate(
+        finished=Count('id', filter=Q(is_finished=True)),
+        scheduled=Count('id', filter=Q(is_finished=False)),
+    )
+    return [
+        ('volleyball_tournaments', [], Tournament.objects.count()),
+        ('volleyball_matches', [('state', 'finished')], matches['finished']),
+        ('volleyball_matches', [('state', 'scheduled')], matches['scheduled']),
+    ]
+
+
+def render_metrics():
+    """Все метрики в текстовом формате Prometheus"""
+    rows = sorted(store.collect(), key=_sort_key) + _gauges()
+
+    lines = []
+    current = None
+    for name, labels, value in rows:
+        family = _family(name)
+        if family != current:
+            current = family
+            kind, help_text = FAMILIES.get(family, ('untyped', ''))
+            lines.append(f'# HELP {family} {help_text}')
+            lines.append(f'# TYPE {family} {kind}')
+        lines.append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+    return '\n'.join(lines) + '\n'
+
+
+@require_GET
+@never_cache
+def metrics_view(request):
+    """Метрики для Prometheus; доступны только с адресов из METRICS_ALLOWED_IPS"""
+    if request.META.get('REMOTE_ADDR') not in settings.METRICS_ALLOWED_IPS:
+        return HttpResponseForbidden('Доступ запрещен')
+    return HttpResponse(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
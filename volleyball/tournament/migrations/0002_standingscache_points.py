@@ -0,0 +1,23 @@
+# Generated by Django 5.0.4 on 2026-10-17 12:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournament', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='standingscache',
+            name='points_lost',
+            field=models.IntegerField(default=0, verbose_name='Проигранные очки'),
+        ),
+        migrations.AddField(
+            model_name='standingscache',
+            name='points_won',
+            field=models.IntegerField(default=0, verbose_name='Выигранные очки'),
+        ),
+    ]
@@ -0,0 +1,73 @@
+from django.db import migrations
+
+
+# Правила подсчета на момент миграции (копия из tournament.standings: миграция
+# не должна меняться вместе с кодом приложения)
+
+def tournament_points_for(sets_own, sets_other):
+    """3 за победу 3:0 или 3:1, 2 за победу 3:2, 1 за поражение 2:3, 0 за остальные поражения"""
+    if sets_own == 3 and sets_other in (0, 1):
+        return 3
+    if sets_own == 3 and sets_other == 2:
+        return 2
+    if sets_other == 3 and sets_own == 2:
+        return 1
+    return 0
+
+
+def side_stats(sets_own, sets_other, points_own, points_other, decided):
+    """Вклад матча в строку команды: значения полей StandingsCache в порядке CACHE_FIELDS"""
+    won = lost = 0
+    if decided:
+        if sets_own > sets_other:
+            won = 1
+        else:
+            lost = 1
+    return (
+        1, won, lost, sets_own or 0, sets_other or 0,
+        points_own, points_other, tournament_points_for(sets_own, sets_other),
+    )
+
+
+CACHE_FIELDS = (
+    'played', 'won', 'lost', 'sets_won', 'sets_lost',
+    'points_won', 'points_lost', 'points',
+)
+
+
+def fill_standings_cache(apps, schema_editor):
+    """Заполняет StandingsCache по уже сыгранным матчам"""
+    Match = apps.get_model('tournament', 'Match')
+    StandingsCache = apps.get_model('tournament', 'StandingsCache')
+
+    totals = {}
+    for match in Match.objects.filter(is_finished=True).iterator():
+        points_a = sum(set_score.get('a', 0) for set_score in match.set_scores or [])
+        points_b = sum(set_score.get('b', 0) for set_score in match.set_scores or [])
+        # Победа/поражение учитываются, только если у обеих команд есть взятые сеты
+        decided = bool(match.sets_a and match.sets_b)
+        sides = (
+            (match.team_a_id, side_stats(match.sets_a, match.sets_b, points_a, points_b, decided)),
+            (match.team_b_id, side_stats(match.sets_b, match.sets_a, points_b, points_a, decided)),
+        )
+        for team_id, stats in sides:
+            total = totals.setdefault((match.tournament_id, team_id), [0] * len(CACHE_FIELDS))
+            for i, value in enumerate(stats):
+                total[i] += value
+
+    StandingsCache.objects.all().delete()
+    StandingsCache.objects.bulk_create([
+        StandingsCache(tournament_id=tournament_id, team_id=team_id, **dict(zip(CACHE_FIELDS, stats)))
+        for (tournament_id, team_id), stats in totals.items()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournament', '0002_standingscache_points'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_standings_cache, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.0.4 on 2026-10-17 12:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournament', '0003_fill_standingscache'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['tournament', 'date_time', 'round_number', 'id'], name='match_tournament_schedule_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['tournament', 'stage', 'is_finished'], name='match_tournament_stage_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(condition=models.Q(('is_finished', True)), fields=['tournament'], name='match_tournament_finished_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['team_a', 'team_b'], name='match_team_pair_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['date_time', 'round_number', 'id'], name='match_schedule_idx'),
+        ),
+    ]
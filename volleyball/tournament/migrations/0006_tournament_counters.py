@@ -0,0 +1,33 @@
+# Generated by Django 5.0.4 on 2026-10-17 12:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournament', '0005_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tournament',
+            name='finished_league_matches',
+            field=models.IntegerField(default=0, editable=False, verbose_name='Сыграно матчей круговой системы'),
+        ),
+        migrations.AddField(
+            model_name='tournament',
+            name='playoff_generated',
+            field=models.BooleanField(default=False, editable=False, verbose_name='Плэйофф сгенерирован'),
+        ),
+        migrations.AddField(
+            model_name='tournament',
+            name='playoff_matches',
+            field=models.IntegerField(default=0, editable=False, verbose_name='Матчей плэйофф'),
+        ),
+        migrations.AddField(
+            model_name='tournament',
+            name='teams_count',
+            field=models.IntegerField(default=0, editable=False, verbose_name='Количество команд'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+from django.db import migrations
+from django.db.models import Count
+
+
+LEAGUE_STAGES = ('PRELIMINARY', 'REGULAR')
+PLAYOFF_STAGES = ('QUARTER', 'SEMI', 'THIRD', 'FINAL')
+
+
+def fill_tournament_counters(apps, schema_editor):
+    """Заполняет счетчики турниров по уже существующим командам и матчам"""
+    Tournament = apps.get_model('tournament', 'Tournament')
+    Match = apps.get_model('tournament', 'Match')
+
+    def counts(queryset):
+        return {
+            row['tournament_id']: row['count']
+            for row in queryset.order_by().values('tournament_id').annotate(count=Count('id'))
+        }
+
+    teams = counts(Tournament.teams.through.objects.all())
+    finished = counts(Match.objects.filter(stage__in=LEAGUE_STAGES, is_finished=True))
+    playoff = counts(Match.objects.filter(stage__in=PLAYOFF_STAGES))
+
+    for tournament_id in Tournament.objects.values_list('id', flat=True):
+        Tournament.objects.filter(pk=tournament_id).update(
+            teams_count=teams.get(tournament_id, 0),
+            finished_league_matches=finished.get(tournament_id, 0),
+            playoff_matches=playoff.get(tournament_id, 0),
+            playoff_generated=playoff.get(tournament_id, 0) > 0,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournament', '0006_tournament_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_tournament_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.4 on 2026-10-17 12:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournament', '0007_fill_tournament_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='match',
+            name='bracket_slot',
+            field=models.PositiveSmallIntegerField(blank=True, null=True, verbose_name='Позиция в сетке'),
+        ),
+    ]
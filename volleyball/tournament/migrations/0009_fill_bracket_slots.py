@@ -0,0 +1,35 @@
+from django.db import migrations
+
+
+# Сколько матчей в этапе полной сетки
+STAGE_SIZES = {'QUARTER': 4, 'SEMI': 2, 'THIRD': 1, 'FINAL': 1}
+
+
+def fill_bracket_slots(apps, schema_editor):
+    """
+    Проставляет позиции в сетке уже созданным матчам плэйофф (в порядке создания),
+    если в этапе ровно столько матчей, сколько в сетке: тогда их можно продвигать дальше
+    """
+    Match = apps.get_model('tournament', 'Match')
+
+    stages = {}
+    for match in Match.objects.filter(stage__in=STAGE_SIZES).order_by('id'):
+        stages.setdefault((match.tournament_id, match.stage), []).append(match)
+
+    for (tournament_id, stage), matches in stages.items():
+        if len(matches) != STAGE_SIZES[stage]:
+            continue
+        for slot, match in enumerate(matches, start=1):
+            match.bracket_slot = slot
+        Match.objects.bulk_update(matches, ['bracket_slot'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournament', '0008_match_bracket_slot'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_bracket_slots, migrations.RunPython.noop),
+    ]
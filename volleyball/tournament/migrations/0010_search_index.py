@@ -0,0 +1,72 @@
+from django.db import migrations
+
+
+# Модели с поиском по названию -> их таблицы (копия логики tournament.search на момент миграции:
+# миграция не должна меняться вместе с кодом приложения)
+SEARCH_TABLES = {'Team': 'tournament_team', 'Venue': 'tournament_venue'}
+
+
+def normalize(text):
+    """Текст для индекса: нижний регистр, ё -> е, одиночные пробелы"""
+    return ' '.join(text.casefold().replace('ё', 'е').split())
+
+
+def fts_supported(connection):
+    """Есть ли в сборке SQLite FTS5 с токенизатором trigram (SQLite 3.34+)"""
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA compile_options')
+        options = {row[0] for row in cursor.fetchall()}
+    version = tuple(int(part) for part in connection.Database.sqlite_version.split('.'))
+    return 'ENABLE_FTS5' in options and version >= (3, 34)
+
+
+def create_search_index(apps, schema_editor):
+    """Индекс поиска по названиям команд и площадок: FTS5 в SQLite, pg_trgm в PostgreSQL"""
+    connection = schema_editor.connection
+    if connection.vendor == 'postgresql':
+        schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        for table in SEARCH_TABLES.values():
+            # icontains в PostgreSQL - UPPER(name::text) LIKE UPPER(...): индекс по тому же выражению
+            schema_editor.execute(
+                f'CREATE INDEX IF NOT EXISTS {table}_name_trgm '
+                f'ON {table} USING gin ((UPPER(name::text)) gin_trgm_ops)'
+            )
+        return
+    if not fts_supported(connection):
+        return
+
+    for model_name, table in SEARCH_TABLES.items():
+        model = apps.get_model('tournament', model_name)
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {table}_search USING fts5(name, tokenize='trigram')"
+        )
+        rows = [
+            (pk, normalize(name))
+            for pk, name in model.objects.using(connection.alias).values_list('pk', 'name')
+        ]
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {table}_search')
+            cursor.executemany(f'INSERT INTO {table}_search (rowid, name) VALUES (%s, %s)', rows)
+
+
+def drop_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == 'postgresql':
+        for table in SEARCH_TABLES.values():
+            schema_editor.execute(f'DROP INDEX IF EXISTS {table}_name_trgm')
+    elif fts_supported(connection):
+        for table in SEARCH_TABLES.values():
+            schema_editor.execute(f'DROP TABLE IF EXISTS {table}_search')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournament', '0009_fill_bracket_slots'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,56 @@
+from datetime import timedelta
+
+from django.db import migrations
+from django.db.models import Count, F, Q, Value
+from django.db.models.functions import Coalesce, TruncWeek
+from django.utils import timezone
+
+
+def playoff_ready_q():
+    """Готовность турнира к генерации плэйофф (копия tournament.counters.playoff_ready_q на момент миграции)"""
+    expected = F('teams_count') * (F('teams_count') - 1) / 2 * F('number_of_rounds')
+    return Q(
+        has_playoff=True,
+        playoff_generated=False,
+        playoff_matches=0,
+        teams_count__gte=Coalesce(F('playoff_teams'), Value(4)),
+        finished_league_matches__gte=expected,
+    )
+
+
+def fill_counters(apps, schema_editor):
+    """Заполняет счетчики панели администратора по уже существующим данным"""
+    Counter = apps.get_model('tournament', 'Counter')
+    Match = apps.get_model('tournament', 'Match')
+    Tournament = apps.get_model('tournament', 'Tournament')
+
+    values = {
+        'teams': apps.get_model('tournament', 'Team').objects.count(),
+        'venues': apps.get_model('tournament', 'Venue').objects.count(),
+        'groups': apps.get_model('tournament', 'TournamentGroup').objects.count(),
+        'tournaments': Tournament.objects.count(),
+        'matches': Match.objects.count(),
+        'finished_matches': Match.objects.filter(is_finished=True).count(),
+        'tournaments_awaiting_playoff': Tournament.objects.filter(playoff_ready_q()).count(),
+    }
+    weeks = Match.objects.filter(date_time__isnull=False).annotate(
+        week=TruncWeek('date_time')
+    ).order_by().values('week').annotate(count=Count('id'))
+    for row in weeks:
+        day = timezone.localdate(row['week'])
+        values[f'matches_week:{day - timedelta(days=day.weekday())}'] = row['count']
+
+    # Повторное применение после отката (обратная операция ничего не удаляет)
+    Counter.objects.all().delete()
+    Counter.objects.bulk_create([Counter(key=key, value=value) for key, value in values.items()])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournament', '0011_counter'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.0.4 on 2026-10-17 13:33
+
+from django.db import migrations, models
+
+
+def release_duplicate_slots(apps, schema_editor):
+    """
+    Повторные матчи одной позиции сетки (одновременное продвижение до этой миграции):
+    позиция остается у первого созданного, остальные становятся матчами без позиции
+    """
+    Match = apps.get_model('tournament', 'Match')
+    seen = set()
+    duplicates = []
+    for pk, tournament_id, stage, slot in Match.objects.filter(bracket_slot__isnull=False).order_by('id').values_list(
+        'pk', 'tournament_id', 'stage', 'bracket_slot'
+    ):
+        key = (tournament_id, stage, slot)
+        if key in seen:
+            duplicates.append(pk)
+        seen.add(key)
+    Match.objects.filter(pk__in=duplicates).update(bracket_slot=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournament', '0012_fill_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(release_duplicate_slots, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='match',
+            constraint=models.UniqueConstraint(condition=models.Q(('bracket_slot__isnull', False)), fields=('tournament', 'stage', 'bracket_slot'), name='match_bracket_slot_unique'),
+        ),
+    ]
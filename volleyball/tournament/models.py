@@ -1,3 +1,5 @@
+import copy
+
 from django.db import models
 from django.core.validators import MinValueValidator
 
@@ -7,6 +9,7 @@ class TournamentGroup(models.Model):
     name = models.CharField('Название группы', max_length=200)
     order = models.IntegerField('Порядок отображения', default=0)
     created_at = models.DateTimeField('Дата создания', auto_now_add=True)
+    updated_at = models.DateTimeField('Дата изменения', auto_now=True)
 
     class Meta:
         verbose_name = 'Группа турниров'
@@ -95,6 +98,15 @@ class Tournament(models.Model):
     )
     order = models.IntegerField('Порядок отображения', default=0)
     created_at = models.DateTimeField('Дата создания', auto_now_add=True)
+    updated_at = models.DateTimeField('Дата изменения', auto_now=True)
+
+    # Счетчики для проверки готовности плэйофф, ведутся сигналами (см. counters.py)
+    teams_count = models.IntegerField('Количество команд', default=0, editable=False)
+    finished_league_matches = models.IntegerField('Сыграно матчей круговой системы', default=0, editable=False)
+    playoff_matches = models.IntegerField('Матчей плэйофф', default=0, editable=False)
+    playoff_generated = models.BooleanField('Плэйофф сгенерирован', default=False, editable=False)
+
+    COUNTER_FIELDS = ('teams_count', 'finished_league_matches', 'playoff_matches', 'playoff_generated')
 
     class Meta:
         verbose_name = 'Турнир'
@@ -104,6 +116,16 @@ class Tournament(models.Model):
     def __str__(self):
         return f"{self.name} ({self.get_gender_display()})"
 
+    def save(self, *args, **kwargs):
+        # Счетчики меняются только через F()-обновления: сохранение загруженного
+        # ранее объекта не должно затирать их устаревшими значениями
+        if self.pk is not None and not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.COUNTER_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
     def clean(self):
         from django.core.exceptions import ValidationError
         if self.has_playoff and not self.playoff_teams:
@@ -121,6 +143,10 @@ class Match(models.Model):
         ('FINAL', 'Финал'),
     ]
 
+    # Этапы кругового турнира и плэйофф
+    LEAGUE_STAGES = ('PRELIMINARY', 'REGULAR')
+    PLAYOFF_STAGES = ('QUARTER', 'SEMI', 'THIRD', 'FINAL')
+
     tournament = models.ForeignKey(
         Tournament,
         on_delete=models.CASCADE,
@@ -151,6 +177,8 @@ class Match(models.Model):
     # Этап турнира
     stage = models.CharField('Этап', max_length=20, choices=STAGE_CHOICES)
     round_number = models.IntegerField('Номер тура', null=True, blank=True)
+    # Номер пары в сетке плэйофф внутри этапа (1/4 финала: 1-4, 1/2 финала: 1-2, финал и матч за 3 место: 1)
+    bracket_slot = models.PositiveSmallIntegerField('Позиция в сетке', null=True, blank=True)
 
     # Счет
     sets_a = models.IntegerField('Сеты команды А', null=True, blank=True)
@@ -161,11 +189,41 @@ class Match(models.Model):
     # Формат: [{"a": 25, "b": 20}, {"a": 23, "b": 25}, ...]
 
     is_finished = models.BooleanField('Завершен', default=False)
+    updated_at = models.DateTimeField('Дата изменения', auto_now=True)
 
     class Meta:
         verbose_name = 'Матч'
         verbose_name_plural = 'Матчи'
         ordering = ['date_time', 'round_number']
+        indexes = [
+            # Расписание турнира и список матчей турнира в админке
+            models.Index(fields=['tournament', 'date_time', 'round_number', 'id'], name='match_tournament_schedule_idx'),
+            # Матчи турнира по этапу (регулярные/плэйофф) и статусу
+            models.Index(fields=['tournament', 'stage', 'is_finished'], name='match_tournament_stage_idx'),
+            # Завершенные матчи турнира (таблица, матрица). Частичный: фильтр is_finished=True
+            # Django пишет как "is_finished" без сравнения, и SQLite не ищет по нему в составном индексе
+            models.Index(fields=['tournament'], condition=models.Q(is_finished=True), name='match_tournament_finished_idx'),
+            # Матчи пары команд
+            models.Index(fields=['team_a', 'team_b'], name='match_team_pair_idx'),
+            # Общий список матчей в админке (id - последнее поле ключа постраничного вывода)
+            models.Index(fields=['date_time', 'round_number', 'id'], name='match_schedule_idx'),
+        ]
+        constraints = [
+            # Одна позиция сетки плэйофф - один матч (матчи без позиции не ограничены)
+            models.UniqueConstraint(
+                fields=['tournament', 'stage', 'bracket_slot'],
+                condition=models.Q(bracket_slot__isnull=False),
+                name='match_bracket_slot_unique',
+            ),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Запоминаем значения из БД, чтобы при сохранении применить только разницу.
+        # Копия: изменение set_scores на месте (match.set_scores[0]['a'] = 30) не должно менять исходное состояние
+        instance._loaded_values = copy.deepcopy(dict(zip(field_names, values)))
+        return instance
 
     def __str__(self):
         score = ""
@@ -220,6 +278,8 @@ class StandingsCache(models.Model):
     lost = models.IntegerField('Поражения', default=0)
     sets_won = models.IntegerField('Выигранные сеты', default=0)
     sets_lost = models.IntegerField('Проигранные сеты', default=0)
+    points_won = models.IntegerField('Выигранные очки', default=0)
+    points_lost = models.IntegerField('Проигранные очки', default=0)
     points = models.IntegerField('Очки', default=0)
 
     class Meta:
@@ -229,4 +289,17 @@ class StandingsCache(models.Model):
         ordering = ['-points', '-sets_won']
 
     def __str__(self):
-        return f"{self.tournament.name} - {self.team.name}"
\ No newline at end of file
+        return f"{self.tournament.name} - {self.team.name}"
+
+
+class Counter(models.Model):
+    """Поддерживаемый счетчик для панели администратора (ключ -> значение)"""
+    key = models.CharField('Ключ', max_length=50, primary_key=True)
+    value = models.BigIntegerField('Значение', default=0)
+
+    class Meta:
+        verbose_name = 'Счетчик'
+        verbose_name_plural = 'Счетчики'
+
+    def __str__(self):
+        return f"{self.key} = {self.value}"
\ No newline at end of file
@@ -0,0 +1,136 @@
+import asyncio
+
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from . import metrics
+from .caching import NAVIGATION_VERSION_KEY, get_versions, aget_versions
+from .models import TournamentGroup, Tournament
+
+
+def navigation_version():
+    """Версия меню: меняется сигналами при сохранении и удалении групп и турниров"""
+    return get_versions(NAVIGATION_VERSION_KEY)[NAVIGATION_VERSION_KEY]
+
+
+async def anavigation_version():
+    return (await aget_versions(NAVIGATION_VERSION_KEY))[NAVIGATION_VERSION_KEY]
+
+
+def _groups():
+    return TournamentGroup.objects.values('id', 'name', 'updated_at')
+
+
+def _tournaments():
+    return Tournament.objects.values('id', 'name', 'gender', 'group_id', 'updated_at')
+
+
+def build_navigation_tree():
+    """
+    Дерево группа -> турниры (два запроса). Возвращает словарь:
+    groups - список групп {id, name, tournaments: [{id, name, gender_display}]},
+    updated - время последнего изменения групп и турниров (для Last-Modified)
+    """
+    return _navigation_tree(list(_groups()), _tournaments())
+
+
+async def abuild_navigation_tree():
+    """То же через асинхронный ORM: группы и турниры загружаются одновременно"""
+    async def fetch(queryset):
+        return [row async for row in queryset]
+
+    groups, tournaments = await asyncio.gather(fetch(_groups()), fetch(_tournaments()))
+    return _navigation_tree(groups, tournaments)
+
+
+def _navigation_tree(groups, tournaments):
+    genders = dict(Tournament.GENDER_CHOICES)
+    by_group = {group['id']: [] for group in groups}
+    updated = [group['updated_at'] for group in groups]
+
+    for tournament in tournaments:
+        updated.append(tournament['updated_at'])
+        if tournament['group_id'] in by_group:
+            by_group[tournament['group_id']].append({
+                'id': tournament['id'],
+                'name': tournament['name'],
+                'gender_display': genders.get(tournament['gender'], tournament['gender']),
+            })
+
+    return {
+        'groups': [
+            {'id': group['id'], 'name': group['name'], 'tournaments': by_group[group['id']]}
+            for group in groups
+        ],
+        'updated': max(updated) if updated else None,
+    }
+
+
+def navigation_tree(version=None):
+    """Дерево меню из кеша; строится заново только после изменения групп или турниров"""
+    version = version or navigation_version()
+    key = f'navigation:tree:{version}'
+    tree = cache.get(key)
+    if tree is not None:
+        metrics.cache_hit('navigation')
+        return tree
+
+    metrics.cache_miss('navigation')
+    tree = build_navigation_tree()
+    cache.set(key, tree, settings.NAVIGATION_CACHE_TIMEOUT)
+    return tree
+
+
+async def anavigation_tree(version=None):
+    version = version or await anavigation_version()
+    key = f'navigation:tree:{version}'
+    tree = await cache.aget(key)
+    if tree is not None:
+        metrics.cache_hit('navigation')
+        return tree
+
+    metrics.cache_miss('navigation')
+    tree = await abuild_navigation_tree()
+    await cache.aset(key, tree, settings.NAVIGATION_CACHE_TIMEOUT)
+    return tree
+
+
+def navigation_html(tournament=None):
+    """
+    Готовая разметка меню: для главной (tournament=None) или для страницы турнира,
+    где раскрыта его группа и выделен он сам. Кешируется отдельно для каждой страницы
+    """
+    version = navigation_version()
+    key = _html_key(version, tournament)
+    html = cache.get(key)
+    if html is None:
+        html = _render_navigation(navigation_tree(version), tournament)
+        cache.set(key, html, settings.NAVIGATION_CACHE_TIMEOUT)
+    return mark_safe(html)
+
+
+async def anavigation_html(tournament=None):
+    version = await anavigation_version()
+    key = _html_key(version, tournament)
+    html = await cache.aget(key)
+    if html is None:
+        html = _render_navigation(await anavigation_tree(version), tournament)
+        await cache.aset(key, html, settings.NAVIGATION_CACHE_TIMEOUT)
+    return mark_safe(html)
+
+
+def _html_key(version, tournament):
+    return f'navigation:html:{version}:{tournament.id if tournament else "index"}'
+
+
+def _render_navigation(tree, tournament):
+    if tournament is None:
+        html = render_to_string('tournament/navigation_index.html', {'groups': tree['groups']})
+    else:
+        html = render_to_string('tournament/navigation_tournament.html', {
+            'groups': tree['groups'],
+            'tournament': tournament,
+        })
+    return str(html)
@@ -0,0 +1,130 @@
+from django.core import signing
+from django.db import connections
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+
+def read_cursor(cursor, salt):
+    """
+    Содержимое курсора KeysetPaginator: (состояние, направление, ключ)
+    или None, если курсор поврежден или подделан
+    """
+    try:
+        data = signing.loads(cursor, salt=salt)
+        state, direction, key = data['state'], data['direction'], data['key']
+    except (signing.BadSignature, KeyError, TypeError):
+        return None
+    if not isinstance(state, dict) or direction not in ('next', 'previous') or not isinstance(key, list):
+        return None
+    return state, direction, key
+
+
+class KeysetPage:
+    """Страница keyset-пагинации: объекты и курсоры соседних страниц (None - страницы нет)"""
+
+    def __init__(self, object_list, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+class KeysetPaginator:
+    """
+    Постраничный вывод по убыванию ключа fields (последнее поле - уникальное и не NULL).
+    Следующая страница выбирается условием "ключ меньше, чем у последней строки"
+    вместо OFFSET, поэтому по индексу читается только сама страница - на любой глубине.
+    Курсор подписан и хранит вместе с позицией состояние фильтров (state)
+    """
+
+    def __init__(self, queryset, fields, per_page, salt):
+        self.queryset = queryset
+        self.fields = fields
+        self.per_page = per_page
+        self.salt = salt
+
+    # ============= КУРСОР =============
+
+    def encode(self, state, direction, obj):
+        key = []
+        for field in self.fields:
+            value = getattr(obj, field)
+            key.append(value.isoformat() if hasattr(value, 'isoformat') else value)
+        return signing.dumps({'state': state, 'direction': direction, 'key': key}, salt=self.salt)
+
+    def _key_values(self, key):
+        values = []
+        for field, value in zip(self.fields, key):
+            if value is not None and self.queryset.model._meta.get_field(field).get_internal_type() == 'DateTimeField':
+                value = parse_datetime(value)
+            values.append(value)
+        return values
+
+    # ============= УСЛОВИЕ =============
+
+    def _beyond(self, field, value, forward):
+        """
+        Строки, стоящие строго дальше value по полю field в направлении обхода.
+        Порядок NULL при сортировке зависит от БД: в PostgreSQL NULL больше
+        любого значения, в SQLite - меньше; условие повторяет порядок ORDER BY
+        той БД, в которой выполняется queryset
+        """
+        nulls_largest = connections[self.queryset.db].features.nulls_order_largest
+        if value is None:
+            # NULL стоит первым при убывании в PostgreSQL и последним в SQLite
+            if forward == nulls_largest:
+                return Q(**{f'{field}__isnull': False})
+            return None
+        condition = Q(**{f'{field}__lt' if forward else f'{field}__gt': value})
+        if forward != nulls_largest:
+            condition |= Q(**{f'{field}__isnull': True})
+        return condition
+
+    def _keyset_q(self, values, forward):
+        condition = None
+        equal = Q()
+        for field, value in zip(self.fields, values):
+            beyond = self._beyond(field, value, forward)
+            if beyond is not None:
+                condition = (equal & beyond) if condition is None else condition | (equal & beyond)
+            equal &= Q(**{f'{field}__isnull': True} if value is None else {field: value})
+        return condition if condition is not None else Q(pk__in=[])
+
+    # ============= СТРАНИЦА =============
+
+    def page(self, state, position=None):
+        """Первая страница (position=None) или страница по позиции из read_cursor"""
+        descending = [f'-{field}' for field in self.fields]
+        if position is not None and len(position[2]) != len(self.fields):
+            position = None
+
+        if position is None:
+            objects = list(self.queryset.order_by(*descending)[:self.per_page + 1])
+            more = len(objects) > self.per_page
+            objects = objects[:self.per_page]
+            has_next, has_previous = more, False
+        else:
+            _, direction, key = position
+            forward = direction == 'next'
+            queryset = self.queryset.filter(self._keyset_q(self._key_values(key), forward))
+            if forward:
+                objects = list(queryset.order_by(*descending)[:self.per_page + 1])
+                more = len(objects) > self.per_page
+                objects = objects[:self.per_page]
+                has_next, has_previous = more, True
+            else:
+                objects = list(queryset.order_by(*self.fields)[:self.per_page + 1])
+                more = len(objects) > self.per_page
+                objects = objects[:self.per_page][::-1]
+                has_next, has_previous = True, more
+
+        return KeysetPage(
+            objects,
+            self.encode(state, 'next', objects[-1]) if objects and has_next else None,
+            self.encode(state, 'previous', objects[0]) if objects and has_previous else None,
+        )
@@ -0,0 +1,169 @@
+from collections import defaultdict
+
+from django.db import transaction
+
+from .models import Match, Tournament
+
+
+# Порядок этапов плэйофф и заголовки на странице турнира
+PLAYOFF_STAGE_TITLES = (
+    ('QUARTER', '1/4 финала'),
+    ('SEMI', '1/2 финала (Полуфиналы)'),
+    ('THIRD', 'Матч за 3-е место'),
+    ('FINAL', 'Финал'),
+)
+
+# Первый раунд сетки: (этап, позиция, место команды А, место команды Б).
+# Посев такой, что 1-я и 2-я команды могут встретиться только в финале
+FIRST_ROUND = {
+    4: (
+        ('SEMI', 1, 1, 4),
+        ('SEMI', 2, 2, 3),
+    ),
+    8: (
+        ('QUARTER', 1, 1, 8),
+        ('QUARTER', 2, 4, 5),
+        ('QUARTER', 3, 2, 7),
+        ('QUARTER', 4, 3, 6),
+    ),
+}
+
+# Откуда берутся команды следующих матчей: (этап, позиция) ->
+# ((этап, позиция, исход) для команды А, то же для команды Б)
+FEEDERS = {
+    ('SEMI', 1): (('QUARTER', 1, 'winner'), ('QUARTER', 2, 'winner')),
+    ('SEMI', 2): (('QUARTER', 3, 'winner'), ('QUARTER', 4, 'winner')),
+    ('FINAL', 1): (('SEMI', 1, 'winner'), ('SEMI', 2, 'winner')),
+    ('THIRD', 1): (('SEMI', 1, 'loser'), ('SEMI', 2, 'loser')),
+}
+
+# Обратная связь: (этап, позиция) завершенного матча -> зависящие от него матчи
+DEPENDENTS = defaultdict(list)
+for _target, _feeders in FEEDERS.items():
+    for _stage, _slot, _outcome in _feeders:
+        DEPENDENTS[(_stage, _slot)].append(_target)
+
+
+def bracket_size(tournament):
+    """Количество команд в плэйофф (по умолчанию 4)"""
+    return tournament.playoff_teams or 4
+
+
+def first_round_matches(tournament, standings):
+    """
+    Несохраненные матчи первого раунда сетки по турнирной таблице.
+    standings - строки таблицы в порядке мест (с атрибутом team)
+    """
+    size = bracket_size(tournament)
+    if len(standings) < size:
+        return []
+
+    return [
+        Match(
+            tournament=tournament,
+            team_a=standings[seed_a - 1].team,
+            team_b=standings[seed_b - 1].team,
+            stage=stage,
+            bracket_slot=slot,
+            round_number=None,
+        )
+        for stage, slot, seed_a, seed_b in FIRST_ROUND[size]
+    ]
+
+
+def _outcome(match, outcome):
+    """id победителя или проигравшего завершенного матча (None - исход не определен)"""
+    if not match.is_finished or match.sets_a is None or match.sets_b is None or match.sets_a == match.sets_b:
+        return None
+    winner, loser = (match.team_a_id, match.team_b_id) if match.sets_a > match.sets_b \
+        else (match.team_b_id, match.team_a_id)
+    return winner if outcome == 'winner' else loser
+
+
+def advance_bracket(records):
+    """
+    Продвигает команды по сетке после завершения (или исправления) матчей плэйофф.
+    records - состояния MatchRecord сохраненных матчей; учитываются только
+    завершенные матчи сетки (с позицией). Создаются или обновляются только
+    зависящие от них матчи следующего раунда, когда известны обе команды
+    """
+    targets = defaultdict(set)
+    for record in records:
+        if record is None or not record.is_finished or record.bracket_slot is None:
+            continue
+        targets[record.tournament_id].update(DEPENDENTS.get((record.stage, record.bracket_slot), ()))
+
+    for tournament_id, tournament_targets in targets.items():
+        if tournament_targets:
+            _advance_tournament(tournament_id, tournament_targets)
+
+
+@transaction.atomic
+def _advance_tournament(tournament_id, targets):
+    # Продвижения сетки одного турнира идут по очереди: второй из одновременно
+    # завершенных полуфиналов ждет блокировку и видит результат первого.
+    # SQLite select_for_update не поддерживает, но и так пускает только одного писателя
+    Tournament.objects.select_for_update().filter(pk=tournament_id).first()
+
+    feeder_keys = {
+        (stage, slot)
+        for target in targets
+        for stage, slot, _ in FEEDERS[target]
+    }
+
+    # Питающие матчи и уже созданные зависимые - одним запросом
+    stages = {stage for stage, _ in feeder_keys} | {stage for stage, _ in targets}
+    existing = {
+        (match.stage, match.bracket_slot): match
+        for match in Match.objects.filter(
+            tournament_id=tournament_id, stage__in=stages, bracket_slot__isnull=False
+        ).order_by('id')
+    }
+
+    for target in sorted(targets):
+        teams = []
+        for stage, slot, outcome in FEEDERS[target]:
+            feeder = existing.get((stage, slot))
+            teams.append(_outcome(feeder, outcome) if feeder is not None else None)
+        if None in teams:
+            continue
+
+        team_a_id, team_b_id = teams
+        match = existing.get(target)
+        if match is None:
+            # Позиция в сетке уникальна (match_bracket_slot_unique): если матч успели
+            # создать параллельно, get_or_create вернет его, а не второй такой же
+            stage, slot = target
+            match, created = Match.objects.get_or_create(
+                tournament_id=tournament_id,
+                stage=stage,
+                bracket_slot=slot,
+                defaults={'team_a_id': team_a_id, 'team_b_id': team_b_id, 'round_number': None},
+            )
+            if created:
+                continue
+        if not match.is_finished and (match.team_a_id, match.team_b_id) != (team_a_id, team_b_id):
+            # Результат предыдущего раунда исправлен до начала матча - меняем участников.
+            # Сыгранный матч не трогаем: его исправляют вручную
+            match.team_a_id = team_a_id
+            match.team_b_id = team_b_id
+            match.save()
+
+
+def playoff_rounds(matches):
+    """
+    Матчи плэйофф по этапам в порядке сетки: список (заголовок этапа, матчи).
+    Матчи без позиции в сетке (созданные вручную) идут после позиций в исходном порядке
+    """
+    by_stage = defaultdict(list)
+    for match in matches:
+        if match.stage in Match.PLAYOFF_STAGES:
+            by_stage[match.stage].append(match)
+
+    result = []
+    for stage, title in PLAYOFF_STAGE_TITLES:
+        stage_matches = by_stage.get(stage)
+        if stage_matches:
+            stage_matches.sort(key=lambda match: (match.bracket_slot is None, match.bracket_slot or 0))
+            result.append((title, stage_matches))
+    return result
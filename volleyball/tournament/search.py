@@ -0,0 +1,225 @@
+import re
+
+from django.db import connections, router
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Length
+
+from .models import Team, Venue
+
+
+# Модели с поиском по названию
+SEARCH_MODELS = (Team, Venue)
+
+# Доля триграмм запроса, которая должна найтись в названии при поиске с опечаткой
+TYPO_THRESHOLD = 0.5
+# Сколько кандидатов с опечаткой рассматривать
+TYPO_CANDIDATES = 50
+
+
+def normalize(text):
+    """Текст для индекса и запроса: нижний регистр, ё -> е, одиночные пробелы"""
+    return ' '.join(text.casefold().replace('ё', 'е').split())
+
+
+def trigrams(text):
+    words = normalize(text).split()
+    return {word[i:i + 3] for word in words for i in range(len(word) - 2)}
+
+
+def similarity(term, name):
+    """Доля триграмм запроса, найденных в названии"""
+    wanted = trigrams(term)
+    if not wanted:
+        return 0
+    return len(wanted & trigrams(name)) / len(wanted)
+
+
+# Результаты проверки FTS5: (псевдоним БД, vendor) -> поддерживается ли
+_fts_support = {}
+
+
+def _fts_supported(connection):
+    """Есть ли в сборке SQLite соединения FTS5 с токенизатором trigram (SQLite 3.34+)"""
+    if connection.vendor != 'sqlite':
+        return False
+    key = (connection.alias, connection.vendor)
+    if key not in _fts_support:
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA compile_options')
+            options = {row[0] for row in cursor.fetchall()}
+        version = tuple(int(part) for part in connection.Database.sqlite_version.split('.'))
+        _fts_support[key] = 'ENABLE_FTS5' in options and version >= (3, 34)
+    return _fts_support[key]
+
+
+def backend(connection):
+    """
+    Способ поиска в БД соединения: 'fts5' (SQLite), 'trigram' (PostgreSQL + pg_trgm)
+    или None (icontains)
+    """
+    if connection.vendor == 'postgresql':
+        return 'trigram'
+    if _fts_supported(connection):
+        return 'fts5'
+    return None
+
+
+def _read_connection(model):
+    return connections[router.db_for_read(model)]
+
+
+def _write_connection(model, using=None):
+    return connections[using or router.db_for_write(model)]
+
+
+def _table(model):
+    return f'{model._meta.db_table}_search'
+
+
+# ============= ИНДЕКС (SQLite FTS5) =============
+
+def update_index(model, objects, using=None):
+    """Записывает названия объектов в индекс (после создания или изменения)"""
+    connection = _write_connection(model, using)
+    if backend(connection) != 'fts5' or not objects:
+        return
+    table = _table(model)
+    with connection.cursor() as cursor:
+        cursor.executemany(f'DELETE FROM {table} WHERE rowid = %s', [(obj.pk,) for obj in objects])
+        cursor.executemany(
+            f'INSERT INTO {table} (rowid, name) VALUES (%s, %s)',
+            [(obj.pk, normalize(obj.name)) for obj in objects],
+        )
+
+
+def remove_from_index(model, ids, using=None):
+    connection = _write_connection(model, using)
+    if backend(connection) != 'fts5' or not ids:
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(f'DELETE FROM {_table(model)} WHERE rowid = %s', [(pk,) for pk in ids])
+
+
+def rebuild_search_index(models=SEARCH_MODELS):
+    """Перестраивает индекс по данным (после bulk-операций в обход сигналов)"""
+    for model in models:
+        connection = _write_connection(model)
+        if backend(connection) != 'fts5':
+            continue
+        table = _table(model)
+        rows = model.objects.using(connection.alias).values_list('pk', 'name').iterator()
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {table}')
+            cursor.executemany(
+                f'INSERT INTO {table} (rowid, name) VALUES (%s, %s)',
+                [(pk, normalize(name)) for pk, name in rows],
+            )
+
+
+# ============= ЗАПРОСЫ =============
+
+def _like_escape(text):
+    return re.sub(r'([\\%_])', r'\\\1', text)
+
+
+def _fts_condition(term):
+    """
+    WHERE для таблицы FTS5: слова от 3 символов ищутся по триграммному индексу
+    как подстроки, более короткие - как начало слова
+    """
+    words = normalize(term).split()
+    long_words = [word for word in words if len(word) >= 3]
+    short_words = [word for word in words if len(word) < 3]
+
+    conditions = []
+    params = []
+    if long_words:
+        conditions.append('name MATCH %s')
+        params.append(' '.join('"{}"'.format(word.replace('"', '""')) for word in long_words))
+    for word in short_words:
+        conditions.append("(name LIKE %s ESCAPE '\\' OR name LIKE %s ESCAPE '\\')")
+        params.extend([f'{_like_escape(word)}%', f'% {_like_escape(word)}%'])
+    return ' AND '.join(conditions), params
+
+
+def _typo_candidates(model, term):
+    """id похожих названий (для запросов с опечаткой), по убыванию сходства"""
+    grams = trigrams(term)
+    if not grams:
+        return []
+
+    connection = _read_connection(model)
+    if backend(connection) == 'fts5':
+        query = ' OR '.join('"{}"'.format(gram.replace('"', '""')) for gram in sorted(grams))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid, name FROM {_table(model)} WHERE {_table(model)} MATCH %s '
+                f'ORDER BY rank LIMIT %s',
+                [query, TYPO_CANDIDATES],
+            )
+            rows = cursor.fetchall()
+    else:
+        from django.contrib.postgres.search import TrigramWordSimilarity
+
+        rows = model.objects.annotate(
+            similarity=TrigramWordSimilarity(term, 'name')
+        ).filter(similarity__gt=0.3).order_by('-similarity').values_list('pk', 'name')[:TYPO_CANDIDATES]
+
+    scored = [(similarity(term, name), pk) for pk, name in rows]
+    return [pk for score, pk in sorted(scored, key=lambda item: -item[0]) if score >= TYPO_THRESHOLD]
+
+
+def _search(model, term, fuzzy):
+    """
+    (id, exact): id объектов, название которых содержит все слова запроса (exact=True),
+    а если таких нет - похожих по убыванию сходства (опечатка, exact=False;
+    fuzzy=False или БД без поиска по триграммам - пустой список)
+    """
+    mode = backend(_read_connection(model))
+    if mode == 'fts5':
+        where, params = _fts_condition(term)
+        found = model.objects.all()
+        if where:
+            found = found.filter(pk__in=RawSQL(f'SELECT rowid FROM {_table(model)} WHERE {where}', params))
+    else:
+        # Слова - как введены: LIKE в SQLite не сводит регистр кириллицы, а icontains
+        # в PostgreSQL сравнивает UPPER() и без нормализации
+        found = model.objects.all()
+        for word in term.split():
+            found = found.filter(name__icontains=word)
+
+    ids = list(found.values_list('pk', flat=True))
+    if ids or mode is None or not fuzzy:
+        return ids, True
+    return _typo_candidates(model, term), False
+
+
+def matching(model, term, fuzzy=True):
+    """
+    Список id для фильтра pk__in: объекты, название которых содержит все слова
+    запроса, а если таких нет - похожие (опечатка; fuzzy=False - пустой список).
+    Пустой список - ничего не найдено
+    """
+    return _search(model, term, fuzzy)[0]
+
+
+def suggest(model, term, limit=10):
+    """Подсказки для поиска по мере ввода: [(id, название)], сначала названия с начала слова"""
+    ids, exact = _search(model, term, fuzzy=True)
+    # Короткие названия обычно ближе к запросу: кандидаты берутся с запасом и досортировываются
+    rows = list(
+        model.objects.filter(pk__in=ids).order_by(Length('name'), 'name').values_list('pk', 'name')[:limit * 5]
+    )
+
+    prefix = normalize(term)
+    if not exact:
+        order = {pk: index for index, pk in enumerate(ids)}
+        rows.sort(key=lambda row: order[row[0]])
+    else:
+        rows.sort(key=lambda row: (
+            not normalize(row[1]).startswith(prefix),
+            f' {prefix}' not in f' {normalize(row[1])}',
+            len(row[1]),
+            row[1],
+        ))
+    return rows[:limit]
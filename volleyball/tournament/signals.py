@@ -0,0 +1,315 @@
+import copy
+import threading
+
+from django.db.models import Q, QuerySet
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete, m2m_changed
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .caching import bump_tournament_versions, bump_navigation_version
+from .counters import (
+    apply_counter_changes, refresh_loaded_counters, recount_teams, apply_dashboard_changes, add_counters,
+    ready_tournament_ids, AWAITING_PLAYOFF_KEY,
+)
+from .live import publish_changes
+from .models import Match, Team, Venue, Tournament, TournamentGroup
+from .playoff import advance_bracket
+from .search import update_index, remove_from_index
+from .snapshot import MatchRecord
+from .standings import apply_match_changes
+
+
+def _loaded_record(match):
+    """Состояние матча на момент загрузки из БД (None для нового матча)"""
+    if match.pk is None:
+        return None
+
+    loaded = getattr(match, '_loaded_values', None)
+    if loaded is None or any(name not in loaded for name in MatchRecord.__slots__[1:]):
+        # Объект создан не через ORM-загрузку или с отложенными полями - читаем из БД
+        loaded = Match.objects.filter(pk=match.pk).values(*MatchRecord.__slots__[1:]).first()
+        if loaded is None:
+            return None
+
+    return MatchRecord.from_values(match.pk, loaded)
+
+
+def _tournaments_changed(tournament_ids):
+    """
+    Изменения, не отраженные в updated_at матчей (удаление матча, состав команд,
+    переименование команды или площадки): сбрасываем кеш и обновляем updated_at турниров
+    """
+    tournament_ids = {tournament_id for tournament_id in tournament_ids if tournament_id}
+    if tournament_ids:
+        Tournament.objects.filter(id__in=tournament_ids).update(updated_at=timezone.now())
+        bump_tournament_versions(tournament_ids)
+
+
+def _remember_state(match):
+    """Текущее состояние становится исходным для следующего сохранения"""
+    match._loaded_values = {
+        name: copy.deepcopy(getattr(match, name))
+        for name in MatchRecord.__slots__[1:]
+    }
+
+
+# ============= МАТЧИ =============
+
+def _result_changed(old, new):
+    """Изменились ли участники или исход матча (повод продвинуть сетку плэйофф)"""
+    if new is None or not new.is_finished:
+        return False
+    if old is None:
+        return True
+    return any(
+        getattr(old, name) != getattr(new, name)
+        for name in ('tournament_id', 'team_a_id', 'team_b_id', 'stage', 'bracket_slot',
+                     'sets_a', 'sets_b', 'is_finished')
+    )
+
+
+def process_match_changes(changes):
+    """
+    Все последствия изменения матчей: таблица, счетчики турниров и панели, updated_at турниров,
+    продвижение по сетке плэйофф, кеш страниц, трансляция зрителям.
+    changes - пары (старое, новое) состояний MatchRecord, None - матча нет.
+    Вызывается сигналами для одиночных сохранений и напрямую после
+    bulk_create/bulk_update, которые сигналов не отправляют.
+    Возвращает свежие счетчики затронутых турниров (см. refresh_loaded_counters)
+    """
+    apply_match_changes(changes)
+    fresh = apply_counter_changes(changes)
+    apply_dashboard_changes(changes)
+
+    changed = set()
+    left = set()
+    for old, new in changes:
+        if new is not None:
+            changed.add(new.tournament_id)
+        if old is not None and (new is None or old.tournament_id != new.tournament_id):
+            # Матч удален или перенесен в другой турнир - из старого он пропал
+            left.add(old.tournament_id)
+
+    bump_tournament_versions(changed - left)
+    _tournaments_changed(left)
+
+    publish_changes(changes)
+
+    advance_bracket([new for old, new in changes if _result_changed(old, new)])
+    return fresh
+
+
+@receiver(pre_save, sender=Match)
+def match_pre_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    instance._previous_record = _loaded_record(instance)
+
+
+@receiver(post_save, sender=Match)
+def match_post_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, '_previous_record', None)
+    fresh = process_match_changes([(previous, MatchRecord.from_match(instance))])
+    if Match.tournament.is_cached(instance):
+        # Вызывающий проверит готовность к плэйофф по этому объекту (check_and_generate_playoff)
+        refresh_loaded_counters(instance.tournament, fresh)
+    _remember_state(instance)
+
+
+@receiver(post_delete, sender=Match)
+def match_post_delete(sender, instance, origin=None, **kwargs):
+    if _is_cascade(origin):
+        # Матч удаляется вместе с турниром или командой: загружен коллектором удаления,
+        # исходное состояние известно без запроса. Обработка - одна на всё удаление
+        _cascade.changes.append((MatchRecord.from_match(instance), None))
+        return
+    process_match_changes([(_loaded_record(instance) or MatchRecord.from_match(instance), None)])
+
+
+# ============= КАСКАДНОЕ УДАЛЕНИЕ =============
+
+class _CascadeDelete(threading.local):
+    """
+    Матчи, удаленные каскадом (удаление турнира, группы или команды), копятся здесь
+    и обрабатываются одним пакетом в post_delete удаляемого объекта вместо
+    полной обработки на каждый матч
+    """
+
+    def __init__(self):
+        self.changes = []
+
+
+_cascade = _CascadeDelete()
+
+
+def _is_cascade(origin):
+    """Удаление начато не с матча (или запроса по матчам), а с объекта, от которого матчи зависят"""
+    if origin is None:
+        return False
+    model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    return model is not Match
+
+
+@receiver(pre_delete, sender=Tournament)
+@receiver(pre_delete, sender=TournamentGroup)
+@receiver(pre_delete, sender=Team)
+def cascade_started(sender, instance, **kwargs):
+    # Все pre_delete удаления приходят до первого post_delete: изменения, оставшиеся
+    # от прерванного ошибкой удаления, к этому не относятся
+    _cascade.changes = []
+
+
+@receiver(post_delete, sender=Tournament)
+@receiver(post_delete, sender=TournamentGroup)
+@receiver(post_delete, sender=Team)
+def cascade_finished(sender, instance, **kwargs):
+    """
+    Все последствия удаления каскадом удаленных матчей - одним пакетом. Для удаленных
+    турниров (их строки таблицы удалены каскадом, а счетчики не нужны) - только
+    счетчики панели и трансляция; для остальных (удалена команда) - полная обработка
+    """
+    changes, _cascade.changes = _cascade.changes, []
+    if not changes:
+        return
+
+    existing = set(Tournament.objects.filter(
+        id__in={old.tournament_id for old, _ in changes}
+    ).values_list('id', flat=True))
+    remaining = [(old, new) for old, new in changes if old.tournament_id in existing]
+    deleted = [(old, new) for old, new in changes if old.tournament_id not in existing]
+
+    if remaining:
+        process_match_changes(remaining)
+    if deleted:
+        apply_dashboard_changes(deleted)
+        publish_changes(deleted)
+
+
+# ============= КЕШ СТРАНИЦ =============
+
+@receiver(post_save, sender=Tournament)
+@receiver(post_delete, sender=Tournament)
+def tournament_changed(sender, instance, **kwargs):
+    bump_tournament_versions([instance.pk])
+    bump_navigation_version()
+
+
+@receiver(m2m_changed, sender=Tournament.teams.through)
+def tournament_teams_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            recount_teams([instance.pk])
+            _tournaments_changed([instance.pk])
+    elif action in ('post_add', 'post_remove'):
+        recount_teams(pk_set)
+        _tournaments_changed(pk_set)
+    elif action == 'pre_clear':
+        # team.tournaments.clear(): список турниров известен только до очистки
+        instance._cleared_tournament_ids = list(instance.tournaments.values_list('id', flat=True))
+    elif action == 'post_clear':
+        tournament_ids = getattr(instance, '_cleared_tournament_ids', [])
+        recount_teams(tournament_ids)
+        _tournaments_changed(tournament_ids)
+
+
+@receiver(post_save, sender=TournamentGroup)
+@receiver(post_delete, sender=TournamentGroup)
+def group_changed(sender, instance, **kwargs):
+    bump_navigation_version()
+
+
+def _team_tournament_ids(team):
+    ids = set(team.tournaments.values_list('id', flat=True))
+    ids.update(
+        Match.objects.filter(Q(team_a=team) | Q(team_b=team)).values_list('tournament_id', flat=True)
+    )
+    return ids
+
+
+@receiver(post_save, sender=Team)
+def team_saved(sender, instance, created=False, raw=False, **kwargs):
+    if not created and not raw:
+        _tournaments_changed(_team_tournament_ids(instance))
+
+
+@receiver(pre_delete, sender=Team)
+def team_deleted(sender, instance, **kwargs):
+    # После удаления связи уже не найти - собираем турниры заранее
+    instance._tournament_ids = _team_tournament_ids(instance)
+    _tournaments_changed(instance._tournament_ids)
+
+
+@receiver(post_delete, sender=Team)
+def team_removed(sender, instance, **kwargs):
+    # Связи с турнирами удалены каскадом, без m2m_changed
+    recount_teams(getattr(instance, '_tournament_ids', ()))
+
+
+@receiver(post_save, sender=Venue)
+@receiver(pre_delete, sender=Venue)
+def venue_changed(sender, instance, created=False, raw=False, **kwargs):
+    if not created and not raw:
+        _tournaments_changed(
+            Match.objects.filter(venue=instance).values_list('tournament_id', flat=True)
+        )
+
+
+# ============= ПОИСК =============
+
+@receiver(post_save, sender=Team)
+@receiver(post_save, sender=Venue)
+def search_index_saved(sender, instance, using=None, **kwargs):
+    update_index(sender, [instance], using)
+
+
+@receiver(post_delete, sender=Team)
+@receiver(post_delete, sender=Venue)
+def search_index_deleted(sender, instance, using=None, **kwargs):
+    remove_from_index(sender, [instance.pk], using)
+
+
+# ============= СЧЕТЧИКИ ПАНЕЛИ =============
+
+_COUNTER_KEYS = {Team: 'teams', Venue: 'venues', TournamentGroup: 'groups', Tournament: 'tournaments'}
+
+
+@receiver(post_save, sender=Team)
+@receiver(post_save, sender=Venue)
+@receiver(post_save, sender=TournamentGroup)
+@receiver(post_save, sender=Tournament)
+def counter_object_saved(sender, instance, created=False, **kwargs):
+    if created:
+        add_counters({_COUNTER_KEYS[sender]: 1})
+
+
+@receiver(post_delete, sender=Team)
+@receiver(post_delete, sender=Venue)
+@receiver(post_delete, sender=TournamentGroup)
+@receiver(post_delete, sender=Tournament)
+def counter_object_deleted(sender, instance, **kwargs):
+    add_counters({_COUNTER_KEYS[sender]: -1})
+
+
+def _was_ready(tournament):
+    return tournament.pk is not None and tournament.pk in ready_tournament_ids([tournament.pk])
+
+
+@receiver(pre_save, sender=Tournament)
+@receiver(pre_delete, sender=Tournament)
+def tournament_readiness_before(sender, instance, **kwargs):
+    # Готовность к плэйофф зависит и от настроек турнира: запоминаем ее до изменения
+    instance._was_ready = _was_ready(instance)
+
+
+@receiver(post_save, sender=Tournament)
+def tournament_readiness_saved(sender, instance, **kwargs):
+    ready = instance.pk in ready_tournament_ids([instance.pk])
+    add_counters({AWAITING_PLAYOFF_KEY: int(ready) - int(getattr(instance, '_was_ready', False))})
+
+
+@receiver(post_delete, sender=Tournament)
+def tournament_readiness_deleted(sender, instance, **kwargs):
+    if getattr(instance, '_was_ready', False):
+        add_counters({AWAITING_PLAYOFF_KEY: -1})
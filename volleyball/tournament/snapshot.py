@@ -0,0 +1,87 @@
+import asyncio
+
+from .models import Match
+
+
+class MatchRecord:
+    """Компактная запись матча для расчетов (без обращений к ORM)"""
+    __slots__ = (
+        'id', 'tournament_id', 'team_a_id', 'team_b_id', 'stage', 'round_number',
+        'sets_a', 'sets_b', 'set_scores', 'is_finished', 'bracket_slot', 'date_time',
+    )
+
+    def __init__(self, id, tournament_id, team_a_id, team_b_id, stage, round_number,
+                 sets_a, sets_b, set_scores, is_finished, bracket_slot=None, date_time=None):
+        self.id = id
+        self.tournament_id = tournament_id
+        self.team_a_id = team_a_id
+        self.team_b_id = team_b_id
+        self.stage = stage
+        self.round_number = round_number
+        self.sets_a = sets_a
+        self.sets_b = sets_b
+        self.set_scores = set_scores
+        self.is_finished = is_finished
+        self.bracket_slot = bracket_slot
+        self.date_time = date_time
+
+    @classmethod
+    def from_match(cls, match):
+        return cls(
+            match.id,
+            match.tournament_id,
+            match.team_a_id,
+            match.team_b_id,
+            match.stage,
+            match.round_number,
+            match.sets_a,
+            match.sets_b,
+            match.set_scores,
+            match.is_finished,
+            match.bracket_slot,
+            match.date_time,
+        )
+
+    @classmethod
+    def from_values(cls, match_id, values):
+        """Запись из словаря значений полей (attname -> значение)"""
+        return cls(match_id, *(values[name] for name in cls.__slots__[1:]))
+
+
+class TournamentSnapshot:
+    """
+    Снимок турнира в памяти: команды и матчи загружаются один раз,
+    после чего таблица, матрица, расписание и плэйофф считаются без запросов к БД
+    """
+
+    def __init__(self, tournament, teams, matches):
+        self.tournament = tournament
+        self.teams = list(teams)
+        # Матчи отсортированы по ('date_time', 'round_number'), как в расписании
+        self.matches = list(matches)
+        self.records = [MatchRecord.from_match(match) for match in self.matches]
+        self.teams_by_id = {team.id: team for team in self.teams}
+
+    @staticmethod
+    def _matches(tournament):
+        return Match.objects.filter(
+            tournament=tournament
+        ).select_related('team_a', 'team_b', 'venue').order_by('date_time', 'round_number')
+
+    @classmethod
+    def build(cls, tournament):
+        """Загружает команды и матчи турнира (не более двух запросов)"""
+        return cls(tournament, tournament.teams.all(), cls._matches(tournament))
+
+    @classmethod
+    async def abuild(cls, tournament):
+        """То же через асинхронный ORM: команды и матчи загружаются одновременно"""
+        async def fetch(queryset):
+            return [obj async for obj in queryset]
+
+        teams, matches = await asyncio.gather(fetch(tournament.teams.all()), fetch(cls._matches(tournament)))
+        return cls(tournament, teams, matches)
+
+    @property
+    def finished_records(self):
+        return [record for record in self.records if record.is_finished]
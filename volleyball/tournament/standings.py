@@ -0,0 +1,300 @@
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import F
+
+from .models import Match, StandingsCache, Tournament
+
+# Порядок полей статистики в кортежах вклада матча
+STAT_FIELDS = (
+    'played', 'won', 'lost', 'sets_won', 'sets_lost',
+    'points_won', 'points_lost', 'tournament_points',
+)
+
+# Соответствующие поля модели StandingsCache
+CACHE_FIELDS = (
+    'played', 'won', 'lost', 'sets_won', 'sets_lost',
+    'points_won', 'points_lost', 'points',
+)
+
+
+def tournament_points_for(sets_own, sets_other):
+    """
+    Очки турнира за матч:
+    3 за победу 3:0 или 3:1
+    2 за победу 3:2
+    1 за поражение 2:3
+    0 за остальные поражения
+    """
+    if sets_own == 3 and sets_other in (0, 1):
+        return 3
+    if sets_own == 3 and sets_other == 2:
+        return 2
+    if sets_other == 3 and sets_own == 2:
+        return 1
+    return 0
+
+
+def _side_stats(sets_own, sets_other, points_own, points_other, decided):
+    won = lost = 0
+    if decided:
+        if sets_own > sets_other:
+            won = 1
+        else:
+            lost = 1
+    return (
+        1, won, lost, sets_own or 0, sets_other or 0,
+        points_own, points_other, tournament_points_for(sets_own, sets_other),
+    )
+
+
+def match_contributions(match):
+    """
+    Вклад завершенного матча в статистику обеих команд.
+    Возвращает ((team_a_id, stats_a), (team_b_id, stats_b)),
+    где stats - кортеж значений в порядке STAT_FIELDS
+    """
+    points_a = 0
+    points_b = 0
+    if match.set_scores:
+        for set_score in match.set_scores:
+            points_a += set_score.get('a', 0)
+            points_b += set_score.get('b', 0)
+
+    # Победа/поражение учитываются, только если у обеих команд есть взятые сеты
+    decided = bool(match.sets_a and match.sets_b)
+
+    return (
+        (match.team_a_id, _side_stats(match.sets_a, match.sets_b, points_a, points_b, decided)),
+        (match.team_b_id, _side_stats(match.sets_b, match.sets_a, points_b, points_a, decided)),
+    )
+
+
+class StandingsRow:
+    """Строка турнирной таблицы"""
+    __slots__ = ('team',) + STAT_FIELDS
+
+    def __init__(self, team, played=0, won=0, lost=0, sets_won=0, sets_lost=0,
+                 points_won=0, points_lost=0, tournament_points=0):
+        self.team = team
+        self.played = played
+        self.won = won
+        self.lost = lost
+        self.sets_won = sets_won
+        self.sets_lost = sets_lost
+        self.points_won = points_won
+        self.points_lost = points_lost
+        self.tournament_points = tournament_points
+
+    def __repr__(self):
+        return f'<StandingsRow {self.team}: {self.tournament_points}>'
+
+    @property
+    def sets_diff(self):
+        return self.sets_won - self.sets_lost
+
+    @property
+    def points_diff(self):
+        return self.points_won - self.points_lost
+
+    def add(self, stats):
+        """Добавляет вклад матча (кортеж в порядке STAT_FIELDS)"""
+        (played, won, lost, sets_won, sets_lost,
+         points_won, points_lost, tournament_points) = stats
+        self.played += played
+        self.won += won
+        self.lost += lost
+        self.sets_won += sets_won
+        self.sets_lost += sets_lost
+        self.points_won += points_won
+        self.points_lost += points_lost
+        self.tournament_points += tournament_points
+
+
+def sort_standings(rows):
+    """Сортировка по очкам турнира, затем по разнице сетов, затем по выигранным сетам"""
+    rows.sort(key=lambda row: (-row.tournament_points, -row.sets_diff, -row.sets_won))
+    return rows
+
+
+def compute_standings(teams, finished_matches):
+    """
+    Считает турнирную таблицу за один проход по завершенным матчам:
+    каждый матч сразу обновляет строки обеих команд.
+    Матчи с командами не из списка teams для таких команд не учитываются.
+    """
+    rows = {team.id: StandingsRow(team) for team in teams}
+
+    for match in finished_matches:
+        for team_id, stats in match_contributions(match):
+            row = rows.get(team_id)
+            if row is not None:
+                row.add(stats)
+
+    return sort_standings(list(rows.values()))
+
+
+def accumulate_stats(matches):
+    """
+    Суммирует вклад завершенных матчей по (tournament_id, team_id).
+    Возвращает словарь со списками значений в порядке STAT_FIELDS
+    """
+    totals = defaultdict(lambda: [0] * len(STAT_FIELDS))
+    for match in matches:
+        if not match.is_finished:
+            continue
+        for team_id, stats in match_contributions(match):
+            total = totals[(match.tournament_id, team_id)]
+            for i, value in enumerate(stats):
+                total[i] += value
+    return totals
+
+
+def apply_match_changes(changes):
+    """
+    Инкрементально обновляет StandingsCache.
+    changes - пары (старое состояние, новое состояние) матча;
+    состояние - объект с полями MatchRecord или None (матч создан/удален).
+    Меняются только строки команд, участвовавших в изменившихся матчах
+    """
+    added = accumulate_stats([new for _, new in changes if new])
+    removed = accumulate_stats([old for old, _ in changes if old])
+
+    deltas = defaultdict(lambda: [0] * len(STAT_FIELDS))
+    for sign, totals in ((1, added), (-1, removed)):
+        for key, stats in totals.items():
+            delta = deltas[key]
+            for i, value in enumerate(stats):
+                delta[i] += sign * value
+
+    with transaction.atomic():
+        for (tournament_id, team_id), delta in deltas.items():
+            if not any(delta):
+                continue
+            update = {
+                field: F(field) + value
+                for field, value in zip(CACHE_FIELDS, delta) if value
+            }
+            updated = StandingsCache.objects.filter(
+                tournament_id=tournament_id, team_id=team_id
+            ).update(**update)
+            if not updated and (tournament_id, team_id) in added:
+                # Строки еще нет - создаем ее из разницы.
+                # Только вычитание (удаление матча, в т.ч. каскадное) строк не создает
+                StandingsCache.objects.create(
+                    tournament_id=tournament_id,
+                    team_id=team_id,
+                    **dict(zip(CACHE_FIELDS, delta))
+                )
+
+
+def read_standings(tournament, teams):
+    """Турнирная таблица из StandingsCache (один запрос)"""
+    teams = list(teams)
+    cached = {
+        entry['team_id']: entry
+        for entry in StandingsCache.objects.filter(
+            tournament=tournament,
+            team_id__in=[team.id for team in teams],
+        ).values('team_id', *CACHE_FIELDS)
+    }
+    return standings_from_cache(teams, cached)
+
+
+async def aread_standings_cache(tournament):
+    """
+    Записи StandingsCache турнира (асинхронный ORM): team_id -> значения.
+    Не зависит от списка команд, поэтому загружается одновременно с ними
+    """
+    return {
+        entry['team_id']: entry
+        async for entry in StandingsCache.objects.filter(tournament=tournament).values('team_id', *CACHE_FIELDS)
+    }
+
+
+def standings_from_cache(teams, cached):
+    """Таблица по командам и записям кеша (team_id -> значения); команды без записи - с нулями"""
+    rows = []
+    for team in teams:
+        entry = cached.get(team.id)
+        if entry is None:
+            rows.append(StandingsRow(team))
+        else:
+            rows.append(StandingsRow(team, *(entry[field] for field in CACHE_FIELDS)))
+
+    return sort_standings(rows)
+
+
+def read_standings_many(tournament_ids):
+    """
+    Турнирные таблицы нескольких турниров из StandingsCache (два запроса на все турниры).
+    Возвращает словарь tournament_id -> строки таблицы
+    """
+    Through = Tournament.teams.through
+    teams = defaultdict(list)
+    # Порядок команд как у tournament.teams.all(), чтобы при равенстве места совпадали с read_standings
+    links = Through.objects.filter(tournament_id__in=tournament_ids).select_related('team').order_by(
+        'team__name', 'team__gender'
+    )
+    for link in links:
+        teams[link.tournament_id].append(link.team)
+
+    cached = {
+        (entry['tournament_id'], entry['team_id']): entry
+        for entry in StandingsCache.objects.filter(
+            tournament_id__in=tournament_ids,
+        ).values('tournament_id', 'team_id', *CACHE_FIELDS)
+    }
+
+    standings = {}
+    for tournament_id in tournament_ids:
+        rows = []
+        for team in teams[tournament_id]:
+            entry = cached.get((tournament_id, team.id))
+            if entry is None:
+                rows.append(StandingsRow(team))
+            else:
+                rows.append(StandingsRow(team, *(entry[field] for field in CACHE_FIELDS)))
+        standings[tournament_id] = sort_standings(rows)
+    return standings
+
+
+def rebuild_standings_cache(tournament_ids=None, repair=True):
+    """
+    Пересчитывает таблицы по матчам и сверяет с StandingsCache.
+    Возвращает список расхождений (tournament_id, team_id, в кеше, по матчам);
+    при repair=True расхождения исправляются
+    """
+    matches = Match.objects.filter(is_finished=True).order_by()
+    cache = StandingsCache.objects.all()
+    if tournament_ids is not None:
+        matches = matches.filter(tournament_id__in=tournament_ids)
+        cache = cache.filter(tournament_id__in=tournament_ids)
+
+    expected = accumulate_stats(matches.only(
+        'id', 'tournament_id', 'team_a_id', 'team_b_id',
+        'sets_a', 'sets_b', 'set_scores', 'is_finished',
+    ))
+    actual = {
+        (entry['tournament_id'], entry['team_id']): [entry[field] for field in CACHE_FIELDS]
+        for entry in cache.values('tournament_id', 'team_id', *CACHE_FIELDS)
+    }
+
+    zero = [0] * len(STAT_FIELDS)
+    drift = []
+    for key in sorted(set(expected) | set(actual)):
+        cached = actual.get(key)
+        computed = expected.get(key, zero)
+        if cached != computed and not (cached is None and computed == zero):
+            drift.append((key[0], key[1], cached, computed))
+
+    if repair and drift:
+        with transaction.atomic():
+            for tournament_id, team_id, cached, computed in drift:
+                StandingsCache.objects.update_or_create(
+                    tournament_id=tournament_id,
+                    team_id=team_id,
+                    defaults=dict(zip(CACHE_FIELDS, computed)),
+                )
+
+    return drift
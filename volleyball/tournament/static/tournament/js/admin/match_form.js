@@ -0,0 +1,257 @@
+function updateTeams() {
+    // При выборе турнира обновляются доступные команды
+    const tournament = document.getElementById('tournament');
+    const selectedTournamentId = tournament.value;
+    const teamASelect = document.getElementById('team_a');
+    const teamBSelect = document.getElementById('team_b');
+
+    // Сохраняем текущие выбранные значения перед очисткой
+    const currentTeamAId = teamASelect.value;
+    const currentTeamBId = teamBSelect.value;
+
+    // Очищаем текущие опции команд
+    teamASelect.innerHTML = '<option value="">Выберите команду</option>';
+    teamBSelect.innerHTML = '<option value="">Выберите команду</option>';
+
+    // Если турнир не выбран, выходим
+    if (!selectedTournamentId) {
+        return;
+    }
+
+    // Находим турнир в скрытом контейнере
+    const tournamentsData = document.getElementById('tournaments-data');
+    if (!tournamentsData) {
+        console.warn('tournaments-data контейнер не найден');
+        return;
+    }
+
+    const tournamentDiv = tournamentsData.querySelector(`[data-tournament-id="${selectedTournamentId}"]`);
+
+    if (!tournamentDiv) {
+        console.warn(`Турнир с ID ${selectedTournamentId} не найден в контейнере`);
+        return;
+    }
+
+    // Получаем все команды этого турнира
+    const teams = tournamentDiv.querySelectorAll('.team');
+
+    if (teams.length === 0) {
+        console.warn(`Команды для турнира ${selectedTournamentId} не найдены`);
+        return;
+    }
+
+    // Добавляем команды в оба селекта
+    teams.forEach(teamElement => {
+        const teamId = teamElement.getAttribute('data-team-id');
+        const teamName = teamElement.getAttribute('data-team-name');
+        const teamGender = teamElement.getAttribute('data-team-gender');
+
+        const optionA = document.createElement('option');
+        optionA.value = teamId;
+        optionA.textContent = `${teamName} (${teamGender})`;
+        teamASelect.appendChild(optionA);
+
+        const optionB = document.createElement('option');
+        optionB.value = teamId;
+        optionB.textContent = `${teamName} (${teamGender})`;
+        teamBSelect.appendChild(optionB);
+    });
+
+    // Восстанавливаем выбранные значения если редактируем матч
+    const matchElement = document.getElementById('match-data');
+    if (matchElement && matchElement.dataset.matchTeamAId) {
+        teamASelect.value = matchElement.dataset.matchTeamAId;
+    } else if (currentTeamAId) {
+        teamASelect.value = currentTeamAId;
+    }
+
+    if (matchElement && matchElement.dataset.matchTeamBId) {
+        teamBSelect.value = matchElement.dataset.matchTeamBId;
+    } else if (currentTeamBId) {
+        teamBSelect.value = currentTeamBId;
+    }
+}
+
+function initializeTeamsWithRetry(attempts = 0, maxAttempts = 10) {
+    // Пытаемся загрузить команды с повторными попытками
+    const tournamentsData = document.getElementById('tournaments-data');
+
+    if (!tournamentsData) {
+        if (attempts < maxAttempts) {
+            // Если контейнер еще не готов, повторим через 50ms
+            setTimeout(() => initializeTeamsWithRetry(attempts + 1, maxAttempts), 50);
+        }
+        return;
+    }
+
+    // Контейнер найден, пытаемся загрузить команды
+    updateTeams();
+}
+
+function toggleScoreFields() {
+    const isFinished = document.getElementById('is_finished').checked;
+    document.getElementById('score_fields').style.display = isFinished ? 'block' : 'none';
+    if (!isFinished) {
+        // Очищаем все поля партий при отмене
+        document.querySelectorAll('.set-input').forEach(input => input.value = '');
+        document.getElementById('sets_a').value = '';
+        document.getElementById('sets_b').value = '';
+    }
+}
+
+function toggleRoundNumber() {
+    // Показываем номер тура только для регулярных туров
+    const stage = document.getElementById('stage').value;
+    const roundGroup = document.getElementById('round_number_group');
+    roundGroup.style.display = stage === 'REGULAR' ? 'block' : 'none';
+}
+
+function validateSetScore(setNum, teamA, teamB) {
+    // Валидирует счет партии согласно волейбольным правилам
+    const isLastSet = setNum === 5;
+    const maxPoints = isLastSet ? 15 : 25;
+    const minDiff = 2;
+
+    // Если одна из команд меньше maxPoints - не валидно
+    if (teamA < maxPoints && teamB < maxPoints) {
+        return false; // Еще не завершена
+    }
+
+    // Если обе команды >= maxPoints, проверяем разницу
+    if (teamA >= maxPoints && teamB >= maxPoints) {
+        if (Math.abs(teamA - teamB) < minDiff) {
+            return false; // Разница менее 2
+        }
+    }
+
+    return true; // Валидно
+}
+
+function calculateSetWinner(setNum, teamA, teamB) {
+    if (!validateSetScore(setNum, teamA, teamB)) {
+        return null; // Не завершена
+    }
+    return teamA > teamB ? 'a' : 'b';
+}
+
+function updateScores() {
+    // Обновляем автоматически при изменении любого поля партии
+    const setInputs = document.querySelectorAll('.set-input');
+    let setsWonA = 0;
+    let setsWonB = 0;
+    let allValid = true;
+
+    // Проходим по всем партиям
+    for (let i = 1; i <= 5; i++) {
+        const inputA = document.querySelector(`.set-a[data-set="${i}"]`);
+        const inputB = document.querySelector(`.set-b[data-set="${i}"]`);
+        const statusDiv = document.querySelector(`.set-group:nth-child(${i}) .set-status`);
+
+        const scoreA = parseInt(inputA.value) || 0;
+        const scoreB = parseInt(inputB.value) || 0;
+
+        if (scoreA === 0 && scoreB === 0) {
+            statusDiv.textContent = '';
+            allValid = false;
+            continue;
+        }
+
+        const isValid = validateSetScore(i, scoreA, scoreB);
+        const winner = calculateSetWinner(i, scoreA, scoreB);
+
+        if (winner === 'a') {
+            setsWonA++;
+            statusDiv.textContent = '✓ Команда А';
+            statusDiv.style.color = '#155724';
+        } else if (winner === 'b') {
+            setsWonB++;
+            statusDiv.textContent = '✓ Команда Б';
+            statusDiv.style.color = '#155724';
+        } else if (!isValid && (scoreA > 0 || scoreB > 0)) {
+            statusDiv.textContent = 'Невалидный счет';
+            statusDiv.style.color = '#721c24';
+            allValid = false;
+        }
+
+        // Если одна из команд получила 3 побед, остальные поля скрываем
+        if (setsWonA >= 3 || setsWonB >= 3) {
+            for (let j = i + 1; j <= 5; j++) {
+                const nextA = document.querySelector(`.set-a[data-set="${j}"]`);
+                const nextB = document.querySelector(`.set-b[data-set="${j}"]`);
+                nextA.disabled = true;
+                nextB.disabled = true;
+                nextA.style.opacity = '0.5';
+                nextB.style.opacity = '0.5';
+            }
+            break;
+        }
+    }
+
+    // Включаем оставшиеся поля если они были отключены
+    if (setsWonA < 3 && setsWonB < 3) {
+        for (let j = 1; j <= 5; j++) {
+            const nextA = document.querySelector(`.set-a[data-set="${j}"]`);
+            const nextB = document.querySelector(`.set-b[data-set="${j}"]`);
+            nextA.disabled = false;
+            nextA.style.opacity = '1';
+            nextB.disabled = false;
+            nextB.style.opacity = '1';
+        }
+    }
+
+    // Обновляем итоговый счет в партиях
+    document.getElementById('sets_a').value = setsWonA;
+    document.getElementById('sets_b').value = setsWonB;
+}
+
+// Инициализация
+document.addEventListener('DOMContentLoaded', function() {
+    // Загружаем set_scores если редактируем существующий матч
+    const matchDataElement = document.getElementById('match-data');
+    if (matchDataElement) {
+        try {
+            const setScoresJSON = matchDataElement.getAttribute('data-set-scores');
+            const setScores = JSON.parse(setScoresJSON);
+
+            if (setScores && Array.isArray(setScores) && setScores.length > 0) {
+                // Заполняем поля партий загруженными значениями
+                setScores.forEach((set, index) => {
+                    const setNum = index + 1;
+                    const inputA = document.querySelector(`.set-a[data-set="${setNum}"]`);
+                    const inputB = document.querySelector(`.set-b[data-set="${setNum}"]`);
+
+                    if (inputA && set.a !== undefined) inputA.value = set.a;
+                    if (inputB && set.b !== undefined) inputB.value = set.b;
+                });
+            }
+        } catch (e) {
+            console.error('Ошибка при загрузке set_scores:', e);
+        }
+    }
+
+    // Скрываем/показываем номер тура в зависимости от этапа
+    const stageSelect = document.getElementById('stage');
+    if (stageSelect) {
+        stageSelect.addEventListener('change', toggleRoundNumber);
+        toggleRoundNumber(); // Инициальное состояние
+    }
+
+    // Добавляем слушатель на выбор турнира
+    const tournamentSelect = document.getElementById('tournament');
+    if (tournamentSelect) {
+        tournamentSelect.addEventListener('change', updateTeams);
+        // Инициализируем команды с повторными попытками (для надежности на сервере)
+        initializeTeamsWithRetry();
+    }
+
+    // Добавляем слушатели на все поля партий
+    document.querySelectorAll('.set-input').forEach(input => {
+        input.addEventListener('change', updateScores);
+        input.addEventListener('keyup', updateScores);
+    });
+
+    // Инициальный расчет, если редактируем существующий матч
+    if (document.getElementById('is_finished').checked) {
+        updateScores();
+    }
+});
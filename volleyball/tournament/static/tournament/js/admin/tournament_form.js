@@ -0,0 +1,4 @@
+// Показать/скрыть опции плейофф
+document.getElementById('has_playoff').addEventListener('change', function() {
+    document.getElementById('playoff_options').style.display = this.checked ? 'block' : 'none';
+});
@@ -0,0 +1,6 @@
+// Клик по строке таблицы
+document.querySelectorAll('.clickable-row').forEach(row => {
+    row.addEventListener('click', function() {
+        window.location.href = this.dataset.href;
+    });
+});
@@ -0,0 +1,36 @@
+document.querySelectorAll('.clickable-row').forEach(row => {
+    row.addEventListener('click', function() {
+        window.location.href = this.dataset.href;
+    });
+});
+
+// Подсказки в поле поиска по мере ввода
+document.querySelectorAll('input[data-suggest-url]').forEach(input => {
+    let timer = null;
+    let controller = null;
+    input.addEventListener('input', function() {
+        clearTimeout(timer);
+        const term = this.value.trim();
+        const list = document.getElementById(this.getAttribute('list'));
+        if (term.length < 2) {
+            list.innerHTML = '';
+            return;
+        }
+        timer = setTimeout(() => {
+            if (controller) controller.abort();
+            controller = new AbortController();
+            const url = this.dataset.suggestUrl + (this.dataset.suggestUrl.includes('?') ? '&' : '?') + 'q=' + encodeURIComponent(term);
+            fetch(url, {signal: controller.signal})
+                .then(response => response.json())
+                .then(data => {
+                    list.innerHTML = '';
+                    data.results.forEach(item => {
+                        const option = document.createElement('option');
+                        option.value = item.name;
+                        list.appendChild(option);
+                    });
+                })
+                .catch(() => {});
+        }, 200);
+    });
+});
@@ -0,0 +1,29 @@
+const burgerBtn = document.getElementById('burgerBtn');
+const navOverlay = document.getElementById('navOverlay');
+const navClose = document.getElementById('navClose');
+const overlayBackdrop = document.getElementById('overlayBackdrop');
+
+function openNav() {
+    navOverlay.classList.add('active');
+    overlayBackdrop.classList.add('active');
+}
+
+function closeNav() {
+    navOverlay.classList.remove('active');
+    overlayBackdrop.classList.remove('active');
+}
+
+burgerBtn.addEventListener('click', openNav);
+navClose.addEventListener('click', closeNav);
+overlayBackdrop.addEventListener('click', closeNav);
+
+// Toggle tournament groups
+document.addEventListener('click', function(e) {
+    if (e.target.closest('.group-header')) {
+        const header = e.target.closest('.group-header');
+        const list = header.nextElementSibling;
+
+        header.classList.toggle('active');
+        list.classList.toggle('active');
+    }
+});
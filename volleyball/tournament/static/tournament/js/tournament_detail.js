@@ -0,0 +1,116 @@
+// Group toggle function
+function toggleGroup(header) {
+    const list = header.nextElementSibling;
+    const isActive = list.classList.contains('active');
+
+    // Close all other lists
+    document.querySelectorAll('.tournaments-list').forEach(l => l.classList.remove('active'));
+    document.querySelectorAll('.group-header').forEach(h => h.classList.remove('active'));
+
+    // Toggle current
+    if (!isActive) {
+        list.classList.add('active');
+        header.classList.add('active');
+    }
+}
+
+// Tab switching
+document.querySelectorAll('.tab-btn').forEach(btn => {
+    btn.addEventListener('click', function() {
+        const tabId = this.dataset.tab;
+
+        // Remove active class from all tabs and contents
+        document.querySelectorAll('.tab-btn').forEach(b => b.classList.remove('active'));
+        document.querySelectorAll('.tab-content').forEach(c => c.classList.remove('active'));
+
+        // Add active class to clicked tab and corresponding content
+        this.classList.add('active');
+        document.getElementById(tabId).classList.add('active');
+    });
+});
+
+// Live results: the server sends only what changed (see tournament/live.py).
+// Returns true when the page has to be reloaded instead.
+function applyDelta(delta) {
+    if (delta.reload) {
+        return true;
+    }
+    let reload = false;
+
+    delta.matches.forEach(([id, finished, sets, full]) => {
+        const card = document.querySelector(`.match-card[data-match="${id}"]`);
+        if (!card) {
+            reload = true;
+            return;
+        }
+        card.querySelector('.match-score').textContent = card.dataset.score === 'sets' ? sets : full;
+    });
+
+    if (delta.standings) {
+        const body = document.querySelector('.standings-table tbody');
+        delta.standings.rows.forEach(([team, ...values]) => {
+            const row = body.querySelector(`tr[data-team="${team}"]`);
+            if (!row) {
+                reload = true;
+                return;
+            }
+            const cells = row.querySelectorAll('td');
+            values.forEach((value, index) => {
+                cells[index + 2].textContent = value;
+            });
+            cells[7].innerHTML = `<strong>${values[5]}</strong>`;
+        });
+        delta.standings.order.forEach((team, index) => {
+            const row = body.querySelector(`tr[data-team="${team}"]`);
+            if (row) {
+                row.querySelector('td').textContent = index + 1;
+                body.appendChild(row);
+            }
+        });
+    }
+
+    delta.cells.forEach(([circle, team, column, score]) => {
+        const cell = document.querySelector(`#matrix${circle} tr[data-team="${team}"] td[data-col="${column}"]`);
+        if (!cell) {
+            reload = true;
+            return;
+        }
+        cell.textContent = score;
+    });
+
+    // A new match or circle appeared: fetch the whole page
+    return reload;
+}
+
+const live = document.currentScript.dataset;
+if (live.eventsUrl && window.EventSource) {
+    // Server-Sent Events (ASGI deployments only)
+    const source = new EventSource(live.eventsUrl);
+    source.addEventListener('delta', function(event) {
+        if (applyDelta(JSON.parse(event.data))) {
+            source.close();
+            location.reload();
+        }
+    });
+} else if (live.pollUrl) {
+    // Polling: one short request per interval, no connection held open
+    const interval = Number(live.pollInterval) || 10000;
+    let last = null;
+    const poll = function() {
+        const url = last === null ? live.pollUrl : `${live.pollUrl}?after=${last}`;
+        fetch(url, {headers: {'Accept': 'application/json'}})
+            .then(response => response.ok ? response.json() : Promise.reject(response.status))
+            .then(data => {
+                if (data.delta && applyDelta(data.delta)) {
+                    location.reload();
+                    return;
+                }
+                if (data.last !== null) {
+                    last = data.last;
+                }
+                setTimeout(poll, interval);
+            })
+            .catch(() => setTimeout(poll, interval));
+    };
+    poll();
+}
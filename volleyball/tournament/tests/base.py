@@ -0,0 +1,43 @@
+from django.test import TestCase
+
+from ..models import Match, Team, Tournament, TournamentGroup
+
+
+# Страницы рендерятся без собранной статики (манифест ManifestStaticFilesStorage
+# появляется только после collectstatic) и без общего файлового кеша
+TEST_SETTINGS = {
+    'STORAGES': {
+        'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+        'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+    },
+    'CACHES': {
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    },
+}
+
+
+def sets(*scores):
+    """Счет по сетам: sets((25, 20), (20, 25)) -> [{'a': 25, 'b': 20}, {'a': 20, 'b': 25}]"""
+    return [{'a': a, 'b': b} for a, b in scores]
+
+
+class TournamentTestCase(TestCase):
+    """Турнир из четырех команд без матчей"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.group = TournamentGroup.objects.create(name='Сезон 2024')
+        cls.tournament = Tournament.objects.create(name='Лига', group=cls.group, gender='M')
+        cls.teams = [Team.objects.create(name=f'Команда {number}', gender='M') for number in range(1, 5)]
+        cls.tournament.teams.add(*cls.teams)
+
+    def create_match(self, team_a, team_b, stage='REGULAR', **fields):
+        return Match.objects.create(
+            tournament=self.tournament, team_a=team_a, team_b=team_b, stage=stage, **fields
+        )
+
+    def finish(self, match, sets_a, sets_b, set_scores=None):
+        match.sets_a, match.sets_b, match.is_finished = sets_a, sets_b, True
+        match.set_scores = set_scores or []
+        match.save()
+        return match
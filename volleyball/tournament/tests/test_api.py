@@ -0,0 +1,62 @@
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import reverse
+
+from .base import TEST_SETTINGS, TournamentTestCase, sets
+
+
+@override_settings(**TEST_SETTINGS)
+class ApiTests(TournamentTestCase):
+
+    def setUp(self):
+        cache.clear()
+        a, b, c, d = self.teams
+        self.finish(self.create_match(a, b, round_number=1), 3, 1, sets((25, 20), (20, 25), (25, 18), (25, 22)))
+        self.create_match(c, d, round_number=1)
+
+    def get(self, name, tournament_id=None, **params):
+        return self.client.get(reverse(f'tournament:{name}', args=[tournament_id or self.tournament.id]), params)
+
+    def test_standings(self):
+        response = self.get('api_standings', fields='position,team,tournament_points')
+        self.assertEqual(response.status_code, 200)
+        first = response.json()['standings'][0]
+        self.assertEqual(first, {
+            'position': 1, 'team': {'id': self.teams[0].id, 'name': 'Команда 1'}, 'tournament_points': 3,
+        })
+
+    def test_matrix(self):
+        data = self.get('api_matrix', circle=1).json()
+        self.assertEqual([team['id'] for team in data['teams']], [team.id for team in self.teams])
+        [circle] = data['circles']
+        self.assertIsNone(circle['rows'][0][0])
+        self.assertEqual((circle['rows'][0][1], circle['rows'][1][0]), ('3:1', '1:3'))
+
+    def test_schedule(self):
+        [round_one] = self.get('api_schedule', fields='id,sets_a,sets_b').json()['schedule']
+        self.assertEqual(round_one['title'], 'Тур 1')
+        scores = {(match['sets_a'], match['sets_b']) for match in round_one['matches']}
+        self.assertEqual(scores, {(3, 1), (None, None)})
+        self.assertEqual(set(round_one['matches'][0]), {'id', 'sets_a', 'sets_b'})
+
+    def test_success_is_public(self):
+        response = self.get('api_standings')
+        self.assertIn('public', response['Cache-Control'])
+        self.assertTrue(response.has_header('ETag'))
+
+        response = self.client.get(response.request['PATH_INFO'], HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_errors_are_not_cached(self):
+        for response in (
+            self.get('api_standings', fields='team,unknown'),
+            self.get('api_matrix', circle='x'),
+            self.get('api_matrix', circle=9),
+            self.get('api_playoff', tournament_id=self.tournament.id + 100),
+        ):
+            with self.subTest(url=response.request['PATH_INFO']):
+                self.assertIn(response.status_code, (400, 404))
+                self.assertIn('error', response.json())
+                self.assertNotIn('public', response.get('Cache-Control', ''))
+                self.assertFalse(response.has_header('ETag'))
+                self.assertFalse(response.has_header('Last-Modified'))
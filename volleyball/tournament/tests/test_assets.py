@@ -0,0 +1,65 @@
+import gzip
+import tempfile
+from io import StringIO
+from pathlib import Path
+
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+from django.utils.http import http_date
+
+from ..assets import hashed_names
+
+
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'tournament.assets.CompressedManifestStaticFilesStorage'},
+}
+
+
+class StaticAssetsTests(SimpleTestCase):
+    """collectstatic со сжатыми вариантами и их отдача через static_asset"""
+
+    def setUp(self):
+        root = self.enterContext(tempfile.TemporaryDirectory())
+        self.enterContext(override_settings(STATIC_ROOT=root, STORAGES=STORAGES))
+        self.root = Path(root)
+        call_command('collectstatic', interactive=False, verbosity=0, stdout=StringIO())
+        hashed_names.cache_clear()
+        self.addCleanup(hashed_names.cache_clear)
+        self.css = staticfiles_storage.stored_name('tournament/css/base.css')
+
+    def test_collectstatic_writes_variants(self):
+        self.assertNotEqual(self.css, 'tournament/css/base.css')
+        path = self.root / self.css
+        self.assertEqual(gzip.decompress(Path(f'{path}.gz').read_bytes()), path.read_bytes())
+        # Файлы без хеша в имени не сжимаются заранее
+        self.assertFalse((self.root / 'tournament/css/base.css.gz').exists())
+
+    def test_hashed_file_is_immutable(self):
+        response = self.client.get(f'/static/{self.css}', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Content-Type'], 'text/css')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(gzip.decompress(b''.join(response.streaming_content)), (self.root / self.css).read_bytes())
+
+    def test_plain_file_is_revalidated(self):
+        response = self.client.get('/static/tournament/css/base.css', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(response['Cache-Control'], 'public, no-cache')
+        response.close()
+
+    def test_not_modified(self):
+        mtime = (self.root / self.css).stat().st_mtime
+        response = self.client.get(f'/static/{self.css}', HTTP_IF_MODIFIED_SINCE=http_date(mtime + 1))
+        self.assertEqual(response.status_code, 304)
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+    def test_missing_and_outside(self):
+        self.assertEqual(self.client.get('/static/tournament/css/missing.css').status_code, 404)
+        self.assertEqual(self.client.get('/static/../manage.py').status_code, 404)
+        self.assertEqual(self.client.post(f'/static/{self.css}').status_code, 405)
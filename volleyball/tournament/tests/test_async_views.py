@@ -0,0 +1,45 @@
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.http import Http404
+from django.test import RequestFactory, override_settings
+
+from .. import views
+from .base import TEST_SETTINGS, TournamentTestCase, sets
+
+
+@override_settings(**TEST_SETTINGS)
+class AsyncViewsTests(TournamentTestCase):
+    """Асинхронные варианты страниц отдают то же, что синхронные"""
+
+    def setUp(self):
+        cache.clear()
+        a, b, c, d = self.teams
+        self.finish(self.create_match(a, b, round_number=1), 3, 1, sets((25, 20), (20, 25), (25, 18), (25, 22)))
+        self.create_match(c, d, round_number=1)
+        self.factory = RequestFactory()
+
+    async def test_tournament_page(self):
+        expected = await sync_to_async(views.tournament_detail)(self.factory.get('/'), self.tournament.id)
+        await cache.aclear()
+
+        response = await views.atournament_detail(self.factory.get('/'), self.tournament.id)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, expected.content)
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+        response = await views.atournament_detail(
+            self.factory.get('/', HTTP_IF_NONE_MATCH=response['ETag']), self.tournament.id
+        )
+        self.assertEqual(response.status_code, 304)
+
+    async def test_index(self):
+        expected = await sync_to_async(views.index)(self.factory.get('/'))
+        await cache.aclear()
+
+        response = await views.aindex(self.factory.get('/'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, expected.content)
+
+    async def test_missing_tournament(self):
+        with self.assertRaises(Http404):
+            await views.atournament_detail(self.factory.get('/'), self.tournament.id + 100)
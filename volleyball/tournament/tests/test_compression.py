@@ -0,0 +1,55 @@
+import gzip
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+
+from ..compression import brotli, compressed_variants, negotiate
+from .base import TEST_SETTINGS, TournamentTestCase
+
+
+class NegotiateTests(SimpleTestCase):
+
+    def test_preference(self):
+        self.assertEqual(negotiate('gzip, deflate, br', {'gzip', 'br'}), 'br')
+        self.assertEqual(negotiate('gzip, deflate, br', {'gzip'}), 'gzip')
+        self.assertEqual(negotiate('', {'gzip', 'br'}), 'identity')
+
+    def test_quality(self):
+        self.assertEqual(negotiate('br;q=0, gzip;q=0.5', {'gzip', 'br'}), 'gzip')
+        self.assertEqual(negotiate('gzip;q=0', {'gzip'}), 'identity')
+        self.assertEqual(negotiate('gzip;q=abc', {'gzip'}), 'identity')
+
+    def test_wildcard(self):
+        self.assertEqual(negotiate('*', {'gzip'}), 'gzip')
+        self.assertEqual(negotiate('*;q=0, gzip', {'gzip', 'br'}), 'gzip')
+        self.assertEqual(negotiate('GZIP', {'gzip'}), 'gzip')
+
+    def test_variants(self):
+        data = 'Турнирная таблица '.encode() * 100
+        variants = compressed_variants(data)
+        self.assertEqual(gzip.decompress(variants['gzip']), data)
+        # Одинаковое содержимое - одинаковые байты
+        self.assertEqual(compressed_variants(data)['gzip'], variants['gzip'])
+        if brotli is not None:
+            self.assertEqual(brotli.decompress(variants['br']), data)
+        # Сжатие, которое не уменьшает данные, не хранится
+        self.assertEqual(compressed_variants(b'x'), {})
+
+
+@override_settings(**TEST_SETTINGS)
+class CompressedPageTests(TournamentTestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.url = reverse('tournament:tournament_detail', args=[self.tournament.id])
+
+    def test_encodings(self):
+        plain = self.client.get(self.url)
+        self.assertFalse(plain.has_header('Content-Encoding'))
+
+        compressed = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(compressed['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(compressed.content), plain.content)
+        self.assertEqual(compressed['ETag'], plain['ETag'])
+        self.assertIn('Accept-Encoding', compressed['Vary'])
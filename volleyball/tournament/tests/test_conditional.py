@@ -0,0 +1,85 @@
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import reverse
+
+from ..models import TournamentGroup
+from .base import TEST_SETTINGS, TournamentTestCase
+
+
+@override_settings(**TEST_SETTINGS)
+class ConditionalRequestTests(TournamentTestCase):
+
+    def setUp(self):
+        cache.clear()
+        a, b, c, d = self.teams
+        self.match_ab = self.create_match(a, b)
+        self.url = reverse('tournament:tournament_detail', args=[self.tournament.id])
+
+    def test_not_modified(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+    def test_not_modified_varies_like_page(self):
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+    def test_cached_page_runs_no_sql(self):
+        etag = self.client.get(self.url)['ETag']
+
+        # ETag и Last-Modified берутся из записи кеша страницы
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['ETag'], etag)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_changed_after_result(self):
+        etag = self.client.get(self.url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.finish(self.match_ab, 3, 0)
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertContains(response, '3:0')
+
+    def test_missing_tournament(self):
+        url = reverse('tournament:tournament_detail', args=[self.tournament.id + 100])
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+
+@override_settings(**TEST_SETTINGS)
+class IndexConditionalTests(TournamentTestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.url = reverse('tournament:index')
+
+    def test_not_modified_until_navigation_changes(self):
+        response = self.client.get(self.url)
+        self.assertTrue(response.has_header('Last-Modified'))
+        etag = response['ETag']
+
+        # Состояние главной - из кеша меню, без запросов
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            TournamentGroup.objects.create(name='Сезон 2025')
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Сезон 2025')
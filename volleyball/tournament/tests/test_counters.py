@@ -0,0 +1,121 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from ..counters import claim_playoff, dashboard_counters, rebuild_dashboard_counters
+from ..models import Match, Team, Tournament, TournamentGroup, Venue
+from ..views import check_and_generate_playoff
+from .base import TEST_SETTINGS, TournamentTestCase
+from .test_generate_playoff import awaiting_playoff
+
+
+class ClaimPlayoffTests(TestCase):
+    """Готовность к плэйофф: проверка по загруженным счетчикам и условный UPDATE"""
+
+    @classmethod
+    def setUpTestData(cls):
+        group = TournamentGroup.objects.create(name='Сезон 2024')
+        cls.teams = [Team.objects.create(name=f'Команда {number}', gender='M') for number in range(1, 5)]
+        cls.tournament = Tournament.objects.create(
+            name='Лига', group=group, gender='M', has_playoff=True, playoff_teams=4
+        )
+        cls.tournament.teams.add(*cls.teams)
+        cls.pairs = [
+            (team_a, team_b) for i, team_a in enumerate(cls.teams) for team_b in cls.teams[i + 1:]
+        ]
+
+    def play(self, tournament, pairs):
+        """Сохраняет сыгранные матчи с уже загруженным объектом турнира (как админка)"""
+        for team_a, team_b in pairs:
+            match = Match.objects.create(
+                tournament=tournament, team_a=team_a, team_b=team_b, stage='REGULAR',
+                sets_a=3, sets_b=0, is_finished=True,
+            )
+        return match
+
+    def semifinals(self):
+        return Match.objects.filter(tournament=self.tournament, stage='SEMI').count()
+
+    def test_not_ready_costs_no_queries(self):
+        tournament = Tournament.objects.get(pk=self.tournament.pk)
+        match = self.play(tournament, self.pairs[:3])
+        self.assertEqual(match.tournament.finished_league_matches, 3)
+        with self.assertNumQueries(0):
+            self.assertFalse(check_and_generate_playoff(match.tournament))
+            self.assertFalse(claim_playoff(match.tournament))
+        self.assertEqual(awaiting_playoff(), 0)
+
+    def test_last_match_generates_playoff(self):
+        # Объект турнира загружен до всех сохранений: счетчики в него переносят сигналы
+        tournament = Tournament.objects.get(pk=self.tournament.pk)
+        match = self.play(tournament, self.pairs)
+        self.assertEqual(awaiting_playoff(), 1)
+
+        self.assertTrue(check_and_generate_playoff(match.tournament))
+        self.assertEqual(self.semifinals(), 2)
+        self.assertEqual(awaiting_playoff(), 0)
+
+    def test_only_one_claim_wins(self):
+        self.play(self.tournament, self.pairs)
+        # Два запроса загрузили готовый турнир одновременно
+        first = Tournament.objects.get(pk=self.tournament.pk)
+        second = Tournament.objects.get(pk=self.tournament.pk)
+
+        self.assertTrue(claim_playoff(first))
+        self.assertFalse(claim_playoff(second))
+        self.assertFalse(check_and_generate_playoff(second))
+        self.assertEqual(self.semifinals(), 0)
+        self.assertEqual(awaiting_playoff(), 0)
+
+
+@override_settings(**TEST_SETTINGS)
+class DashboardCountersTests(TournamentTestCase):
+    """Счетчики панели ведутся по изменениям и совпадают с полным пересчетом"""
+
+    def assert_matches_rebuild(self):
+        incremental = dashboard_counters()
+        rebuild_dashboard_counters()
+        self.assertEqual(incremental, dashboard_counters())
+        return incremental
+
+    def test_follows_changes(self):
+        a, b, c, d = self.teams
+        now = timezone.now()
+        this_week = self.create_match(a, b, date_time=now)
+        self.create_match(c, d, date_time=now - timedelta(days=14))
+        moved = self.create_match(a, c)
+        self.finish(this_week, 3, 1)
+        Venue.objects.create(name='Олимп')
+
+        counters = self.assert_matches_rebuild()
+        self.assertEqual(counters['teams_count'], 4)
+        self.assertEqual(counters['venues_count'], 1)
+        self.assertEqual(counters['matches_count'], 3)
+        self.assertEqual(counters['finished_matches_count'], 1)
+        self.assertEqual(counters['pending_matches_count'], 2)
+        self.assertEqual(counters['week_matches_count'], 1)
+
+        moved.date_time = now
+        moved.save()
+        this_week.delete()
+        counters = self.assert_matches_rebuild()
+        self.assertEqual((counters['matches_count'], counters['finished_matches_count']), (2, 0))
+        self.assertEqual(counters['week_matches_count'], 1)
+
+        # Каскадное удаление турнира с матчами
+        self.tournament.delete()
+        counters = self.assert_matches_rebuild()
+        self.assertEqual((counters['tournaments_count'], counters['matches_count']), (0, 0))
+
+    def test_dashboard_page(self):
+        self.finish(self.create_match(*self.teams[:2]), 3, 0)
+        user = User.objects.create_user('admin', password='admin', is_staff=True)
+        self.client.force_login(user)
+
+        response = self.client.get(reverse('tournament:admin_dashboard'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['teams_count'], 4)
+        self.assertEqual(response.context['finished_matches_count'], 1)
@@ -0,0 +1,66 @@
+import gzip
+import tempfile
+from io import StringIO
+from pathlib import Path
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import override_settings
+
+from ..management.commands.export_static import page_path
+from .base import TEST_SETTINGS, TournamentTestCase
+
+
+@override_settings(**TEST_SETTINGS)
+class ExportStaticTests(TournamentTestCase):
+    """Выгрузка страниц в файлы: полная и только изменившихся"""
+
+    def setUp(self):
+        cache.clear()
+        self.output = Path(self.enterContext(tempfile.TemporaryDirectory()))
+        self.match = self.create_match(*self.teams[:2], round_number=1)
+
+    def export(self, *args):
+        output = StringIO()
+        call_command('export_static', '--output', str(self.output), '--workers', '1', *args, stdout=output)
+        return output.getvalue()
+
+    def page(self, tournament_id=None):
+        return self.output / page_path(tournament_id)
+
+    def test_full_export(self):
+        output = self.export()
+        self.assertIn('Экспортировано страниц: 2 из 2', output)
+
+        page = self.page(self.tournament.id)
+        content = page.read_bytes()
+        self.assertIn('Команда 1'.encode(), content)
+        self.assertEqual(gzip.decompress(page.with_name('index.html.gz').read_bytes()), content)
+        # У статического хостинга нет /events/ и /changes/
+        self.assertNotIn(b'data-poll-url', content)
+        self.assertNotIn(b'data-events-url', content)
+        self.assertTrue(self.page().exists())
+
+    def test_only_changed_pages(self):
+        self.export()
+        self.assertIn('Экспортировано страниц: 0 из 2', self.export())
+
+        self.finish(self.match, 3, 0)
+        self.assertIn('Экспортировано страниц: 1 из 2', self.export())
+        self.assertIn(b'3:0', self.page(self.tournament.id).read_bytes())
+
+        # Изменение меню затрагивает все страницы
+        self.tournament.name = 'Высшая лига'
+        self.tournament.save()
+        self.assertIn('Экспортировано страниц: 2 из 2', self.export())
+
+        self.assertIn('Экспортировано страниц: 2 из 2', self.export('--full'))
+
+    def test_removed_tournament(self):
+        self.export()
+        tournament_id = self.tournament.id
+        self.tournament.delete()
+
+        output = self.export()
+        self.assertIn('Удалено страниц турниров: 1', output)
+        self.assertFalse(self.page(tournament_id).exists())
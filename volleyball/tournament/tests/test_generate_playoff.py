@@ -0,0 +1,102 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from ..counters import AWAITING_PLAYOFF_KEY, claim_playoff, rebuild_awaiting_playoff
+from ..management.commands.generate_playoff import plan_brackets, write_brackets
+from ..models import Counter, Match, Team, Tournament, TournamentGroup
+
+
+def league(group, name, teams, finished=True):
+    """Турнир с плэйофф на 4 команды и сыгранной (finished) круговой системой"""
+    tournament = Tournament.objects.create(
+        name=name, group=group, gender='M', has_playoff=True, playoff_teams=4
+    )
+    tournament.teams.add(*teams)
+    for i, team_a in enumerate(teams):
+        for team_b in teams[i + 1:]:
+            match = Match(tournament=tournament, team_a=team_a, team_b=team_b, stage='REGULAR')
+            if finished:
+                # Побеждает команда, стоящая в списке раньше: места совпадают с порядком teams
+                match.sets_a, match.sets_b, match.is_finished = 3, 0, True
+            match.save()
+    tournament.refresh_from_db()
+    return tournament
+
+
+def awaiting_playoff():
+    return Counter.objects.filter(key=AWAITING_PLAYOFF_KEY).values_list('value', flat=True).first() or 0
+
+
+class GeneratePlayoffTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.group = TournamentGroup.objects.create(name='Сезон 2024')
+        cls.teams = [Team.objects.create(name=f'Команда {number}', gender='M') for number in range(1, 5)]
+
+    def generate(self, *args):
+        output = StringIO()
+        call_command('generate_playoff', *args, stdout=output)
+        return output.getvalue()
+
+    def semifinals(self, tournament):
+        return list(
+            Match.objects.filter(tournament=tournament, stage='SEMI').order_by('bracket_slot')
+            .values_list('bracket_slot', 'team_a_id', 'team_b_id')
+        )
+
+    def test_batches(self):
+        ready = [league(self.group, f'Лига {number}', self.teams) for number in range(5)]
+        waiting = league(self.group, 'Не сыграна', self.teams, finished=False)
+        self.assertEqual(awaiting_playoff(), 5)
+
+        output = self.generate('--batch-size', '2')
+        self.assertIn('Плэйофф сгенерирован для 5 турниров', output)
+
+        a, b, c, d = self.teams
+        for tournament in ready:
+            self.assertEqual(self.semifinals(tournament), [(1, a.id, d.id), (2, b.id, c.id)])
+            tournament.refresh_from_db()
+            self.assertTrue(tournament.playoff_generated)
+            self.assertEqual(tournament.playoff_matches, 2)
+        self.assertEqual(self.semifinals(waiting), [])
+        self.assertEqual(awaiting_playoff(), 0)
+
+        # Повторный запуск ничего не создает
+        self.assertIn('Плэйофф сгенерирован для 0 турниров', self.generate())
+
+    def test_dry_run(self):
+        tournament = league(self.group, 'Лига', self.teams)
+        output = self.generate('--dry-run')
+        self.assertIn('Команда 1 - Команда 4', output)
+        self.assertEqual(self.semifinals(tournament), [])
+        self.assertEqual(awaiting_playoff(), 1)
+
+    def test_empty_bracket_skipped(self):
+        # Счетчики говорят о готовности, а в составе турнира команд меньше, чем нужно для сетки
+        tournament = league(self.group, 'Расхождение', self.teams)
+        Tournament.teams.through.objects.filter(tournament=tournament, team=self.teams[3]).delete()
+        self.assertEqual(Tournament.objects.get(pk=tournament.pk).teams_count, 4)
+
+        output = self.generate()
+        self.assertIn('⚠ Пропущен "Расхождение"', output)
+        tournament.refresh_from_db()
+        self.assertFalse(tournament.playoff_generated)
+        self.assertEqual(awaiting_playoff(), 1)
+
+    def test_generated_meanwhile(self):
+        # Плэйофф создан из админки между построением сетки и записью
+        tournament = league(self.group, 'Лига', self.teams)
+        plans = plan_brackets([tournament.id])
+        self.assertTrue(claim_playoff(tournament))
+        Match.objects.create(
+            tournament=tournament, team_a=self.teams[0], team_b=self.teams[3], stage='SEMI', bracket_slot=1
+        )
+
+        self.assertEqual(write_brackets(plans), [])
+        self.assertEqual(self.semifinals(tournament), [(1, self.teams[0].id, self.teams[3].id)])
+        awaiting = awaiting_playoff()
+        rebuild_awaiting_playoff()
+        self.assertEqual(awaiting_playoff(), awaiting)
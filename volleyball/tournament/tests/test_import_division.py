@@ -0,0 +1,98 @@
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from ..management.commands.import_division import parse_divisions
+from ..models import Match, StandingsCache, Team, Tournament
+
+
+DIVISION = """Первый дивизион мужчины
+Альфа
+Бета
+Гамма
+
+ТУР 1
+Альфа\tБета\t01.10.2025 19:00\t3:1\t25:20\t23:25\t25:18\t25:22
+Бета\tГамма\t08.10.2025\t\t
+ТУР 2
+Гамма\tАльфа\t15.10.2025\t0:3 (20:25, 18:25, 21:25)
+"""
+
+
+class ImportDivisionTests(TestCase):
+
+    def write(self, text):
+        handle, path = tempfile.mkstemp(suffix='.txt')
+        with os.fdopen(handle, 'w', encoding='utf-8') as file:
+            file.write(text)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def run_import(self, text, *args):
+        output = StringIO()
+        call_command('import_division', self.write(text), '--group', 'Сезон 2025', *args, stdout=output)
+        return output.getvalue()
+
+    def test_parse(self):
+        [division] = parse_divisions(DIVISION.splitlines(keepends=True))
+        self.assertEqual(division.name, 'Первый дивизион мужчины')
+        self.assertEqual(division.teams, ['Альфа', 'Бета', 'Гамма'])
+
+        first, unplayed, second = division.matches
+        self.assertEqual((first.stage, first.round_number, first.sets), ('REGULAR', 1, (3, 1)))
+        self.assertEqual(first.set_scores[1], {'a': 23, 'b': 25})
+        self.assertEqual(first.date_time.hour, 19)
+        self.assertIsNone(unplayed.sets)
+        self.assertEqual((second.round_number, second.sets, len(second.set_scores)), (2, (0, 3), 3))
+
+    def test_import(self):
+        output = self.run_import(DIVISION)
+        self.assertIn('✓ Импортировано дивизионов: 1', output)
+
+        tournament = Tournament.objects.get(name='Первый дивизион мужчины')
+        self.assertEqual(tournament.gender, 'M')
+        self.assertEqual(tournament.teams.count(), 3)
+        self.assertEqual(tournament.matches.count(), 3)
+        self.assertEqual(tournament.matches.filter(is_finished=True).count(), 2)
+
+        # bulk_create в обход сигналов: счетчики и таблица обновлены командой
+        tournament.refresh_from_db()
+        self.assertEqual(tournament.teams_count, 3)
+        self.assertEqual(tournament.finished_league_matches, 2)
+        alpha = StandingsCache.objects.get(tournament=tournament, team__name='Альфа')
+        self.assertEqual((alpha.played, alpha.sets_won, alpha.sets_lost, alpha.points), (2, 6, 1, 6))
+
+    def test_reimport_is_idempotent(self):
+        self.run_import(DIVISION)
+        teams, matches = Team.objects.count(), list(Match.objects.order_by('id').values())
+
+        output = self.run_import(DIVISION)
+        self.assertIn('= без изменений: 3', output)
+        self.assertIn('создано матчей 0, обновлено 0', output)
+        self.assertEqual(Team.objects.count(), teams)
+        self.assertEqual(list(Match.objects.order_by('id').values()), matches)
+
+    def test_reimport_updates_score(self):
+        self.run_import(DIVISION)
+        output = self.run_import(DIVISION.replace('Бета\tГамма\t08.10.2025\t\t', 'Бета\tГамма\t08.10.2025\t3:0'))
+        self.assertIn('создано матчей 0, обновлено 1', output)
+
+        match = Match.objects.get(team_a__name='Бета', team_b__name='Гамма')
+        self.assertEqual((match.sets_a, match.sets_b, match.is_finished), (3, 0, True))
+        beta = StandingsCache.objects.get(team__name='Бета')
+        self.assertEqual((beta.played, beta.sets_won, beta.points), (2, 4, 3))
+
+    def test_dry_run(self):
+        output = self.run_import(DIVISION, '--dry-run')
+        self.assertIn('Пробный запуск', output)
+        self.assertFalse(Tournament.objects.exists())
+        self.assertFalse(Team.objects.exists())
+
+    def test_bad_line(self):
+        with self.assertRaisesMessage(CommandError, 'Строка 7: не удалось разобрать дату "32.10.2025"'):
+            self.run_import(DIVISION.replace('01.10.2025 19:00', '32.10.2025'))
+        self.assertFalse(Match.objects.exists())
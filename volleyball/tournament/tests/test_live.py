@@ -0,0 +1,125 @@
+import asyncio
+import json
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from django.test import override_settings
+from django.urls import reverse
+
+from .. import live
+from ..live import EventLog, merge_deltas
+from ..models import Match
+from .base import TEST_SETTINGS, TournamentTestCase, sets
+
+
+@override_settings(**TEST_SETTINGS)
+class LiveUpdatesTests(TournamentTestCase):
+    """Изменения строятся один раз при публикации; опрос и поток только читают журнал"""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        log = EventLog(Path(directory.name) / 'live.sqlite3', keep=3600)
+        for target in (live, live.hub):
+            patcher = mock.patch.object(target, 'log', log)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.log = log
+
+        a, b, c, d = self.teams
+        self.match_ab = self.create_match(a, b)
+        self.match_cd = self.create_match(c, d)
+        self.url = reverse('tournament:tournament_changes', args=[self.tournament.id])
+
+    def publish(self, match, sets_a, sets_b):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.finish(match, sets_a, sets_b, sets(*[(25, 20)] * sets_a, *[(20, 25)] * sets_b))
+
+    def poll(self, after=None):
+        response = self.client.get(self.url, {} if after is None else {'after': after})
+        self.assertEqual(response.status_code, 200)
+        return json.loads(response.content)
+
+    def test_delta_built_once_per_event(self):
+        start = self.poll()['last']
+        with mock.patch.object(live, 'build_delta', wraps=live.build_delta) as build_delta:
+            self.publish(self.match_ab, 3, 0)
+            self.assertEqual(build_delta.call_count, 1)
+
+            with self.assertNumQueries(0):
+                for _ in range(3):
+                    data = self.poll(start)
+            self.assertEqual(build_delta.call_count, 1)
+
+        match_id, finished, score, _ = data['delta']['matches'][0]
+        self.assertEqual((match_id, finished, score), (self.match_ab.id, True, '3:0'))
+        rows = {row[0]: row for row in data['delta']['standings']['rows']}
+        self.assertEqual(rows[self.teams[0].id][1:4], [1, 0, 0])
+        self.assertEqual(self.poll(data['last']), {'last': data['last'], 'delta': None})
+
+    def test_events_merged(self):
+        start = self.poll()['last']
+        self.publish(self.match_ab, 3, 0)
+        self.publish(self.match_cd, 1, 3)
+        self.publish(self.match_ab, 3, 2)
+
+        delta = self.poll(start)['delta']
+        scores = {match[0]: match[2] for match in delta['matches']}
+        self.assertEqual(scores, {self.match_ab.id: '3:2', self.match_cd.id: '1:3'})
+        rows = {row[0]: row for row in delta['standings']['rows']}
+        self.assertEqual(set(rows), {team.id for team in self.teams})
+        # Последнее событие: победа 3:2 - 2 очка
+        self.assertEqual(rows[self.teams[0].id][-1], 2)
+
+    def test_expired_events(self):
+        self.publish(self.match_ab, 3, 0)
+        self.publish(self.match_cd, 3, 0)
+        first, last = self.log.bounds()
+        connection = self.log._connect()
+        with connection:
+            connection.execute('DELETE FROM events WHERE id = ?', (first,))
+        connection.close()
+
+        self.assertEqual(self.poll(first - 1), {'last': last, 'delta': {'reload': True}})
+
+    def test_deleted_match(self):
+        start = self.poll()['last']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.match_ab.delete()
+        self.assertTrue(self.poll(start)['delta']['reload'])
+
+    def test_merge_keeps_latest_values(self):
+        first = {'matches': [[1, True, '3:0', '']], 'standings': {'order': [1, 2], 'rows': [[1, 1], [2, 1]]},
+                 'cells': [[1, 1, 0, '3:0']]}
+        second = {'matches': [[1, True, '3:1', '']], 'standings': None, 'cells': []}
+        third = {'matches': [[2, False, 'vs', 'vs']], 'standings': {'order': [2, 1], 'rows': [[2, 5]]}, 'cells': []}
+        self.assertEqual(merge_deltas([first, second, third]), {
+            'matches': [[1, True, '3:1', ''], [2, False, 'vs', 'vs']],
+            'standings': {'order': [2, 1], 'rows': [[1, 1], [2, 5]]},
+            'cells': [[1, 1, 0, '3:0']],
+        })
+        self.assertEqual(merge_deltas([first, {'reload': True}]), {'reload': True})
+
+    def test_stream_replays_stored_delta(self):
+        start = self.poll()['last']
+        self.publish(self.match_ab, 3, 1)
+
+        async def first_messages():
+            stream = live._stream(self.tournament.id, start)
+            messages = [await stream.__anext__(), await stream.__anext__()]
+            await stream.aclose()
+            return messages
+
+        with mock.patch.object(live, 'build_delta', side_effect=AssertionError('build_delta при чтении')):
+            retry, message = asyncio.run(first_messages())
+        self.assertTrue(retry.startswith('retry:'))
+        event_id, event, data = message.split('\n')[:3]
+        self.assertEqual((event_id, event), (f'id: {start + 1}', 'event: delta'))
+        self.assertEqual(json.loads(data.removeprefix('data: '))['matches'][0][2], '3:1')
+        self.assertEqual(dict(live.hub.subscribers), {})
+
+    def test_page_polls_without_stream(self):
+        response = self.client.get(reverse('tournament:tournament_detail', args=[self.tournament.id]))
+        self.assertContains(response, f'data-poll-url="{self.url}"')
+        self.assertNotContains(response, 'data-events-url')
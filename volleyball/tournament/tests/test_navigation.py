@@ -0,0 +1,64 @@
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import reverse
+
+from ..models import Tournament, TournamentGroup
+from ..navigation import navigation_html, navigation_tree, navigation_version
+from .base import TEST_SETTINGS, TournamentTestCase
+
+
+@override_settings(**TEST_SETTINGS)
+class NavigationCacheTests(TournamentTestCase):
+    """Меню навигации строится один раз и сбрасывается при изменении групп и турниров"""
+
+    def setUp(self):
+        # Версии в кеше переживают откат транзакции предыдущего теста
+        cache.clear()
+
+    def names(self):
+        return {
+            group['name']: [tournament['name'] for tournament in group['tournaments']]
+            for group in navigation_tree()['groups']
+        }
+
+    def test_tree_cached(self):
+        self.assertEqual(self.names(), {'Сезон 2024': ['Лига']})
+        with self.assertNumQueries(0):
+            navigation_tree()
+            navigation_html()
+            navigation_html(self.tournament)
+
+    def test_tournament_changes(self):
+        self.names()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tournament.name = 'Высшая лига'
+            self.tournament.save()
+        self.assertEqual(self.names(), {'Сезон 2024': ['Высшая лига']})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Tournament.objects.create(name='Кубок', group=self.group, gender='F')
+        self.assertEqual(sorted(self.names()['Сезон 2024']), ['Высшая лига', 'Кубок'])
+
+    def test_group_changes(self):
+        self.names()
+        with self.captureOnCommitCallbacks(execute=True):
+            group = TournamentGroup.objects.create(name='Сезон 2025')
+        self.assertIn('Сезон 2025', self.names())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            group.delete()
+        self.assertNotIn('Сезон 2025', self.names())
+
+    def test_match_keeps_navigation(self):
+        version = navigation_version()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.finish(self.create_match(*self.teams[:2]), 3, 0)
+        self.assertEqual(navigation_version(), version)
+
+    def test_pages(self):
+        response = self.client.get(reverse('tournament:index'))
+        self.assertContains(response, 'Лига')
+
+        html = navigation_html(self.tournament)
+        self.assertIn('tournament-link current', html)
+        self.assertNotIn('tournament-link current', navigation_html())
@@ -0,0 +1,84 @@
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest import mock
+
+from django.db.models import Q
+from django.utils import timezone
+
+from ..models import Match
+from ..pagination import KeysetPaginator, read_cursor
+from .base import TournamentTestCase
+
+
+class KeysetPaginatorTests(TournamentTestCase):
+    FIELDS = ('date_time', 'round_number', 'id')
+    SALT = 'tournament.tests'
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        a, b, c, d = cls.teams
+        start = timezone.now()
+        pairs = [(a, b), (c, d), (a, c), (b, d), (a, d), (b, c)]
+        for index in range(12):
+            team_a, team_b = pairs[index % len(pairs)]
+            Match.objects.create(
+                tournament=cls.tournament, team_a=team_a, team_b=team_b, stage='REGULAR',
+                # Без даты - каждый третий матч, часть матчей - в одно время и без тура
+                date_time=None if index % 3 == 0 else start + timedelta(days=index // 2),
+                round_number=None if index % 4 == 1 else index // 4 + 1,
+            )
+
+    def expected(self):
+        return list(Match.objects.order_by(*[f'-{field}' for field in self.FIELDS]).values_list('id', flat=True))
+
+    def walk(self, per_page):
+        """Все страницы вперед, затем назад от последней: (id по страницам вперед, назад)"""
+        paginator = KeysetPaginator(Match.objects.all(), self.FIELDS, per_page, self.SALT)
+        pages = [paginator.page({})]
+        while pages[-1].next_cursor:
+            pages.append(paginator.page({}, read_cursor(pages[-1].next_cursor, self.SALT)))
+
+        backward = [pages[-1]]
+        while backward[-1].previous_cursor:
+            backward.append(paginator.page({}, read_cursor(backward[-1].previous_cursor, self.SALT)))
+
+        return (
+            [[match.id for match in page] for page in pages],
+            [[match.id for match in page] for page in reversed(backward)],
+        )
+
+    def test_pages_cover_all_rows_in_order(self):
+        expected = self.expected()
+        # Любой размер страницы: граница страницы попадает и до, и после перехода от дат к NULL
+        for per_page in range(1, len(expected) + 1):
+            with self.subTest(per_page=per_page):
+                forward, backward = self.walk(per_page)
+                self.assertEqual([pk for page in forward for pk in page], expected)
+                self.assertEqual(backward, forward)
+
+    def test_cursor_on_null(self):
+        expected = self.expected()
+        paginator = KeysetPaginator(Match.objects.all(), self.FIELDS, 3, self.SALT)
+        for match in Match.objects.filter(date_time__isnull=True):
+            position = expected.index(match.id)
+            with self.subTest(match=match.id):
+                following = paginator.page({}, read_cursor(paginator.encode({}, 'next', match), self.SALT))
+                self.assertEqual([item.id for item in following], expected[position + 1:position + 4])
+                preceding = paginator.page({}, read_cursor(paginator.encode({}, 'previous', match), self.SALT))
+                self.assertEqual([item.id for item in preceding], expected[max(position - 3, 0):position])
+
+    def test_tampered_cursor(self):
+        cursor = KeysetPaginator(Match.objects.all(), self.FIELDS, 3, self.SALT).page({}).next_cursor
+        self.assertIsNone(read_cursor(cursor + 'x', self.SALT))
+        self.assertIsNone(read_cursor(cursor, 'другая соль'))
+
+
+
+    def test_null_order_of_queryset_database(self):
+        # Порядок NULL берется у БД запроса, а не у БД по умолчанию
+        features = SimpleNamespace(features=SimpleNamespace(nulls_order_largest=True))
+        paginator = KeysetPaginator(Match.objects.using('replica'), self.FIELDS, 3, self.SALT)
+        with mock.patch('tournament.pagination.connections', {'replica': features}):
+            self.assertEqual(paginator._beyond('date_time', None, True), Q(date_time__isnull=False))
+            self.assertEqual(paginator._beyond('date_time', None, False), None)
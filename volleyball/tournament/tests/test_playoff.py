@@ -0,0 +1,70 @@
+from django.db import IntegrityError, transaction
+
+from ..models import Match
+from .base import TournamentTestCase
+
+
+class AdvanceBracketTests(TournamentTestCase):
+    """Сетка на 4 команды: финал и матч за 3 место появляются после обоих полуфиналов"""
+
+    def setUp(self):
+        self.tournament.has_playoff = True
+        self.tournament.playoff_teams = 4
+        self.tournament.save()
+        a, b, c, d = self.teams
+        self.semi_1 = self.create_match(a, d, stage='SEMI', bracket_slot=1)
+        self.semi_2 = self.create_match(b, c, stage='SEMI', bracket_slot=2)
+
+    def match(self, stage):
+        return Match.objects.filter(tournament=self.tournament, stage=stage, bracket_slot=1).first()
+
+    def test_final_and_third_place(self):
+        a, b, c, d = self.teams
+        self.finish(self.semi_1, 3, 1)
+        self.assertIsNone(self.match('FINAL'))
+        self.assertIsNone(self.match('THIRD'))
+
+        self.finish(self.semi_2, 0, 3)
+        final, third = self.match('FINAL'), self.match('THIRD')
+        self.assertEqual((final.team_a_id, final.team_b_id), (a.id, c.id))
+        self.assertEqual((third.team_a_id, third.team_b_id), (d.id, b.id))
+        self.assertFalse(final.is_finished)
+
+    def test_corrected_semifinal(self):
+        a, b, c, d = self.teams
+        self.finish(self.semi_1, 3, 1)
+        self.finish(self.semi_2, 0, 3)
+
+        # Исправленный до начала финала результат меняет участников, новых матчей нет
+        self.finish(self.semi_1, 2, 3)
+        final, third = self.match('FINAL'), self.match('THIRD')
+        self.assertEqual((final.team_a_id, final.team_b_id), (d.id, c.id))
+        self.assertEqual((third.team_a_id, third.team_b_id), (a.id, b.id))
+        self.assertEqual(Match.objects.filter(tournament=self.tournament, stage__in=('FINAL', 'THIRD')).count(), 2)
+
+        # Сыгранный финал не трогаем
+        self.finish(final, 3, 0)
+        self.finish(self.semi_1, 3, 2)
+        final.refresh_from_db()
+        self.assertEqual((final.team_a_id, final.team_b_id), (d.id, c.id))
+
+    def test_final_created_by_another_request(self):
+        # Финал уже создан другим запросом: второго не появляется, участники обновляются
+        a, b, c, d = self.teams
+        self.finish(self.semi_1, 3, 1)
+        Match.objects.bulk_create([
+            Match(tournament=self.tournament, team_a=b, team_b=a, stage='FINAL', bracket_slot=1),
+        ])
+
+        self.finish(self.semi_2, 0, 3)
+        finals = list(Match.objects.filter(tournament=self.tournament, stage='FINAL'))
+        self.assertEqual(len(finals), 1)
+        self.assertEqual((finals[0].team_a_id, finals[0].team_b_id), (a.id, c.id))
+
+    def test_slot_is_unique(self):
+        a, b, c, d = self.teams
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            self.create_match(a, b, stage='SEMI', bracket_slot=1)
+        # Матчи без позиции (созданные вручную) не ограничены
+        self.create_match(a, b, stage='SEMI')
+        self.create_match(c, d, stage='SEMI')
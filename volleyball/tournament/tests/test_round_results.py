@@ -0,0 +1,91 @@
+from django.contrib.auth.models import User
+from django.test import override_settings
+from django.urls import reverse
+
+from ..models import Match, StandingsCache, Tournament
+from .base import TEST_SETTINGS, TournamentTestCase
+
+
+@override_settings(**TEST_SETTINGS)
+class RoundResultsTests(TournamentTestCase):
+    """Результаты тура одной формой (admin_round_results)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        Tournament.objects.filter(pk=cls.tournament.pk).update(has_playoff=True, playoff_teams=4)
+        a, b, c, d = cls.teams
+        cls.rounds = {
+            1: [(a, b), (c, d)],
+            2: [(a, c), (b, d)],
+            3: [(a, d), (b, c)],
+        }
+        cls.user = User.objects.create_user('admin', password='admin', is_staff=True)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        self.url = reverse('tournament:admin_round_results', args=[self.tournament.id])
+        self.matches = {
+            number: [self.create_match(team_a, team_b, round_number=number) for team_a, team_b in pairs]
+            for number, pairs in self.rounds.items()
+        }
+
+    def post(self, number, scores):
+        """scores: {матч: [(a, b), ...]} - счет партий, остальные поля пустые"""
+        data = {}
+        for match, sets in scores.items():
+            for index, (a, b) in enumerate(sets, start=1):
+                data[f'set-a-{match.id}-{index}'] = a
+                data[f'set-b-{match.id}-{index}'] = b
+        return self.client.post(f'{self.url}?round=REGULAR-{number}', data)
+
+    def test_saves_round(self):
+        first, second = self.matches[1]
+        response = self.post(1, {
+            first: [(25, 20), (25, 18), (25, 22)],
+            second: [(25, 20), (20, 25), (25, 23), (25, 19)],
+        })
+        self.assertRedirects(response, f'{self.url}?round=REGULAR-1', fetch_redirect_response=False)
+
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual((first.sets_a, first.sets_b, first.is_finished), (3, 0, True))
+        self.assertEqual((second.sets_a, second.sets_b), (3, 1))
+        self.assertEqual(second.set_scores[1], {'a': 20, 'b': 25})
+
+        a, b, c, d = self.teams
+        self.assertEqual(StandingsCache.objects.get(team=c).points, 3)
+        tournament = Tournament.objects.get(pk=self.tournament.pk)
+        self.assertEqual(tournament.finished_league_matches, 2)
+
+    def test_error_saves_nothing(self):
+        first, second = self.matches[1]
+        response = self.post(1, {
+            first: [(25, 20), (25, 18), (25, 22)],
+            second: [(25, 25)],
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'ничьей в партии быть не может')
+        # Введенные значения остаются в форме
+        self.assertContains(response, f'name="set-a-{first.id}-1" value="25"')
+        self.assertFalse(Match.objects.filter(is_finished=True).exists())
+
+    def test_unchanged_rows_skipped(self):
+        first, _ = self.matches[1]
+        self.post(1, {first: [(25, 20), (25, 18), (25, 22)]})
+        response = self.post(1, {first: [(25, 20), (25, 18), (25, 22)]})
+        messages = [str(message) for message in response.wsgi_request._messages]
+        self.assertEqual(messages[-1], 'Сохранено результатов: 0')
+
+    def test_last_round_generates_playoff(self):
+        for number in (1, 2):
+            for match in self.matches[number]:
+                self.finish(match, 3, 0)
+        self.assertFalse(Match.objects.filter(stage='SEMI').exists())
+
+        first, second = self.matches[3]
+        self.post(3, {
+            first: [(25, 20), (25, 18), (25, 22)],
+            second: [(25, 20), (25, 18), (25, 22)],
+        })
+        self.assertEqual(Match.objects.filter(tournament=self.tournament, stage='SEMI').count(), 2)
@@ -0,0 +1,98 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Match, Team, Tournament, TournamentGroup, Venue
+from ..search import backend, matching, suggest
+from .base import TEST_SETTINGS
+
+
+class SearchTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.dynamo = Team.objects.create(name='Динамо Москва', gender='M')
+        cls.zenit = Team.objects.create(name='Зенит', gender='M')
+        cls.lokomotiv = Team.objects.create(name='Локомотив-Белогорье', gender='M')
+        cls.venue = Venue.objects.create(name='Спорткомплекс «Олимп»')
+
+    def found(self, model, term, fuzzy=True):
+        ids = matching(model, term, fuzzy)
+        self.assertIsInstance(ids, list)
+        return set(ids)
+
+    def test_all_words(self):
+        self.assertEqual(self.found(Team, 'москва динамо'), {self.dynamo.id})
+        self.assertEqual(self.found(Team, 'ЗЕН'), {self.zenit.id})
+        self.assertEqual(self.found(Venue, 'олимп'), {self.venue.id})
+        self.assertEqual(self.found(Team, 'зенит москва', fuzzy=False), set())
+
+    def test_without_index(self):
+        # icontains в SQLite не сравнивает кириллицу без учета регистра
+        with mock.patch('tournament.search.backend', return_value=None):
+            self.assertEqual(self.found(Team, 'Москва Динамо'), {self.dynamo.id})
+            self.assertEqual(self.found(Team, 'зенит москва'), set())
+
+    def test_index_follows_changes(self):
+        self.zenit.name = 'Зенит-Казань'
+        self.zenit.save()
+        self.assertEqual(self.found(Team, 'казань'), {self.zenit.id})
+
+        self.zenit.delete()
+        self.assertEqual(self.found(Team, 'казань', fuzzy=False), set())
+
+    def test_suggest_prefers_word_start(self):
+        Team.objects.create(name='Кузбасс', gender='M')
+        Team.objects.create(name='Басс', gender='M')
+        self.assertEqual([name for _, name in suggest(Team, 'басс')], ['Басс', 'Кузбасс'])
+
+    def test_typo(self):
+        if backend(connection) is None:
+            self.skipTest('поиск с опечатками требует FTS5 или pg_trgm')
+        self.assertEqual(self.found(Team, 'локомотив белогрье'), {self.lokomotiv.id})
+
+
+@override_settings(**TEST_SETTINGS)
+class MatchSearchTests(TestCase):
+    """Поиск в списке матчей: по командам и местам, с опечаткой - если точных совпадений нет"""
+
+    @classmethod
+    def setUpTestData(cls):
+        group = TournamentGroup.objects.create(name='Сезон 2024')
+        tournament = Tournament.objects.create(name='Лига', group=group, gender='M')
+        dynamo = Team.objects.create(name='Динамо Москва', gender='M')
+        lokomotiv = Team.objects.create(name='Локомотив-Белогорье', gender='M')
+        zenit = Team.objects.create(name='Зенит', gender='M')
+        venue = Venue.objects.create(name='Спорткомплекс «Олимп»')
+        cls.home = Match.objects.create(tournament=tournament, team_a=dynamo, team_b=lokomotiv, stage='REGULAR')
+        cls.away = Match.objects.create(
+            tournament=tournament, team_a=zenit, team_b=lokomotiv, stage='REGULAR', venue=venue
+        )
+        cls.user = User.objects.create_user('admin', password='admin', is_staff=True)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def found(self, search):
+        response = self.client.get(reverse('tournament:admin_matches_list'), {'search': search})
+        self.assertEqual(response.status_code, 200)
+        return {match.id for match in response.context['matches']}
+
+    def test_team_and_venue(self):
+        self.assertEqual(self.found('москва динамо'), {self.home.id})
+        self.assertEqual(self.found('олимп'), {self.away.id})
+        self.assertEqual(self.found('белогорье'), {self.home.id, self.away.id})
+        self.assertEqual(self.found('кристалл'), set())
+
+    def test_typo_when_nothing_matches(self):
+        if backend(connection) is None:
+            self.skipTest('поиск с опечатками требует FTS5 или pg_trgm')
+        self.assertEqual(self.found('динамо моссква'), {self.home.id})
+
+    def test_without_index(self):
+        with mock.patch('tournament.search.backend', return_value=None):
+            self.assertEqual(self.found('Москва Динамо'), {self.home.id})
+            self.assertEqual(self.found('Динамо Олимп'), set())
@@ -0,0 +1,93 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import override_settings
+
+from ..models import Match, StandingsCache
+from ..standings import STAT_FIELDS, compute_standings, read_standings, rebuild_standings_cache
+from .base import TEST_SETTINGS, TournamentTestCase, sets
+
+
+@override_settings(**TEST_SETTINGS)
+class StandingsCacheTests(TournamentTestCase):
+    """StandingsCache, который ведут сигналы, совпадает с таблицей, посчитанной по матчам"""
+
+    def assertCacheMatchesMatches(self):
+        def rows(standings):
+            return {row.team.id: tuple(getattr(row, field) for field in STAT_FIELDS) for row in standings}
+
+        teams = list(self.tournament.teams.all())
+        finished = Match.objects.filter(tournament=self.tournament, is_finished=True)
+        self.assertEqual(rows(read_standings(self.tournament, teams)), rows(compute_standings(teams, finished)))
+        self.assertEqual(rebuild_standings_cache(repair=False), [])
+
+    def test_create(self):
+        a, b, c, d = self.teams
+        self.create_match(a, b, sets_a=3, sets_b=1, is_finished=True,
+                          set_scores=sets((25, 20), (20, 25), (25, 20), (25, 18)))
+        self.create_match(c, d, sets_a=2, sets_b=3, is_finished=True,
+                          set_scores=sets((25, 20), (20, 25), (25, 20), (18, 25), (10, 15)))
+        self.create_match(a, c)
+        self.assertCacheMatchesMatches()
+        self.assertEqual(StandingsCache.objects.get(tournament=self.tournament, team=a).points, 3)
+
+    def test_update(self):
+        a, b, c, d = self.teams
+        match = self.create_match(a, b)
+        self.finish(match, 3, 0, sets((25, 10), (25, 10), (25, 10)))
+        self.assertCacheMatchesMatches()
+
+        # Исправление счета: вклад старого результата вычитается
+        self.finish(match, 2, 3, sets((25, 10), (25, 10), (10, 25), (10, 25), (10, 15)))
+        self.assertCacheMatchesMatches()
+
+        # Замена команды в сыгранном матче
+        match.team_b = c
+        match.save()
+        self.assertCacheMatchesMatches()
+        self.assertEqual(StandingsCache.objects.get(tournament=self.tournament, team=b).played, 0)
+
+        # Матч снова не сыгран
+        match.is_finished = False
+        match.save()
+        self.assertCacheMatchesMatches()
+
+    def test_set_scores_changed_in_place(self):
+        a, b, c, d = self.teams
+        self.finish(self.create_match(a, b), 3, 0, sets((25, 20), (25, 20), (25, 20)))
+
+        match = Match.objects.get(tournament=self.tournament, team_a=a)
+        match.set_scores[0]['a'] = 30
+        match.set_scores[0]['b'] = 28
+        match.save()
+        self.assertCacheMatchesMatches()
+        row = StandingsCache.objects.get(tournament=self.tournament, team=a)
+        self.assertEqual((row.points_won, row.points_lost), (80, 68))
+
+        # Повторное изменение того же объекта после сохранения
+        match.set_scores.append({'a': 0, 'b': 0})
+        match.set_scores[1]['a'] = 26
+        match.save()
+        self.assertCacheMatchesMatches()
+
+    def test_delete(self):
+        a, b, c, d = self.teams
+        first = self.finish(self.create_match(a, b), 3, 1)
+        self.finish(self.create_match(a, c), 3, 2)
+        self.finish(self.create_match(d, c), 0, 3)
+
+        first.delete()
+        self.assertCacheMatchesMatches()
+
+        # Каскадное удаление матчей вместе с командой
+        d.delete()
+        self.assertCacheMatchesMatches()
+
+    def test_rebuild_command(self):
+        a, b, c, d = self.teams
+        self.finish(self.create_match(a, b), 3, 1, sets((25, 20), (20, 25), (25, 20), (25, 18)))
+        StandingsCache.objects.filter(team=a).update(points=0)
+
+        self.assertEqual(len(rebuild_standings_cache(repair=False)), 1)
+        call_command('rebuild_standings', stdout=StringIO())
+        self.assertCacheMatchesMatches()
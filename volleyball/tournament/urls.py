@@ -1,12 +1,38 @@
+from django.conf import settings
 from django.urls import path
-from . import views, admin_views
+from . import views, admin_views, api, metrics, live
 
 app_name = 'tournament'
 
+# Публичные страницы: асинхронные варианты - для запуска через ASGI
+if settings.PUBLIC_VIEWS_ASYNC:
+    index_view, tournament_detail_view = views.aindex, views.atournament_detail
+else:
+    index_view, tournament_detail_view = views.index, views.tournament_detail
+
+# Обновления страницы турнира: опрос работает везде, поток SSE - только под ASGI
+live_patterns = [
+    path('tournament/<int:tournament_id>/changes/', live.tournament_changes, name='tournament_changes'),
+]
+if settings.LIVE_EVENTS_STREAM:
+    live_patterns.append(
+        path('tournament/<int:tournament_id>/events/', live.tournament_events, name='tournament_events'),
+    )
+
 urlpatterns = [
     # Публичные страницы
-    path('', views.index, name='index'),
-    path('tournament/<int:tournament_id>/', views.tournament_detail, name='tournament_detail'),
+    path('', index_view, name='index'),
+    path('tournament/<int:tournament_id>/', tournament_detail_view, name='tournament_detail'),
+    *live_patterns,
+
+    # JSON API
+    path('api/tournaments/<int:tournament_id>/standings/', api.api_standings, name='api_standings'),
+    path('api/tournaments/<int:tournament_id>/matrix/', api.api_matrix, name='api_matrix'),
+    path('api/tournaments/<int:tournament_id>/schedule/', api.api_schedule, name='api_schedule'),
+    path('api/tournaments/<int:tournament_id>/playoff/', api.api_playoff, name='api_playoff'),
+
+    # Метрики для Prometheus
+    path('metrics/', metrics.metrics_view, name='metrics'),
 
     # Авторизация в админ-панели
     path('admin-panel/login/', admin_views.admin_login, name='admin_login'),
@@ -14,6 +40,7 @@ urlpatterns = [
 
     # Кастомная админка
     path('admin-panel/', admin_views.admin_dashboard, name='admin_dashboard'),
+    path('admin-panel/search/suggest/', admin_views.admin_search_suggest, name='admin_search_suggest'),
 
     # Команды
     path('admin-panel/teams/', admin_views.admin_teams_list, name='admin_teams_list'),
@@ -38,6 +65,7 @@ urlpatterns = [
     path('admin-panel/tournaments/create/', admin_views.admin_tournament_create, name='admin_tournament_create'),
     path('admin-panel/tournaments/<int:tournament_id>/edit/', admin_views.admin_tournament_edit, name='admin_tournament_edit'),
     path('admin-panel/tournaments/<int:tournament_id>/delete/', admin_views.admin_tournament_delete, name='admin_tournament_delete'),
+    path('admin-panel/tournaments/<int:tournament_id>/results/', admin_views.admin_round_results, name='admin_round_results'),
 
     # Матчи
     path('admin-panel/matches/', admin_views.admin_matches_list, name='admin_matches_list'),
@@ -1,191 +1,209 @@
-from django.shortcuts import render, get_object_or_404
+import asyncio
+
+from django.conf import settings
+from django.shortcuts import render, get_object_or_404, aget_object_or_404
+from django.urls import reverse
+from django.db import transaction
 from django.db.models import Q, Count, Sum, Case, When, IntegerField
-from .models import TournamentGroup, Tournament, Match, Team
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
+from django.views.decorators.vary import vary_on_headers
+from .caching import cache_tournament_page
+from .conditional import (
+    index_etag, index_last_modified, tournament_page_etag, tournament_last_modified,
+    aindex_state, atournament_state, prepare_state,
+)
+from .counters import claim_playoff, playoff_ready
+from .playoff import first_round_matches, playoff_rounds
+from .models import Tournament, Match, Team
+from .navigation import navigation_html, navigation_tree, anavigation_html, anavigation_tree
+from .snapshot import TournamentSnapshot
+from .standings import read_standings, aread_standings_cache, standings_from_cache
 from collections import defaultdict
 
 
+# Этапы кругового турнира (в отличие от плэйофф)
+LEAGUE_STAGES = Match.LEAGUE_STAGES
+
+
+@cache_control(no_cache=True)
+@condition(etag_func=index_etag, last_modified_func=index_last_modified)
 def index(request):
-    """Главная страница со списком групп турниров"""
-    groups = TournamentGroup.objects.prefetch_related('tournaments').all()
-    return render(request, 'tournament/index.html', {'groups': groups})
+    """Главная страница со списком групп турниров (дерево меню - из кеша)"""
+    context = {
+        'groups': navigation_tree()['groups'],
+        'navigation': navigation_html(),
+    }
+    return render(request, 'tournament/index.html', context)
 
 
+# Vary снаружи condition(): ответ 304 должен различаться по тем же заголовкам, что и 200
+@cache_control(no_cache=True)
+@vary_on_headers('Accept-Encoding')
+@condition(etag_func=tournament_page_etag, last_modified_func=tournament_last_modified)
+@cache_tournament_page
 def tournament_detail(request, tournament_id):
     """Страница турнира с таблицами и расписанием"""
     tournament = get_object_or_404(
-        Tournament.objects.prefetch_related('teams', 'matches__team_a', 'matches__team_b', 'matches__venue'),
+        Tournament.objects.select_related('group').prefetch_related('teams'),
         id=tournament_id
     )
+    context = tournament_page_context(tournament)
+    context['live'] = live_updates(tournament.id)
+    return render(request, 'tournament/tournament_detail.html', context)
+
+
+def tournament_page_context(tournament):
+    """Данные страницы турнира (без обновлений в реальном времени - так ее выгружает export_static)"""
+    # Загружаем команды и матчи один раз для всех расчетов
+    snapshot = TournamentSnapshot.build(tournament)
 
     # Получаем таблицу
-    standings = calculate_standings(tournament)
+    standings = calculate_standings(tournament, snapshot)
 
     # Получаем матричную таблицу
-    matrix = calculate_matrix_table(tournament)
+    matrix = calculate_matrix_table(tournament, snapshot)
 
     # Получаем расписание по турам
-    schedule = get_schedule_by_rounds(tournament)
+    schedule = get_schedule_by_rounds(tournament, snapshot)
 
     # Получаем матчи плэйофф сгруппированные по этапам
-    playoff_matches = get_playoff_matches(tournament)
-
-    # Получаем все группы для меню навигации
-    all_groups = TournamentGroup.objects.prefetch_related('tournaments').all()
+    playoff_matches = get_playoff_matches(tournament, snapshot)
 
-    context = {
+    return {
         'tournament': tournament,
         'standings': standings,
         'matrix': matrix,
         'schedule': schedule,
         'playoff_matches': playoff_matches,
-        'all_groups': all_groups,
+        'navigation': navigation_html(tournament),
     }
 
+
+def live_updates(tournament_id):
+    """
+    Откуда страница турнира получает изменения: поток SSE (LIVE_EVENTS_STREAM, только ASGI)
+    или опрос раз в LIVE_CLIENT_POLL_MS
+    """
+    if settings.LIVE_EVENTS_STREAM:
+        return {'events_url': reverse('tournament:tournament_events', args=[tournament_id])}
+    return {
+        'poll_url': reverse('tournament:tournament_changes', args=[tournament_id]),
+        'poll_interval': settings.LIVE_CLIENT_POLL_MS,
+    }
+
+
+# ============= АСИНХРОННЫЕ ВАРИАНТЫ (ASGI) =============
+# Те же страницы через асинхронный ORM: независимые загрузки идут одновременно,
+# ожидание БД не занимает поток сервера. Включаются настройкой PUBLIC_VIEWS_ASYNC
+
+@cache_control(no_cache=True)
+@prepare_state(aindex_state)
+@condition(etag_func=index_etag, last_modified_func=index_last_modified)
+async def aindex(request):
+    """Главная страница (асинхронный вариант index)"""
+    tree, navigation = await asyncio.gather(anavigation_tree(), anavigation_html())
+    return render(request, 'tournament/index.html', {'groups': tree['groups'], 'navigation': navigation})
+
+
+@cache_control(no_cache=True)
+@vary_on_headers('Accept-Encoding')
+@prepare_state(atournament_state)
+@condition(etag_func=tournament_page_etag, last_modified_func=tournament_last_modified)
+@cache_tournament_page
+async def atournament_detail(request, tournament_id):
+    """Страница турнира (асинхронный вариант tournament_detail)"""
+    tournament = await aget_object_or_404(Tournament.objects.select_related('group'), id=tournament_id)
+
+    # Команды и матчи, таблица из кеша и меню загружаются одновременно;
+    # дальше все считается в памяти, как в синхронном варианте
+    snapshot, standings_cache, navigation = await asyncio.gather(
+        TournamentSnapshot.abuild(tournament),
+        aread_standings_cache(tournament),
+        anavigation_html(tournament),
+    )
+
+    context = {
+        'tournament': tournament,
+        'standings': standings_from_cache(snapshot.teams, standings_cache),
+        'matrix': calculate_matrix_table(tournament, snapshot),
+        'schedule': get_schedule_by_rounds(tournament, snapshot),
+        'playoff_matches': get_playoff_matches(tournament, snapshot),
+        'navigation': navigation,
+        'live': live_updates(tournament.id),
+    }
     return render(request, 'tournament/tournament_detail.html', context)
 
 
-def calculate_standings(tournament):
-    """Рассчитывает турнирную таблицу"""
-    teams = tournament.teams.all()
-    standings = []
-
-    for team in teams:
-        # Находим все матчи команды
-        matches = Match.objects.filter(
-            tournament=tournament,
-            is_finished=True
-        ).filter(
-            Q(team_a=team) | Q(team_b=team)
-        )
-
-        played = matches.count()
-        won = 0
-        lost = 0
-        sets_won = 0
-        sets_lost = 0
-        points_won = 0
-        points_lost = 0
-
-        for match in matches:
-            if match.team_a == team:
-                sets_won += match.sets_a or 0
-                sets_lost += match.sets_b or 0
-                
-                # Подсчет побед и поражений
-                if match.sets_a and match.sets_b:
-                    if match.sets_a > match.sets_b:
-                        won += 1
-                    else:
-                        lost += 1
-                
-                # Подсчет очков по партиям
-                if match.set_scores:
-                    for set_score in match.set_scores:
-                        points_won += set_score.get('a', 0)
-                        points_lost += set_score.get('b', 0)
-            else:
-                sets_won += match.sets_b or 0
-                sets_lost += match.sets_a or 0
-                
-                # Подсчет побед и поражений
-                if match.sets_a and match.sets_b:
-                    if match.sets_b > match.sets_a:
-                        won += 1
-                    else:
-                        lost += 1
-                
-                # Подсчет очков по партиям
-                if match.set_scores:
-                    for set_score in match.set_scores:
-                        points_won += set_score.get('b', 0)
-                        points_lost += set_score.get('a', 0)
-
-        # Подсчет очков турнира:
-        # 3 за победу 3:0 или 3:1
-        # 2 за победу 3:2
-        # 1 за поражение 2:3
-        # 0 за остальные поражения
-        tournament_points = 0
-        for match in matches:
-            if match.team_a == team:
-                if match.sets_a == 3 and match.sets_b in [0, 1]:
-                    tournament_points += 3
-                elif match.sets_a == 3 and match.sets_b == 2:
-                    tournament_points += 2
-                elif match.sets_b == 3 and match.sets_a == 2:
-                    tournament_points += 1
-                # Иначе 0 очков за поражение 1:3 или 0:3
-            else:
-                if match.sets_b == 3 and match.sets_a in [0, 1]:
-                    tournament_points += 3
-                elif match.sets_b == 3 and match.sets_a == 2:
-                    tournament_points += 2
-                elif match.sets_a == 3 and match.sets_b == 2:
-                    tournament_points += 1
-                # Иначе 0 очков за поражение 1:3 или 0:3
-
-        standings.append({
-            'team': team,
-            'played': played,
-            'won': won,
-            'lost': lost,
-            'sets_won': sets_won,
-            'sets_lost': sets_lost,
-            'sets_diff': sets_won - sets_lost,
-            'points_won': points_won,
-            'points_lost': points_lost,
-            'points_diff': points_won - points_lost,
-            'tournament_points': tournament_points,
-        })
-
-    # Сортировка по очкам турнира, затем по разнице сетов, затем по выигранным сетам
-    standings.sort(key=lambda x: (-x['tournament_points'], -x['sets_diff'], -x['sets_won']))
-
-    return standings
-
-
-def calculate_matrix_table(tournament):
-    """Рассчитывает матричную таблицу"""
-    teams = list(tournament.teams.all())
+def calculate_standings(tournament, snapshot=None):
+    """Турнирная таблица из StandingsCache (поддерживается при сохранении матчей)"""
+    teams = snapshot.teams if snapshot is not None else tournament.teams.all()
+    return read_standings(tournament, teams)
+
+
+def calculate_matrix_table(tournament, snapshot=None):
+    """
+    Рассчитывает матричную таблицу.
+    Возвращает общую матрицу (все результаты пары в ячейке) и матрицы по кругам:
+    N-й круг - это N-я по счету встреча пары команд
+    """
+    if snapshot is None:
+        snapshot = TournamentSnapshot.build(tournament)
+
+    teams = snapshot.teams
+
+    # Индекс результатов по паре (команда строки, команда столбца) в порядке туров.
+    # Матчи плэйофф в круговую матрицу не входят
+    pair_index = defaultdict(list)
+    finished = sorted(
+        [m for m in snapshot.finished_records if m.stage in LEAGUE_STAGES],
+        key=lambda m: (m.round_number is not None, m.round_number or 0, m.id)
+    )
+    for match in finished:
+        pair_index[(match.team_a_id, match.team_b_id)].append(f"{match.sets_a}:{match.sets_b}")
+        pair_index[(match.team_b_id, match.team_a_id)].append(f"{match.sets_b}:{match.sets_a}")
+
+    circles_count = max([tournament.number_of_rounds] + [len(scores) for scores in pair_index.values()])
+
     matrix = []
+    circles = [{'number': number, 'matrix': []} for number in range(1, circles_count + 1)]
 
     # Создаем структуру матрицы
     for team_a in teams:
         row = {'team': team_a, 'results': []}
+        circle_rows = [{'team': team_a, 'results': []} for _ in circles]
 
         for team_b in teams:
             if team_a == team_b:
                 row['results'].append({'is_self': True})
+                for circle_row in circle_rows:
+                    circle_row['results'].append({'is_self': True})
             else:
-                # Находим матчи между этими командами
-                matches = Match.objects.filter(
-                    tournament=tournament,
-                    is_finished=True
-                ).filter(
-                    (Q(team_a=team_a) & Q(team_b=team_b)) |
-                    (Q(team_a=team_b) & Q(team_b=team_a))
-                ).order_by('round_number')
-
-                results = []
-                for match in matches:
-                    if match.team_a == team_a:
-                        results.append(f"{match.sets_a}:{match.sets_b}")
-                    else:
-                        results.append(f"{match.sets_b}:{match.sets_a}")
+                results = pair_index.get((team_a.id, team_b.id), [])
 
                 row['results'].append({
                     'is_self': False,
                     'scores': results if results else ['-']
                 })
+                for number, circle_row in enumerate(circle_rows):
+                    circle_row['results'].append({
+                        'is_self': False,
+                        'score': results[number] if number < len(results) else None
+                    })
 
         matrix.append(row)
+        for circle, circle_row in zip(circles, circle_rows):
+            circle['matrix'].append(circle_row)
 
-    return {'teams': teams, 'matrix': matrix}
+    return {'teams': teams, 'matrix': matrix, 'circles': circles}
 
 
-def get_schedule_by_rounds(tournament):
+def get_schedule_by_rounds(tournament, snapshot=None):
     """Получает расписание, сгруппированное по турам"""
-    matches = Match.objects.filter(tournament=tournament).order_by('date_time', 'round_number')
+    if snapshot is None:
+        snapshot = TournamentSnapshot.build(tournament)
+
+    matches = snapshot.matches
 
     schedule = defaultdict(list)
     max_round_from_matches = 0
@@ -224,7 +242,7 @@ def get_schedule_by_rounds(tournament):
     
     # Если туры не задали явно, вычисляем максимальное количество туров
     if max_round == 0:
-        teams_count = tournament.teams.count()
+        teams_count = len(snapshot.teams)
         max_round = teams_count * tournament.number_of_rounds if teams_count > 0 else 0
 
     for i in range(1, max_round + 1):
@@ -244,91 +262,34 @@ def get_schedule_by_rounds(tournament):
 def check_and_generate_playoff(tournament):
     """
     Проверяет, все ли регулярные матчи сыграны.
-    Если да - генерирует плэйофф (если его еще нет)
+    Если да - создает первый раунд сетки плэйофф на 4 или 8 команд (если плэйофф еще нет).
+
+    Сначала готовность проверяется по счетчикам объекта турнира (без запроса),
+    затем подтверждается одним условным UPDATE, который заодно помечает плэйофф
+    как сгенерированный: при одновременном завершении последних матчей сетку создаст только один запрос
     """
-    if not tournament.has_playoff:
+    if not playoff_ready(tournament):
         return False
-    
-    # Получаем количество ожидаемых регулярных матчей
-    teams_count = tournament.teams.count()
-    if teams_count < 2:
-        return False
-    
-    # Каждая команда должна сыграть с каждой
-    # Количество матчей = C(n, 2) = n*(n-1)/2, умножено на количество кругов
-    expected_matches = (teams_count * (teams_count - 1) // 2) * tournament.number_of_rounds
-    
-    # Считаем завершенные регулярные матчи (REGULAR или PRELIMINARY)
-    completed_regular_matches = Match.objects.filter(
-        tournament=tournament,
-        stage__in=['REGULAR', 'PRELIMINARY'],
-        is_finished=True
-    ).count()
-    
-    # Если все регулярные матчи сыграны и плэйофф еще не создан
-    if completed_regular_matches >= expected_matches and expected_matches > 0:
-        # Проверяем, есть ли уже матчи плэйофф
-        playoff_matches_exist = Match.objects.filter(
-            tournament=tournament,
-            stage__in=['QUARTER', 'SEMI', 'THIRD', 'FINAL']
-        ).exists()
-        
-        if not playoff_matches_exist:
-            # Получаем турнирную таблицу для определения сильнейших команд
-            standings = calculate_standings(tournament)
-            
-            # Если есть хотя бы 4 команды, можем создать плэйофф
-            if len(standings) >= 4:
-                # Берем топ-4 команды для плэйофф
-                top_4 = standings[:4]
-                
-                # Первые две полу-финала
-                semifinal_1_teams = [top_4[0]['team'], top_4[3]['team']]  # 1 vs 4
-                semifinal_2_teams = [top_4[1]['team'], top_4[2]['team']]  # 2 vs 3
-                
-                # Создаем полу-финалы
-                Match.objects.create(
-                    tournament=tournament,
-                    team_a=semifinal_1_teams[0],
-                    team_b=semifinal_1_teams[1],
-                    stage='SEMI',
-                    round_number=None,
-                )
-                
-                Match.objects.create(
-                    tournament=tournament,
-                    team_a=semifinal_2_teams[0],
-                    team_b=semifinal_2_teams[1],
-                    stage='SEMI',
-                    round_number=None,
-                )
-                
-                return True
-    
-    return False
 
+    with transaction.atomic():
+        if not claim_playoff(tournament):
+            return False
+
+        # Первый раунд сетки по турнирной таблице (команд достаточно - проверено в claim_playoff);
+        # следующие раунды создаются по мере завершения матчей (playoff.advance_bracket)
+        standings = calculate_standings(tournament)
+        for match in first_round_matches(tournament, standings):
+            match.save()
+
+    return True
 
-def get_playoff_matches(tournament):
+
+def get_playoff_matches(tournament, snapshot=None):
     """
     Получает матчи плэйофф сгруппированные по этапам
     Возвращает список кортежей (этап_название, матчи)
     """
-    playoff_stages = [
-        ('QUARTER', '1/4 финала'),
-        ('SEMI', '1/2 финала (Полуфиналы)'),
-        ('THIRD', 'Матч за 3-е место'),
-        ('FINAL', 'Финал'),
-    ]
-    
-    result = []
-    
-    for stage_code, stage_name in playoff_stages:
-        matches = Match.objects.filter(
-            tournament=tournament,
-            stage=stage_code,
-        ).select_related('team_a', 'team_b', 'venue').order_by('date_time')
-        
-        if matches.exists():
-            result.append((stage_name, list(matches)))
-    
-    return result
\ No newline at end of file
+    if snapshot is None:
+        snapshot = TournamentSnapshot.build(tournament)
+
+    return playoff_rounds(snapshot.matches)
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.0/ref/settings/
 """
 
+import tempfile
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -41,6 +42,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'tournament.instrumentation.InstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -54,7 +56,7 @@ ROOT_URLCONF = 'volleyball.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'tournament.instrumentation.InstrumentedDjangoTemplates',
         'DIRS': [],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -82,6 +84,81 @@ DATABASES = {
 }
 
 
+# Cache
+# Файловый кеш общий для всех воркеров gunicorn на одном сервере
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': Path(tempfile.gettempdir()) / 'volleyball_cache',
+    }
+}
+
+# Сколько хранить закешированные страницы турниров (сек).
+# Актуальность обеспечивают версии, срок нужен только для очистки старых записей
+TOURNAMENT_PAGE_CACHE_TIMEOUT = 24 * 60 * 60
+
+# Сколько хранить дерево меню навигации и его разметку (сек); актуальность - по версии меню
+NAVIGATION_CACHE_TIMEOUT = 24 * 60 * 60
+
+# Сколько клиенты и прокси могут кешировать ответы JSON API (сек)
+API_CACHE_MAX_AGE = 30
+
+# Инструментирование запросов: запросы дольше порога (мс) пишутся в лог
+# tournament.instrumentation, None - не писать. Сводка хранит последние
+# INSTRUMENTATION_WINDOW запросов каждого view
+INSTRUMENTATION_SLOW_REQUEST_MS = 500
+INSTRUMENTATION_WINDOW = 200
+
+# Метрики Prometheus (/metrics/): общий для всех воркеров файл SQLite,
+# интервал сброса накопленных в процессе значений (сек) и адреса, с которых
+# разрешен сбор
+METRICS_DB_PATH = Path(tempfile.gettempdir()) / 'volleyball_metrics.sqlite3'
+METRICS_FLUSH_INTERVAL = 5
+METRICS_ALLOWED_IPS = ['127.0.0.1', '::1']
+
+# Каталог статического экспорта публичных страниц (manage.py export_static)
+STATIC_EXPORT_ROOT = BASE_DIR / 'static_export'
+
+# Асинхронные варианты главной и страницы турнира (views.aindex, views.atournament_detail).
+# Включать при запуске через ASGI (uvicorn, daphne); под WSGI каждый такой запрос
+# получал бы свой цикл событий
+PUBLIC_VIEWS_ASYNC = False
+
+# Трансляция результатов: журнал событий - общий для всех процессов файл SQLite,
+# хранится LIVE_EVENTS_KEEP сек. Страница турнира опрашивает /tournament/<id>/changes/
+# раз в LIVE_CLIENT_POLL_MS мс. LIVE_EVENTS_STREAM включает вместо опроса поток SSE
+# (/tournament/<id>/events/) - только при запуске через ASGI (uvicorn, daphne):
+# под WSGI каждое открытое соединение навсегда занимало бы поток воркера.
+# Для потока: каждый процесс проверяет журнал раз в LIVE_POLL_INTERVAL сек (свои
+# публикации - сразу), шлет keepalive раз в LIVE_KEEPALIVE сек; LIVE_QUEUE_SIZE - сколько
+# изменений ждут медленного клиента, LIVE_RETRY_MS - пауза браузера перед переподключением
+LIVE_EVENTS_STREAM = False
+LIVE_CLIENT_POLL_MS = 10000
+LIVE_EVENTS_DB_PATH = Path(tempfile.gettempdir()) / 'volleyball_live.sqlite3'
+LIVE_EVENTS_KEEP = 60 * 60
+LIVE_POLL_INTERVAL = 1
+LIVE_KEEPALIVE = 15
+LIVE_QUEUE_SIZE = 100
+LIVE_RETRY_MS = 3000
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'tournament.instrumentation': {
+            'handlers': ['console'],
+            'level': 'WARNING',
+        },
+    },
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
@@ -117,6 +194,20 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/5.0/howto/static-files/
 
 STATIC_URL = 'static/'
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+
+# Статика с хешем содержимого в именах (collectstatic) и сжатыми .gz/.br рядом
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'tournament.assets.CompressedManifestStaticFilesStorage',
+    },
+}
+
+# Сколько браузеры и CDN кешируют файлы статики с хешем в имени (сек)
+STATIC_ASSETS_MAX_AGE = 365 * 24 * 60 * 60
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.0/ref/settings/#default-auto-field
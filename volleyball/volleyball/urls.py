@@ -1,7 +1,14 @@
+import re
+
+from django.conf import settings
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, re_path, include
+
+from tournament.assets import static_asset
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    # Статика из STATIC_ROOT, когда ее не отдает nginx (при DEBUG ее перехватывает runserver)
+    re_path(rf'^{re.escape(settings.STATIC_URL.lstrip("/"))}(?P<path>.+)$', static_asset, name='static_asset'),
     path('', include('tournament.urls')),
 ]
\ No newline at end of file